@@ -23,11 +23,9 @@ class Ui_MainWindow(object):
         self.tabWidget.setObjectName("tabWidget")
         self.Attendance = QtWidgets.QWidget()
         self.Attendance.setObjectName("Attendance")
-        self.attendanceTable = QtWidgets.QTableWidget(self.Attendance)
+        self.attendanceTable = QtWidgets.QTableView(self.Attendance)
         self.attendanceTable.setGeometry(QtCore.QRect(10, 10, 481, 511))
         self.attendanceTable.setObjectName("attendanceTable")
-        self.attendanceTable.setColumnCount(0)
-        self.attendanceTable.setRowCount(0)
         self.addDateButton = QtWidgets.QPushButton(self.Attendance)
         self.addDateButton.setGeometry(QtCore.QRect(520, 30, 131, 31))
         self.addDateButton.setObjectName("addDateButton")
@@ -37,11 +35,9 @@ class Ui_MainWindow(object):
         self.tabWidget.addTab(self.Attendance, "")
         self.Grades = QtWidgets.QWidget()
         self.Grades.setObjectName("Grades")
-        self.gradesTable = QtWidgets.QTableWidget(self.Grades)
+        self.gradesTable = QtWidgets.QTableView(self.Grades)
         self.gradesTable.setGeometry(QtCore.QRect(10, 10, 481, 511))
         self.gradesTable.setObjectName("gradesTable")
-        self.gradesTable.setColumnCount(0)
-        self.gradesTable.setRowCount(0)
         self.add_assignment = QtWidgets.QPushButton(self.Grades)
         self.add_assignment.setGeometry(QtCore.QRect(520, 30, 131, 31))
         self.add_assignment.setObjectName("add_assignment")
@@ -0,0 +1,436 @@
+__author__ = 'Jake'
+
+# Imports the XML database classes whose API this engine implements.
+
+from array import array
+import xml.etree.cElementTree as ET
+from xml.etree.ElementTree import SubElement
+
+from DataInterface import DataInterface, journaled
+from TableInterface import TableInterface
+import Snapshot
+
+
+class SparseColumn:
+    """ A column which stores only the codes of the rows whose value
+    differs from the column's default. It is indexed, appended to and
+    iterated over like the array columns. NOT FOR EXTERNAL USE. """
+
+    def __init__(self, default, length):
+        """ Makes a column of length rows which all have the default
+        code. """
+
+        self.default = default
+        self.length = length
+        self.cells = {}
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, row):
+        return self.cells.get(row, self.default)
+
+    def __setitem__(self, row, code):
+        if code == self.default:
+            self.cells.pop(row, None)
+        else:
+            self.cells[row] = code
+
+    def __iter__(self):
+        cells = self.cells
+        default = self.default
+        for row in range(0, self.length):
+            yield cells.get(row, default)
+
+    def append(self, code):
+        self.length += 1
+        self[self.length - 1] = code
+
+
+class ColumnarInterface(TableInterface):
+    """ A DataInterface which keeps the students in memory as a table
+    instead of as an ElementTree. Each student is a row and each
+    default category or AssignDate header is a column. A column is an
+    array of integer codes into a table of the distinct strings stored
+    in the database, so a whole column can be read without looking up
+    any Elements. The XML file is only used to load and save the
+    database; groups, dates and assignments are still kept as Elements.
+    A sparse column (see DataInterface.sparseColumns) is a SparseColumn
+    which keeps only the cells that differ from its default. All public
+    methods take and return the same values as in DataInterface. """
+
+#############################################################################
+#          Database Initialization, Creation, Saving and Upkeep             #
+#############################################################################
+
+    def loadSnapshot(self, snap):
+        """ Fills the table straight from the cell matrix of a snapshot
+        read by Snapshot.loads, whose string table becomes the table of
+        distinct strings, and builds the group indexes.
+        NOT FOR EXTERNAL USE. """
+
+        self.data = Snapshot.toTree(snap, students=False)
+        self.buildIndex()
+
+        self.resetStrings(snap["strings"])
+        self.names = list(snap["names"])
+        self.rows = dict((self.names[x], x) for x in range(0, len(self.names)))
+
+        # each column is every width'th code of the row-major matrix
+        cells = snap["cells"]
+        width = snap["width"]
+        columns = [header for header, value in self.stuDefaults] + snap["dense"]
+        for x in range(0, width):
+            self.columns[columns[x]] = cells[x::width]
+        for header in snap["headers"]:
+            self.indexHeader(header)
+
+        # fills the sparse columns made by buildIndex before there were rows
+        for header in snap["defaults"]:
+            column = self.columns[header]
+            column.default = self.code(snap["defaults"][header])
+            column.length = len(self.names)
+            column.cells = dict(snap["sparse"][header])
+
+    def buildIndex(self):
+        """ Reads the student Elements into the table of columns, then
+        removes them from the tree so that only the table is kept, and
+        builds the group indexes. NOT FOR EXTERNAL USE. """
+
+        DataInterface.buildIndex(self)
+        self.data.find("Students").clear()
+
+    def resetIndex(self):
+        """ Empties the table and the indexes. NOT FOR EXTERNAL USE. """
+
+        DataInterface.resetIndex(self)
+
+        self.resetStrings()
+
+        # the name of the student in each row and the row of each name
+        self.names = []
+        self.rows = {}
+
+        # one array of codes per column, keyed by the column's header
+        self.columns = {}
+        for header, value in self.stuDefaults:
+            self.columns[header] = array("I")
+
+    def indexDefault(self, default):
+        """ Adds an empty sparse column for the given Default Element.
+        NOT FOR EXTERNAL USE. """
+
+        DataInterface.indexDefault(self, default)
+        self.columns[default.attrib["name"]] = SparseColumn(
+            self.code(default.attrib["info"]), len(self.names))
+
+    def indexStudent(self, student):
+        """ Adds the given student Element to the table as a new row, then
+        empties the Element since it is no longer needed.
+        NOT FOR EXTERNAL USE. """
+
+        # a cell the Element does not have is not stored, and is None
+        row = self.newRow(student.attrib["info"], None)
+        for cat in student:
+            if cat.tag == "AssignDate":
+                header = cat.attrib["name"]
+                if header not in self.headerSet:
+                    self.newColumn(header, None)
+                    self.indexHeader(header)
+            else:
+                header = cat.tag
+            self.columns[header][row] = self.code(cat.attrib["info"])
+        student.clear()
+
+    def toXML(self):
+        """ Returns a Gradebook Element which has the Students rebuilt from
+        the table and shares all other Elements with self.data.
+        NOT FOR EXTERNAL USE. """
+
+        root = ET.Element("Gradebook", dict(self.data.attrib))
+        for child in self.data:
+            if child.tag != "Students":
+                root.append(child)
+                continue
+
+            students = SubElement(root, "Students")
+            for row in range(0, len(self.names)):
+                student = SubElement(students, "Name")
+                student.attrib["info"] = self.names[row]
+                for header, value in self.stuDefaults:
+                    SubElement(student, header).attrib["info"] = \
+                        self.strings[self.columns[header][row]]
+                for header in self.headerList:
+                    column = self.columns[header]
+                    # a sparse column's cells at its default are not saved
+                    if isinstance(column, SparseColumn) and row not in column.cells:
+                        continue
+                    value = self.strings[column[row]]
+                    if value is None:
+                        continue
+                    cat = SubElement(student, "AssignDate")
+                    cat.attrib["info"] = value
+                    cat.attrib["name"] = header
+
+        return root
+
+    def newRow(self, name, empty=""):
+        """ Adds a row for the given student with every column set to
+        its default, which is the given value for a column which is not
+        sparse, and returns the row. NOT FOR EXTERNAL USE. """
+
+        row = len(self.names)
+        self.names.append(name)
+        self.rows[name] = row
+        for header, value in self.stuDefaults:
+            self.columns[header].append(self.code(value))
+        empty = self.code(empty)
+        for header in self.headerList:
+            column = self.columns[header]
+            if isinstance(column, SparseColumn):
+                column.length += 1
+            else:
+                column.append(empty)
+        return row
+
+    def newColumn(self, header, value):
+        """ Adds a column with every row set to the given value, which is
+        None if the rows do not have the cell. NOT FOR EXTERNAL USE. """
+
+        self.columns[header] = array("I", [self.code(value)]) * len(self.names)
+
+    def sortRoster(self):
+        """ Returns the names of the non-flagged, non-dropped students in
+        alphabetical order, read from the columns. NOT FOR EXTERNAL USE. """
+
+        yes = self.codes.get("Yes")
+        no = self.codes.get("No")
+        inclass = self.columns["In_Class"]
+        flag = self.columns["Flag"]
+        return sorted(self.names[row] for row in range(0, len(self.names))
+                      if inclass[row] == yes and flag[row] == no)
+
+    def activeRows(self):
+        """ Returns the rows of the students in activeNames, in the same
+        order. NOT FOR EXTERNAL USE. """
+
+        rows = self.rows
+        return [rows[name] for name in self.activeNames()]
+
+    def enrolledRows(self):
+        """ Returns the rows of the non-dropped students in the order they
+        were added, which is the order of the stuMassCall lists.
+        NOT FOR EXTERNAL USE. """
+
+        yes = self.codes.get("Yes")
+        inclass = self.columns["In_Class"]
+        return [row for row in range(0, len(self.names)) if inclass[row] == yes]
+
+#############################################################################
+#                           Finding Functions                               #
+#############################################################################
+
+    def findStudent(self, name):
+        """ Returns the row of the student with the given name, or None
+        if there is no such student. NOT FOR EXTERNAL USE. """
+
+        return self.rows.get(name)
+
+#############################################################################
+#                        Student Roster Functions                           #
+#############################################################################
+
+    def newStudent(self, name, email="", units=""):
+        """ Adds a row for a student who is not in the database yet, with
+        the given email and units. NOT FOR EXTERNAL USE. """
+
+        row = self.newRow(name)
+        self.columns["Email"][row] = self.code(email)
+        self.columns["Units"][row] = self.code(units)
+
+        # a new student starts with every category empty, sparse or not
+        empty = self.code("")
+        for header in self.defaults:
+            self.columns[header][row] = empty
+
+    @journaled
+    def dropStudent(self, name):
+        """ Sets the InClass attribute to indicate that the student
+        has dropped. """
+
+        self.columns["In_Class"][self.rows[name]] = self.code("No")
+        self.clearRoster()
+
+    def dateMatrix(self):
+        """ Returns the string table, the date columns and the number of
+        rows, for stuAbsenceAll. NOT FOR EXTERNAL USE. """
+
+        columns = [self.columns[date] for date in set(self.findDates())
+                   if date in self.columns]
+        # the tally reads whole arrays, so sparse columns are expanded
+        columns = [array("I", column) if isinstance(column, SparseColumn) else column
+                   for column in columns]
+        return self.strings, columns, len(self.names)
+
+    def storeAbsences(self, absences, excused):
+        """ Replaces the absence and excused columns with the given lists
+        of counts, one per row. NOT FOR EXTERNAL USE. """
+
+        self.columns["Number_of_Absences"] = array(
+            "I", [self.code(str(count)) for count in absences])
+        self.columns["Number_of_Excused"] = array(
+            "I", [self.code(str(count)) for count in excused])
+
+    @journaled
+    def stuRec(self, name):
+        """ Every row has every column of the table, so a student's
+        categories always match the headerList. """
+
+        return True
+
+#############################################################################
+#                       Student Data Management                             #
+#############################################################################
+
+    @journaled
+    def stuMod(self, name, header, value="", assign = False):
+        """ Changes the attribute of the given header category within
+        the given student element. Set assign to true if modifying a
+        non-default category. """
+
+        column = self.columns[header]
+        row = self.rows[name]
+        old = self.strings[column[row]]
+        column[row] = self.code(value)
+        self.cellChanged(name, header, old, value)
+        if header in self.rosterHeaders: self.clearRoster()
+
+    def stuCall(self, name, header, assign = False):
+        """ Gets the attribute of the given header category within
+        the given student element. Set assign to true if calling a
+        non-default category. """
+
+        return self.strings[self.columns[header][self.rows[name]]]
+
+    @journaled
+    def stuAdd(self, header, value=""):
+        """ Adds a column with the given header, with every student's
+        value set to value, and adds the header to the list of categories
+        given to students added in the future. This function replaces an
+        existing column with the same header, so it should be used in
+        conjunction with stuQuery which checks for duplicates. If
+        sparseColumns is true the new column is sparse, with value as its
+        default, so adding it takes the same time for any number of
+        students. """
+
+        self.uncountColumn(header)
+        self.indexHeader(header)
+        if self.sparseColumns:
+            self.columns[header] = SparseColumn(self.code(value), len(self.names))
+            self.declareDefault(header, value)
+        else:
+            self.newColumn(header, value)
+            if header in self.defaults:
+                self.declareDefault(header, None)
+        self.countColumn(header)
+
+    @journaled
+    def stuMassMod(self, header, vlist):
+        """ Changes all values of the given DEFAULT header to the corresponding
+        values of a list of values. This list must
+        include all non-flagged, non-dropped students and must be
+        arranged in alphabetical order by student
+        name. If the list given is the wrong size or the header is not
+        a category, the function will return
+        false. Otherwise, true will be returned. """
+
+        rows = self.activeRows()
+        if ((len(rows) != len(vlist)) or (header in self.headerList)
+                or header not in self.columns):
+            return False
+
+        column = self.columns[header]
+        for x in range(0, len(rows)):
+            column[rows[x]] = self.code(vlist[x])
+        if header in self.rosterHeaders: self.clearRoster()
+        return True
+
+    @journaled
+    def stuMassAssignDateMod(self, header, vlist):
+        """ Has the same function as stuMassMod except it is specifically
+        for modifying AssignDate columns. """
+
+        rows = self.activeRows()
+        if ((len(rows) != len(vlist)) or (header not in self.headerSet)):
+            return False
+
+        column = self.columns[header]
+        strings = self.strings
+        for x in range(0, len(rows)):
+            old = strings[column[rows[x]]]
+            column[rows[x]] = self.code(vlist[x])
+            self.cellChanged(self.names[rows[x]], header, old, vlist[x])
+        return True
+
+    def stuMassCall(self, header):
+        """ Returns a list of the values each student has of a given
+        category with the DEFAULT header as a tag. This
+        list is in the order the students were added and only includes
+        non-dropped students. If the given header is not a default
+        category, then the function will return an empty list. """
+
+        if (header not in self.deflist):
+            return []
+        if header == "Name":
+            return [self.names[row] for row in self.enrolledRows()]
+
+        column = self.columns.get(header)
+        if column is None:
+            return []
+        strings = self.strings
+        return [strings[column[row]] for row in self.enrolledRows()]
+
+    def stuMassAssignDateCall(self, header):
+        """ Has the same function as stuMassCall except it is specifically
+        for calling AssignDate columns. """
+
+        if (header not in self.deflist + self.headerList):
+            return []
+        column = self.columns.get(header)
+        if column is None:
+            return []
+        strings = self.cellStrings()
+        return [strings[column[row]] for row in self.enrolledRows()]
+
+    def columnValues(self, header, names):
+        """ Returns the value each of the given students has in the given
+        column, or None for a cell which is not stored.
+        NOT FOR EXTERNAL USE. """
+
+        column = self.columns[header]
+        rows = self.rows
+        strings = self.strings
+        return [strings[column[rows[name]]] for name in names]
+
+    @journaled
+    def stuCatMod(self, target, name):
+        """ Allows the tag of a preexisting student category to be
+        changed without affecting the category's
+        stored data. """
+
+        # if the header does not exist, returns false
+        if (target not in self.headerList): return False
+
+        self.headerList[self.headerList.index(target)] = name
+        self.headerSet.discard(target)
+        self.headerSet.add(name)
+        self.columns[name] = self.columns.pop(target)
+
+        # a sparse column keeps its default under the new name
+        default = self.defaults.pop(target, None)
+        if default is not None:
+            default.attrib["name"] = name
+            self.defaults[name] = default
+
+        self.clearTotals()
+        return True
@@ -2,9 +2,132 @@ __author__ = 'Jake'
 
 # Imports functions to parse and modify XML database.
 
+import ast
+from contextlib import contextmanager
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+import time
 import xml.etree.ElementTree as ET
 import xml.etree.cElementTree as ET
-from xml.etree.ElementTree import SubElement, ElementTree
+from array import array
+from xml.etree.ElementTree import SubElement
+
+import GradingPolicy
+import Snapshot
+
+log = logging.getLogger(__name__)
+
+# NumPy is optional; the class-wide tallies fall back to pure Python
+# without it.
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# the kinds of attendance value counted by the absence tallies
+PRESENT, EXCUSED, ABSENT = 0, 1, 2
+
+
+def tallyAbsences(columns, strings, numRows):
+    """ Takes the attendance of numRows students as a list of date
+    columns, each an array of one code per student into the list of
+    value strings. Returns the lists of every student's number of
+    absences and of excused absences, where 'E' is excused, 'Y' is
+    present and any other value is an absence. A cell which is not stored
+    (None) is present, as it is in stuAbsence. """
+
+    # the kind of attendance each code stands for
+    kinds = array("B", [ABSENT]) * len(strings)
+    for code in range(0, len(strings)):
+        if strings[code] == "Y" or strings[code] is None:
+            kinds[code] = PRESENT
+        elif strings[code] == "E":
+            kinds[code] = EXCUSED
+
+    if numRows == 0:
+        return [], []
+
+    if numpy is not None:
+        # looks up the kind of every cell of the dates x students matrix
+        # at once and sums down each student's column
+        kindmatrix = numpy.frombuffer(kinds, dtype=numpy.uint8)[
+            numpy.array([numpy.frombuffer(column, dtype=numpy.uint32)
+                         for column in columns], dtype=numpy.intp).reshape(-1, numRows)]
+        return ((kindmatrix == ABSENT).sum(axis=0).tolist(),
+                (kindmatrix == EXCUSED).sum(axis=0).tolist())
+
+    absences = [0] * numRows
+    excused = [0] * numRows
+    for column in columns:
+        for row in range(0, numRows):
+            kind = kinds[column[row]]
+            if kind == ABSENT:
+                absences[row] += 1
+            elif kind == EXCUSED:
+                excused[row] += 1
+    return absences, excused
+
+
+def journaled(method):
+    """ Decorator for the DataInterface methods which change the
+    database. Every outermost call is recorded in the change journal
+    with its arguments so that it can be replayed when the database is
+    loaded again. Calls made from inside another journaled method are
+    not recorded separately, and only outermost calls send change events
+    to the listeners (see DataInterface.subscribe). The database's lock is
+    held for the whole call so that the background save thread never
+    writes a half-made change. """
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            outermost = not self.changeDepth and not self.replaying
+            # inside a batch, notes how to undo the change on rollback
+            if outermost and self.batchDepth:
+                self.recordUndo(method.__name__, callArguments(method, args, kwargs))
+            self.changeDepth += 1
+            try:
+                result = method(self, *args, **kwargs)
+            finally:
+                self.changeDepth -= 1
+            if self.changeDepth == 0:
+                self.logChange(method.__name__, args, kwargs)
+            # tells the listeners (see subscribe) what has changed
+            if outermost and self.listeners:
+                for event in self.changeEvents(method.__name__,
+                                               callArguments(method, args, kwargs), result):
+                    self.notify(event)
+            return result
+
+    return wrapper
+
+
+# the signature and parameter defaults of each journaled method, as used
+# by callArguments
+signatures = {}
+
+
+def callArguments(method, args, kwargs):
+    """ Returns a dictionary from the name of each parameter of the given
+    DataInterface method, other than self, to the value it takes in a
+    call with the given arguments. NOT FOR EXTERNAL USE. """
+
+    # the signature of each method and the defaults of its parameters
+    if method not in signatures:
+        signature = inspect.signature(method)
+        signatures[method] = (signature, dict(
+            (name, parameter.default) for name, parameter in signature.parameters.items()
+            if parameter.default is not parameter.empty))
+    signature, defaults = signatures[method]
+
+    call = dict(defaults)
+    call.update(signature.bind(None, *args, **kwargs).arguments)
+    call.pop("self", None)
+    return call
 
 
 class DataInterface:
@@ -19,41 +142,377 @@ class DataInterface:
     deflist = ["Name", "Email", "Units", "Number_of_Absences",
                "Number_of_Excused", "In_Class", "Flag", "Students", "Grade", "Students", "Units"]
 
+    # the default student categories in the order they are saved, with the
+    # value given to a newly added student. The other engines keep them as
+    # columns, slots or table columns in this order.
+    stuDefaults = [("Email", ""), ("Units", ""), ("Number_of_Absences", "0"),
+                   ("Number_of_Excused", "0"), ("In_Class", "Yes"),
+                   ("Flag", "No"), ("Grade", "Pass")]
+
+    # the number of journal records after which save writes a full
+    # checkpoint of the database instead of appending to the journal
+    checkpointEvery = 500
+
+    # whether a binary snapshot (see Snapshot) is written next to every
+    # full save and loaded instead of the XML while the XML is unchanged
+    snapshots = True
+
+    # the default categories whose values decide whether a student is in
+    # the active roster (see activeNames)
+    rosterHeaders = ("In_Class", "Flag")
+
+    # whether stuAdd makes sparse columns, which store only the cells
+    # whose value differs from the value the column was added with. Set to
+    # False to save files which versions without the Defaults element can
+    # read.
+    sparseColumns = True
+
 #############################################################################
 #          Database Initialization, Creation, Saving and Upkeep             #
 #############################################################################
-    def __init__(self, fileloc="", year="", semester=""):
+    def __init__(self, fileloc="", year="", semester="", journal=False,
+                 saveDelay=0):
         """ Creates the database. If a file location (fileloc), the
         function open up a previously saved database.
         If no file location is passed, the function will use newDB to
-        create a new database. """
+        create a new database. If journal is true, save appends the
+        changes made since the last save to a journal file instead of
+        rewriting the whole database (see save and checkpoint). If a
+        saveDelay in milliseconds is given, saves are done by a
+        background thread (see save, flush and close). """
 
         # stores list of non-default fields for students and groups respectively
         self.headerList = []
         self.groHeaderList = []
-        # creates the list of non-default data categories.
+
+        # the change journal: records not yet saved, the number of records
+        # in the journal file and the database file the journal belongs to
+        self.journaling = journal
+        self.journal = []
+        self.journalSize = 0
+        self.journalBase = fileloc
+        self.changeDepth = 0
+        self.replaying = False
+        self.batchDepth = 0
+        self.listeners = []
+
+        # the background saving state. lock guards the data against the
+        # save thread and writeLock keeps two writes from overlapping.
+        # saveStats counts the saves requested, the writes actually
+        # performed, the background writes which failed and the total
+        # seconds spent writing. saveError is the last failure of the
+        # background thread, which keeps retrying; close writes once more
+        # itself, so it raises if the failure has not cleared.
+        self.saveDelay = saveDelay
+        self.saveFile = fileloc or "database.xml"
+        self.saveThread = None
+        self.saveRequested = threading.Event()
+        self.lock = threading.RLock()
+        self.writeLock = threading.RLock()
+        self.dirty = False
+        self.closing = False
+        self.lastWrite = 0.0
+        self.saveError = None
+        self.saveStats = {"requested": 0, "performed": 0, "failed": 0,
+                          "seconds": 0.0}
+
         if fileloc:
-            tree = ET.parse(fileloc)
-            # reads from the database file into an ElementTree object
-            self.data = tree.getroot()
-            # sets the root of this object to the global variable data.
-            self.findHeaders()  # loads all non-default data categories.
+            # reads the database file, building the indexes and the list of
+            # non-default data categories as it goes.
+            self.load(fileloc)
         else:
             self.data = self.newDB(year, semester)
             # sets the global variable data to the root returned by
             # newDB.
+            self.buildIndex()
+
+        self.loadPolicy()
+
+        # applies the changes which were journaled after the last checkpoint
+        if fileloc and journal:
+            self.replayJournal(fileloc + ".journal")
 
 
     def save(self, filename="database.xml"):
         """ Writes the database to the current folder. If a file name is
         passed, it will be saved under that name.
         If no name is passed, it will be saved under the default name
-        "database.xml". """
+        "database.xml". When journaling, only the changes made since the
+        last save are appended to filename.journal, and the whole
+        database is written once the journal reaches checkpointEvery
+        records. If the database was created with a saveDelay, this only
+        marks the database as changed and the background save thread
+        writes it at most once every saveDelay milliseconds. """
+
+        self.saveStats["requested"] += 1
+        self.saveFile = filename
+
+        # inside a batch, the save is made once the batch is committed
+        if self.batchDepth:
+            self.pendingSave = filename
+            return
+        self.startSave(filename)
+
+    def startSave(self, filename):
+        """ Does the work of save once no batch is open: writes the
+        database or hands it to the background save thread.
+        NOT FOR EXTERNAL USE. """
+
+        if not self.saveDelay:
+            self.writeSave(filename)
+            return
+
+        # hands the save to the background thread, starting it if needed
+        with self.lock:
+            self.dirty = True
+        if self.saveThread is None:
+            self.saveThread = threading.Thread(target=self.saveWorker)
+            self.saveThread.daemon = True
+            self.saveThread.start()
+        self.saveRequested.set()
+
+    def flush(self):
+        """ Immediately writes any changes which the background save
+        thread has not written yet. """
+
+        if self.dirty:
+            self.writeSave(self.saveFile)
+
+    def close(self):
+        """ Stops the background save thread, writes any changes which
+        have not been written and, when journaling, folds the journal
+        into a checkpoint. Should be called when the program exits. """
+
+        if self.saveThread is not None:
+            self.closing = True
+            self.saveRequested.set()
+            self.saveThread.join()
+            self.saveThread = None
+
+        if self.journaling and (self.dirty or self.journal or self.journalSize):
+            self.checkpoint(self.saveFile)
+        else:
+            self.flush()
+        self.saveError = None
+
+    def saveWorker(self):
+        """ Runs on the background save thread. Waits for save requests
+        and writes the database at most once every saveDelay
+        milliseconds, so that a burst of saves results in one write.
+        NOT FOR EXTERNAL USE. """
 
-        # wraps the global variable data (an Element) in an ElementTree
-        # instance.
-        file = ElementTree(self.data)
-        file.write(filename)
+        while not self.closing:
+            self.saveRequested.wait()
+
+            # waits out the rest of the delay since the last write, during
+            # which any further save requests are collapsed into this one
+            wait = self.lastWrite + self.saveDelay / 1000.0 - time.time()
+            if wait > 0 and not self.closing:
+                time.sleep(wait)
+
+            self.saveRequested.clear()
+            try:
+                self.flush()
+            except Exception as error:
+                # keeps the thread alive and tries again after the delay,
+                # since the changes are still marked as not written
+                log.exception("could not save %s", self.saveFile)
+                self.saveStats["failed"] += 1
+                self.saveError = error
+                self.lastWrite = time.time()
+                self.saveRequested.set()
+            else:
+                self.saveError = None
+
+    def writeSave(self, filename):
+        """ Does the work of save: either appends the journal or writes
+        the whole database, and updates the save counters.
+        NOT FOR EXTERNAL USE. """
+
+        start = time.time()
+        with self.writeLock:
+            with self.lock:
+                self.dirty = False
+
+            records = []
+            try:
+                if not self.journaling:
+                    self.writeTree(filename)
+
+                # the journal can only be appended to the file it was
+                # started from
+                elif (filename != self.journalBase or not os.path.isfile(filename)
+                        or self.journalSize + len(self.journal) >= self.checkpointEvery):
+                    self.checkpoint(filename)
+
+                elif self.journal:
+                    with self.lock:
+                        records = self.journal
+                        self.journal = []
+                    with open(filename + ".journal", "a") as file:
+                        file.write("".join(records))
+                        file.flush()
+                        os.fsync(file.fileno())
+                    self.journalSize += len(records)
+            except BaseException:
+                # puts back what was not written so the next save writes it
+                with self.lock:
+                    self.dirty = True
+                    self.journal[:0] = records
+                raise
+
+        self.lastWrite = time.time()
+        self.saveStats["performed"] += 1
+        self.saveStats["seconds"] += self.lastWrite - start
+
+    def writeTree(self, filename):
+        """ Writes the whole database to filename. The tree is serialized
+        while holding the lock, so it cannot change half way through,
+        and is written to a temporary file first so that a crash cannot
+        leave a half-written database behind. NOT FOR EXTERNAL USE. """
+
+        with self.lock:
+            root = self.toXML()
+            text = ET.tostring(root)
+            if self.snapshots:
+                snap = Snapshot.dumps(root, self.stuDefaults)
+        with open(filename + ".tmp", "wb") as file:
+            file.write(text)
+        os.replace(filename + ".tmp", filename)
+
+        # the snapshot is written after the XML, so that it can record the
+        # size and modification time of the XML it belongs to
+        if self.snapshots:
+            with open(filename + ".snap.tmp", "wb") as file:
+                file.write(Snapshot.setSource(snap, Snapshot.stamp(filename)))
+            os.replace(filename + ".snap.tmp", filename + ".snap")
+
+    def toXML(self):
+        """ Returns the root Element of the tree which save writes out.
+        NOT FOR EXTERNAL USE. """
+
+        return self.data
+
+    def checkpoint(self, filename=""):
+        """ Writes the whole database to filename (by default the file the
+        journal belongs to, or "database.xml") and empties the journal.
+        Should be called when the program exits. """
+
+        if not filename:
+            filename = self.journalBase or "database.xml"
+
+        with self.writeLock:
+            # numbers the checkpoint so that journal records written against
+            # an older checkpoint are never replayed on top of this one
+            with self.lock:
+                number = int(self.data.attrib.get("checkpoint", "0")) + 1
+                self.data.attrib["checkpoint"] = str(number)
+                self.journal = []
+
+            try:
+                self.writeTree(filename)
+            except BaseException:
+                # the records since the last checkpoint are gone, so the
+                # next save must write the whole database again
+                self.journalSize = self.checkpointEvery
+                raise
+            if os.path.isfile(filename + ".journal"):
+                os.remove(filename + ".journal")
+
+            self.journalSize = 0
+            self.journalBase = filename
+
+    def logChange(self, op, args, kwargs):
+        """ Adds a record of a change to the journal of changes which
+        have not been saved yet. NOT FOR EXTERNAL USE. """
+
+        if not self.journaling or self.replaying:
+            return
+
+        record = {"checkpoint": self.data.attrib.get("checkpoint", "0"),
+                  "op": op, "args": list(args), "kwargs": kwargs}
+        self.journal.append(json.dumps(record) + "\n")
+
+    def replayJournal(self, journalname):
+        """ Applies the changes recorded in the given journal file which
+        were made after the database's last checkpoint. A record cut off
+        by a crash while it was being written is ignored.
+        NOT FOR EXTERNAL USE. """
+
+        if not os.path.isfile(journalname):
+            return
+
+        number = self.data.attrib.get("checkpoint", "0")
+        self.replaying = True
+        try:
+            with open(journalname) as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if record["checkpoint"] != number:
+                        continue
+                    getattr(self, record["op"])(*record["args"], **record["kwargs"])
+                    self.journalSize += 1
+        finally:
+            self.replaying = False
+
+    def infoCall(self, key):
+        """ Returns the gradebook attribute with the given key, or None if
+        it is not set. NOT FOR EXTERNAL USE. """
+
+        return self.data.attrib.get(key)
+
+    def infoMod(self, key, value):
+        """ Sets the gradebook attribute with the given key to value, or
+        removes it if value is None. NOT FOR EXTERNAL USE. """
+
+        if value is None:
+            self.data.attrib.pop(key, None)
+        else:
+            self.data.attrib[key] = value
+
+    def loadPolicy(self):
+        """ Reads the grading policy (see GradingPolicy) stored in the
+        gradebook, or if there is none, the one in the sidecar file next
+        to the database (database.xml.policy). The default policy is used
+        if neither exists or the stored one is not valid.
+        NOT FOR EXTERNAL USE. """
+
+        text = self.infoCall("policy")
+        if text is None and os.path.isfile(self.saveFile + ".policy"):
+            with open(self.saveFile + ".policy") as file:
+                text = file.read()
+
+        self.policy = GradingPolicy.GradingPolicy()
+        if text is not None:
+            try:
+                self.policy = GradingPolicy.GradingPolicy.fromJSON(text)
+            except ValueError:
+                pass
+
+    @journaled
+    def setPolicy(self, settings):
+        """ Replaces the grading policy used by stuGrade and stuGradeAll
+        with one made from the given dictionary of settings (see
+        GradingPolicy) and stores it in the gradebook. Passing None
+        removes the stored policy, so that the sidecar file or the
+        default policy is used again. Raises a ValueError if the settings
+        are not a valid policy. Every enrolled student is then regraded
+        under the new policy (see stuGradeAll). """
+
+        if settings is None:
+            self.infoMod("policy", None)
+            self.loadPolicy()
+        else:
+            policy = GradingPolicy.GradingPolicy(settings)
+            self.infoMod("policy", policy.toJSON())
+            self.policy = policy
+
+        # the caps change the homework points in the running totals
+        self.clearTotals()
+        self.stuGradeAll()
 
 
     def newDB(self, year="", semester=""):
@@ -78,34 +537,464 @@ class DataInterface:
         return root  # returns the root to be saved as self.data.
 
 
-    def findHeaders(self):
-        """ findHeaders:  Deduces the list of non-default category
-        headers by finding a non-flagged, non-dropped student
-        and adding all of their non-default categories to the header
-        list. NOT FOR EXTERNAL USE. """
+    def load(self, fileloc):
+        """ Reads the database file at fileloc in a single pass. Each
+        student and group is added to the indexes, and each new
+        AssignDate name to the header list, as soon as its Element has
+        been read, so no further passes over the tree are needed. This
+        saves time but not memory here, since the tree is the database
+        and is kept whole; the engines whose indexStudent converts and
+        empties each student (see TableInterface) are the ones which
+        never hold every student's Elements at once. If the snapshot
+        next to the file was made from the file as it is now, with the
+        same size and modification time, the snapshot is loaded instead.
+        NOT FOR EXTERNAL USE. """
+
+        snapname = fileloc + ".snap"
+        if self.snapshots and os.path.isfile(snapname):
+            try:
+                with open(snapname, "rb") as file:
+                    snap = Snapshot.loads(file.read(), self.stuDefaults)
+            except ValueError:
+                snap = None
+            # a damaged snapshot, or one of an XML file which has been
+            # changed since, is ignored and the XML read instead
+            if snap is not None and snap["source"] == Snapshot.stamp(fileloc):
+                self.loadSnapshot(snap)
+                return
+
+        self.data = None
+        self.resetIndex()
+
+        for event, elem in ET.iterparse(fileloc, events=("start", "end")):
+            if event == "start":
+                # the first Element started is the Gradebook root
+                if self.data is None:
+                    self.data = elem
+            elif elem.tag == "Default":
+                self.indexDefault(elem)
+            elif elem.tag == "Name":
+                self.indexStudent(elem)
+            elif elem.tag == "Group":
+                self.indexGroup(elem)
+
+    def loadSnapshot(self, snap):
+        """ Rebuilds the tree from a snapshot read by Snapshot.loads and
+        builds the indexes. NOT FOR EXTERNAL USE. """
+
+        self.data = Snapshot.toTree(snap)
+        self.buildIndex()
+
+    def buildIndex(self):
+        """ Builds the indexes and header list from the whole tree. Must
+        be called whenever self.data is replaced other than by load.
+        NOT FOR EXTERNAL USE. """
+
+        self.resetIndex()
+        defaults = self.data.find("Defaults")
+        if defaults is not None:
+            for default in defaults:
+                self.indexDefault(default)
+        for student in self.data.find("Students"):
+            self.indexStudent(student)
+        for group in self.data.find("Groups"):
+            self.indexGroup(group)
+
+    def resetIndex(self):
+        """ Empties the indexes and the header list. NOT FOR EXTERNAL USE. """
 
-        # creates the list of default student categories and the empty header
-        # lists.
-        headerlist = []
-        headerlistgro = []
+        # the list of AssignDate names, and the same names as a set
+        self.headerList = []
+        self.headerSet = set()
+
+        # maps the name of each sparse column to its Default Element
+        self.defaults = {}
+
+        # maps each student's name to their Element for findStudent.
+        self.stuIndex = {}
+
+        # maps a student's name to a dictionary from AssignDate name to
+        # Element. Each dictionary is built by findAssignDate the first
+        # time that student's columns are used.
+        self.adIndex = {}
+
+        # maps each group's name to its Element and each student's name
+        # to the list of names of the groups they belong to.
+        self.groIndex = {}
+        self.stuGroIndex = {}
 
-        # finds the first non-flagged, non-dropped student and sets
-        # the list of their children to catlist.
-        stulist = self.data.find("Students").getchildren()
-        x = 0
-        while (stulist[x].find("Flag").attrib["info"] == "Yes"
-               or stulist[x].find("In_Class").attrib["info"] == "No"):
-            x += 1
-        catlist = stulist[x].getchildren()
+        # maps each group's name to a dictionary from the name of each of
+        # its members to their Member Element
+        self.groMembers = {}
 
-        # adds all categories whose tags are not a member of stdlist
-        # to headerlist.
-        for x in range(0, len(headerlist)):
-            if (catlist[x].tag not in self.deflist):
-                headerlist.append(catlist[x].tag)
+        self.clearTotals()
+        self.clearRoster()
+
+    def indexStudent(self, student):
+        """ Adds the given student Element to the student index and any
+        AssignDate names not seen before to the header list.
+        NOT FOR EXTERNAL USE. """
+
+        self.stuIndex[student.attrib["info"]] = student
+        for cat in student.iter("AssignDate"):
+            self.indexHeader(cat.attrib["name"])
+
+    def indexHeader(self, header):
+        """ Adds the given AssignDate name to the header list unless it
+        is already there. NOT FOR EXTERNAL USE. """
+
+        if header not in self.headerSet:
+            self.headerSet.add(header)
+            self.headerList.append(header)
+
+    def indexDefault(self, default):
+        """ Adds the sparse column described by the given Default Element
+        to the header list. NOT FOR EXTERNAL USE. """
+
+        self.defaults[default.attrib["name"]] = default
+        self.indexHeader(default.attrib["name"])
+
+    def indexGroup(self, group):
+        """ Adds the given group Element and its members to the group
+        indexes. NOT FOR EXTERNAL USE. """
+
+        gname = group.attrib["info"]
+        self.groIndex[gname] = group
+        members = self.groMembers[gname] = {}
+
+        students = group.find("Students")
+        if "info" in students.attrib:
+            self.upgradeMembers(students)
+        for member in students:
+            members[member.attrib["info"]] = member
+            self.indexGroupStu(gname, member.attrib["info"])
+
+    def upgradeMembers(self, students):
+        """ Replaces the members list of a database saved before members
+        were stored as Member Elements, which is the string form of a
+        Python list in the 'info' attribute, with one Member Element per
+        student. NOT FOR EXTERNAL USE. """
+
+        names = students.attrib.pop("info")
+        if isinstance(names, str):
+            names = ast.literal_eval(names)
+        seen = set()
+        for sname in names:
+            if sname not in seen:
+                seen.add(sname)
+                SubElement(students, "Member").attrib["info"] = sname
+
+    def indexGroupStu(self, gname, sname):
+        """ Records in the group index that the student sname is a
+        member of the group gname. NOT FOR EXTERNAL USE. """
+
+        groups = self.stuGroIndex.setdefault(sname, [])
+        if gname not in groups:
+            groups.append(gname)
+
+    def groStuList(self, group):
+        """ Returns the list of student names stored in the given group
+        Element, in the order they were added. NOT FOR EXTERNAL USE. """
+
+        return [member.attrib["info"] for member in group.find("Students")]
+
+    def cellDefault(self, header):
+        """ Returns the value of the cells which are not stored in the given
+        sparse column, or None if the column stores every cell.
+        NOT FOR EXTERNAL USE. """
+
+        default = self.defaults.get(header)
+        return None if default is None else default.attrib["info"]
+
+    def declareDefault(self, header, value):
+        """ Makes the given column sparse, with value as the value of every
+        cell which is not stored, by recording it in the Defaults
+        element. If value is None the column stores every cell again.
+        NOT FOR EXTERNAL USE. """
+
+        defaults = self.data.find("Defaults")
+        if defaults is None:
+            # kept before the students so that every default is known
+            # before the first student is read
+            defaults = ET.Element("Defaults")
+            self.data.insert(0, defaults)
+
+        default = self.defaults.pop(header, None)
+        if default is not None:
+            defaults.remove(default)
+        if value is not None:
+            default = SubElement(defaults, "Default")
+            default.attrib["info"] = value
+            default.attrib["name"] = header
+            self.defaults[header] = default
+
+#############################################################################
+#                            Batches of Changes                             #
+#############################################################################
+
+    @contextmanager
+    def batch(self):
+        """ Groups the changes made in a with block into one batch:
+
+            with db.batch():
+                for name, grade in pasted:
+                    db.stuMod(name, header, grade, True)
+                db.save()
+
+        The batch is committed when the block ends and rolled back if it
+        raises an exception. Until it is committed, calls to save and
+        stuAbsence only take note of what to do, and change events (see
+        subscribe) are held back. On commit each noted student's absences
+        are counted once, every event is delivered once and the database
+        is saved once. The lock is held for the whole batch, so the
+        background save thread never writes half a batch. Batches can be
+        nested, in which case only the outermost one commits or rolls
+        back. """
+
+        self.begin()
+        try:
+            yield self
+        except BaseException:
+            if self.batchDepth:
+                self.rollback()
+            raise
+        else:
+            if self.batchDepth:
+                self.commit()
+
+    def begin(self):
+        """ Starts a batch of changes, which must be ended by commit or
+        rollback (see batch). """
+
+        self.lock.acquire()
+        self.batchDepth += 1
+        if self.batchDepth == 1:
+            self.pendingSave = None
+            self.pendingAbsences = set()
+            self.pendingEvents = []
+            # the length of the unsaved journal, the undo records of the
+            # changes made so far and, once a change without an undo
+            # record has been made, a snapshot taken just before it
+            self.journalMark = len(self.journal) if self.journaling else 0
+            self.undoLog = []
+            self.batchSnapshot = None
+
+    def commit(self):
+        """ Ends the current batch, keeping its changes. When the outermost
+        batch ends, counts the absences, delivers the events and makes the
+        save which were put off. """
+
+        if not self.batchDepth:
+            raise RuntimeError("commit called outside of a batch")
+
+        try:
+            if self.batchDepth == 1:
+                # counts the absences while the batch is still open, so
+                # that their events are held back with the others
+                names, self.pendingAbsences = self.pendingAbsences, None
+                for name in sorted(names):
+                    self.stuAbsence(name)
+        finally:
+            self.batchDepth -= 1
+            self.lock.release()
+
+        if self.batchDepth == 0:
+            self.undoLog = []
+            self.batchSnapshot = None
+            events, self.pendingEvents = self.pendingEvents, []
+            delivered = set()
+            for event in events:
+                if event not in delivered:
+                    delivered.add(event)
+                    self.notify(event)
+            if self.pendingSave is not None:
+                self.startSave(self.pendingSave)
+
+    def rollback(self):
+        """ Ends the current batch and every batch it is nested in, undoing
+        every change made since the outermost one began. The change events
+        which were held back are dropped. """
+
+        if not self.batchDepth:
+            raise RuntimeError("rollback called outside of a batch")
+
+        depth, self.batchDepth = self.batchDepth, 0
+        try:
+            self.undoBatch()
+        finally:
+            self.undoLog = []
+            self.batchSnapshot = None
+            self.pendingEvents = []
+            for x in range(0, depth):
+                self.lock.release()
+
+    def undoBatch(self):
+        """ Puts the database back the way it was when the batch began.
+        NOT FOR EXTERNAL USE. """
+
+        # the undo records made after the snapshot are covered by it
+        self.replaying = True
+        try:
+            if self.batchSnapshot is not None:
+                undoLog = self.undoLog[:self.snapshotMark]
+                self.loadSnapshot(Snapshot.loads(self.batchSnapshot, self.stuDefaults))
+                self.loadPolicy()
+            else:
+                undoLog = self.undoLog
+            for op, args in reversed(undoLog):
+                getattr(self, op)(*args)
+        finally:
+            self.replaying = False
+
+        # forgets the journal records of the changes undone
+        if self.journaling:
+            del self.journal[self.journalMark:]
+
+    def recordUndo(self, op, call):
+        """ Records how to undo a change which is about to be made inside
+        a batch by a call to the journaled method op, whose arguments are
+        given by name in call. Changes to single cells and whole columns
+        are undone by writing back the values they replace; any other
+        change makes the batch snapshot the database first, unless it
+        already has. NOT FOR EXTERNAL USE. """
+
+        if self.batchSnapshot is not None:
+            return
+
+        undo = self.undoRecords(op, call)
+        if undo is None:
+            self.snapshotMark = len(self.undoLog)
+            self.batchSnapshot = Snapshot.dumps(self.toXML(), self.stuDefaults)
+        else:
+            self.undoLog.extend(undo)
+
+    def undoRecords(self, op, call):
+        """ Returns the list of (method, arguments) calls which undo the
+        given call of a journaled method, or None if it cannot be undone
+        that way. NOT FOR EXTERNAL USE. """
+
+        if op == "stuAbsence":
+            # stuAbsence changes nothing until the batch is committed
+            return []
+
+        if op == "stuMod":
+            name, header, assign = call["name"], call["header"], call["assign"]
+            if header == "Name" or self.findStudent(name) is None:
+                return None
+            if header not in (self.headerSet if assign else self.deflist):
+                return None
+            # a cell which is not stored cannot be written back
+            old = self.stuCall(name, header, assign)
+            if old is None:
+                return None
+            return [("stuMod", (name, header, old, assign))]
+
+        if op == "stuMassAssignDateMod":
+            header = call["header"]
+            if header not in self.headerSet:
+                return None
+            old = self.stuMassColumnCall([header])[0]
+            if None in old:
+                return None
+            return [("stuMassAssignDateMod", (header, old))]
+
+        if op == "stuMassMod":
+            header = call["header"]
+            # a change to the roster headers reorders the roster itself
+            if header not in self.deflist or header == "Name" or header in self.rosterHeaders:
+                return None
+            return [("stuMassMod", (header, [self.stuCall(name, header)
+                                             for name in self.activeNames()]))]
+
+        return None
+
+#############################################################################
+#                           Change Notification                             #
+#############################################################################
+
+    def subscribe(self, listener):
+        """ Calls listener(event, *details) after every change made to the
+        database, so that views can update only what changed. The events
+        and their details are:
+
+            cellChanged     name, header: a student's cell was written
+            columnChanged   header: any student's cell in the column may
+                            have changed
+            studentAdded    name: a student was added or enrolled again
+            studentDropped  name: a student was dropped
+            columnAdded     header, kind: a date ("Date") or an assignment
+                            ("Homework") was added
+            columnRenamed   old, new: a column was renamed
+            groupChanged    name: a group was added, or its members or
+                            weekly grades changed
+
+        Events are only sent for changes made through the DataInterface
+        methods, not while the journal is replayed. Inside a batch they
+        are held back until it is committed. """
+
+        self.listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        """ Stops calling a listener added with subscribe. """
+
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def notify(self, event):
+        """ Sends the given (event, details...) tuple to every listener,
+        or holds it back until the current batch is committed.
+        NOT FOR EXTERNAL USE. """
+
+        if self.batchDepth:
+            self.pendingEvents.append(event)
+            return
+        for listener in list(self.listeners):
+            listener(*event)
+
+    def changeEvents(self, op, call, result):
+        """ Returns the list of events made by a call to the journaled
+        method op, whose arguments are given by name in call and which
+        returned result. NOT FOR EXTERNAL USE. """
+
+        if op == "stuMod":
+            events = [("cellChanged", call["name"], call["header"])]
+            if call["header"] == "In_Class" and not call["assign"]:
+                enrolled = call["value"] == "Yes"
+                events.append(("studentAdded" if enrolled else "studentDropped", call["name"]))
+            return events
+        if op == "stuAbsence":
+            return [("cellChanged", call["name"], "Number_of_Absences"),
+                    ("cellChanged", call["name"], "Number_of_Excused")]
+        if op == "stuGrade":
+            return [("cellChanged", call["name"], "Grade")]
+        if op == "stuAbsenceAll":
+            return [("columnChanged", "Number_of_Absences"),
+                    ("columnChanged", "Number_of_Excused")]
+        if op in ("stuGradeAll", "setPolicy"):
+            return [("columnChanged", "Grade")]
+        if op in ("stuAdd", "stuMassMod", "stuMassAssignDateMod"):
+            return [("columnChanged", call["header"])]
+        if op == "addDate":
+            return [("columnAdded", call["today"], "Date")]
+        if op == "addAssignment":
+            return [("columnAdded", call["hwName"], "Homework")]
+        if op == "stuCatMod":
+            return [("columnRenamed", call["target"], call["name"])] if result else []
+        if op == "addStudent":
+            return [("studentAdded", call["name"])] if result == 1 else []
+        if op == "addStudentRecords":
+            records = [(list(record) + ["", ""])[:2] for record in call["records"]]
+            return [("studentAdded", str(first) + " " + str(last))
+                    for (first, last), status in zip(records, result) if status == 1]
+        if op == "dropStudent":
+            return [("studentDropped", call["name"])]
+        if op in ("addGroup", "groStuAdd", "groStudRemove", "groMod", "groAdd",
+                  "groCommentMod"):
+            for key in ("gname", "group", "name"):
+                if key in call:
+                    return [("groupChanged", call[key])]
+        return []
 
-        # sets local headerlist equal to the instanced headerList.
-        self.headerList = headerlist
 
 #############################################################################
 #                           Finding Functions                               #
@@ -113,40 +1002,53 @@ class DataInterface:
 
     def findStudent(self, name):
         """ Returns the student Element with the attribute of the given
-        name. NOT FOR EXTERNAL USE. """
+        name, or None if there is no such student. Dropped students
+        stay in the index. NOT FOR EXTERNAL USE. """
 
-        path = ".//Name[@info='" + name + "']"
-        return self.data.find(path)
+        return self.stuIndex.get(name)
 
     def findAssignDate(self, sname, adname):
         """ Returns the Assignment or Date Element with the attribute of the given
         name. NOT FOR EXTERNAL USE. """
 
-        student = self.findStudent(sname)
-        path = ".//AssignDate[@name='" + adname + "']"
-        return student.find(path)
+        columns = self.adIndex.get(sname)
+
+        # builds the student's column dictionary on first use
+        if columns is None:
+            columns = {}
+            for cat in self.findStudent(sname).findall("AssignDate"):
+                columns.setdefault(cat.attrib["name"], cat)
+            self.adIndex[sname] = columns
+
+        return columns.get(adname)
 
     def findGroup(self, name):
         """ Returns the Group Element with the attribute of the given
         name. NOT FOR EXTERNAL USE. """
-        path = ".//Group[@info='" + name + "']"
-        return self.data.find(path)
+
+        return self.groIndex.get(name)
 
     def findGroupStu(self, sname):
-        """ Returns the Group Element with the given student as a member.
+        """ Returns the first Group Element with the given student as a
+        member, or an empty Element named None if they are in no group.
         NOT FOR EXTERNAL USE. """
-        groups = self.data.find("Groups").getchildren()
 
-        for x in range(0, len(groups)):
-            if (sname in groups[x].find("Students").attrib["info"]):
-                return groups[x]
+        groups = self.stuGroIndex.get(sname)
+        if groups:
+            return self.findGroup(groups[0])
 
         return ET.Element("None")
 
+    def findGroupsStu(self, sname):
+        """ Returns the list of names of every group the given student is
+        a member of. NOT FOR EXTERNAL USE. """
+
+        return list(self.stuGroIndex.get(sname, []))
+
     def findDates(self):
         """ Returns the list of Date names. NOT FOR EXTERNAL USE. """
 
-        dates = self.data.findall(".//Date")
+        dates = self.data.find("Dates").findall("Date")
         dateNames = []
 
         for x in range(0, len(dates)):
@@ -156,7 +1058,7 @@ class DataInterface:
     def findHW(self):
         """ Returns the list of Assignment names. NOT FOR EXTERNAL USE. """
 
-        assignments = self.data.findall(".//Homework")
+        assignments = self.data.find("Assignments").findall("Homework")
         hwNames = []
 
         for x in range(0, len(assignments)):
@@ -166,7 +1068,7 @@ class DataInterface:
     def findAllGroups(self):
         """ Returns the list of Group names. NOT FOR EXTERNAL USE. """
 
-        groups = self.data.findall(".//Group")
+        groups = self.data.find("Groups").findall("Group")
         groupNames=[]
 
         for i in range(0,len(groups)):
@@ -178,158 +1080,269 @@ class DataInterface:
 #                        Student Roster Functions                           #
 #############################################################################
 
+    @journaled
     def addStudent(self, name):
         """ Creates a new student, with defaults of enrolled and
         unflagged. Student has all current column categories but without any
         values. If the student was already in the database returns an integer
         error message. """
         # student not previously enrolled
-        if not self.findStudent(name):
-            students = self.data.find("Students")
-            # finds the Students data category.
-            student = SubElement(students, "Name")
-            # adds a new subelement with the student's name as a tag.
-            student.attrib["info"] = name
-            # adds all default student data categories.
-            SubElement(student, "Email").attrib["info"] = ""
-            SubElement(student, "Units").attrib["info"] = ""
-            SubElement(student, "Number_of_Absences").attrib["info"] = "0"
-            SubElement(student, "Number_of_Excused").attrib["info"] = "0"
-            SubElement(student, "In_Class").attrib["info"] = "Yes"
-            SubElement(student, "Flag").attrib["info"] = "No"
-            SubElement(student, "Grade").attrib["info"] = "Pass"
-
-            # adds all additional data categories.
-            for x in range(0, len(self.headerList)):
-                cat = SubElement(student, "AssignDate")
-                cat.attrib["info"] = ""
-                cat.attrib["name"] = self.headerList[x]
-
+        if self.findStudent(name) is None:
+            self.newStudent(name)
+            self.clearRoster()
             return 1; # added a new student
         
         #student was previously enrolled
         else:
-            student = self.findStudent(name)
-            if(student.find("In_Class").attrib["info"] == "Yes"):
+            if(self.stuCall(name, "In_Class") == "Yes"):
                 return 2 # attempted to re-add a currently enrolled student
             else:
                 return 3 # attempted to re-add a currently dropped student
 
+    def addStudents(self, records):
+        """ Adds every student in a list of [first name, last name, email,
+        units] records, as returned by loadworkbook.getStudentsFromWorkbook,
+        in one pass and saves the database once. New students get the
+        given email and units; students already in the database are left
+        unchanged. Returns the list of addStudent's codes for the records:
+        1 for added, 2 for already enrolled and 3 for previously dropped. """
+
+        statuses = self.addStudentRecords(records)
+        self.save(self.saveFile)
+        return statuses
+
+    @journaled
+    def addStudentRecords(self, records):
+        """ Does the work of addStudents without saving. NOT FOR EXTERNAL USE. """
+
+        statuses = []
+        for record in records:
+            # pads short records, whose missing cells were left out
+            first, last, email, units = (list(record) + ["", "", "", ""])[:4]
+            name = str(first) + " " + str(last)
+            if self.findStudent(name) is None:
+                self.newStudent(name, str(email), str(units))
+                statuses.append(1)
+            elif self.stuCall(name, "In_Class") == "Yes":
+                statuses.append(2)
+            else:
+                statuses.append(3)
+        return statuses
+
+    def newStudent(self, name, email="", units=""):
+        """ Adds a student who is not in the database yet, enrolled and
+        unflagged, with the given email and units and every column
+        category empty. NOT FOR EXTERNAL USE. """
+
+        students = self.data.find("Students")
+        # finds the Students data category.
+        student = SubElement(students, "Name")
+        # adds a new subelement with the student's name as a tag.
+        student.attrib["info"] = name
+        self.stuIndex[name] = student
+        # adds all default student data categories.
+        given = {"Email": email, "Units": units}
+        for header, value in self.stuDefaults:
+            SubElement(student, header).attrib["info"] = given.get(header, value)
+
+        # adds all additional data categories, except in the sparse
+        # columns whose cells are empty unless stored.
+        for x in range(0, len(self.headerList)):
+            if self.cellDefault(self.headerList[x]) == "":
+                continue
+            cat = SubElement(student, "AssignDate")
+            cat.attrib["info"] = ""
+            cat.attrib["name"] = self.headerList[x]
+
+    @journaled
     def dropStudent(self, name):
         """ Sets the InClass attribute to indicate that the student
         has dropped. """
 
         student = self.findStudent(name)
         student.find("In_Class").attrib["info"] = "No"
+        self.clearRoster()
 
+    @journaled
     def stuAbsence(self, name):
-        """ Tallies the number of absences and excused absences the student has
-        by iterating through all of their categories which are a part of the date list
-        and adding an absence if the stored string is not 'Y' """
-
-        # retrieves all of the given student's AssignDate categories and a list of date names
-        student = self.findStudent(name)
-        dateList = self.findDates()
-        slist = student.findall("AssignDate")
+        """ Stores the number of absences and excused absences the student
+        has, which are kept as running totals of their date categories
+        (see stuTotals): an 'E' is excused and anything other than 'Y' is
+        an absence. """
+
+        # inside a batch, each student is counted once, on commit
+        if self.batchDepth and self.pendingAbsences is not None:
+            self.pendingAbsences.add(name)
+            return
+
+        homework, absence, excused = self.stuTotals(name)
+        self.stuMod(name, "Number_of_Excused", str(excused))
+        self.stuMod(name, "Number_of_Absences", str(absence))
+
+    @journaled
+    def stuAbsenceAll(self):
+        """ Tallies the number of absences and excused absences of every
+        student at once, as stuAbsence does for one student, and stores
+        them all. Use after a whole date column has been filled in. Uses
+        NumPy when it is installed. """
+
+        strings, columns, numRows = self.dateMatrix()
+        absences, excused = tallyAbsences(columns, strings, numRows)
+        self.storeAbsences(absences, excused)
+
+    def dateMatrix(self):
+        """ Returns the attendance of every student in the order of the
+        Students element as a list of value strings, a list with one
+        array of codes into the strings per date and the number of
+        students. A student without a date's category counts as present
+        on it, as in stuAbsence. NOT FOR EXTERNAL USE. """
+
+        strings = ["Y"]
+        codes = {"Y": 0}
+        columns = []
+        names = [student.attrib["info"] for student in self.data.find("Students")]
+
+        for date in set(self.findDates()):
+            # a cell not stored in a sparse column has the column's default
+            default = self.cellDefault(date)
+            if default is not None and default not in codes:
+                codes[default] = len(strings)
+                strings.append(default)
+            column = array("I", [codes.get(default, 0)]) * len(names)
+            for row in range(0, len(names)):
+                cat = self.findAssignDate(names[row], date)
+                if cat is not None:
+                    value = cat.attrib["info"]
+                    code = codes.get(value)
+                    if code is None:
+                        code = codes[value] = len(strings)
+                        strings.append(value)
+                    column[row] = code
+            columns.append(column)
+
+        return strings, columns, len(names)
+
+    def storeAbsences(self, absences, excused):
+        """ Sets every student's number of absences and excused absences
+        from lists in the order of the Students element.
+        NOT FOR EXTERNAL USE. """
 
-        # initializes the absence and excused tallies
-        absence = 0
-        excused = 0
-        
-        # iterates through the AssignDate list and checks categories whose name is in the date List
-        for x in range(0, len(slist)):
-            if(slist[x].attrib["name"] in dateList):
-                # increases excused if 'E' is found
-                if(slist[x].attrib["info"] == "E"):
-                    excused += 1
-                # increases absence if 'Y' is not found
-                else:
-                    if(slist[x].attrib["info"] != "Y"):
-                        absence += 1
-        
-        #sets the number of excused and absences categories
-        student.find("Number_of_Excused").attrib["info"] = str(excused)
-        student.find("Number_of_Absences").attrib["info"] = str(absence)
+        students = self.data.find("Students")
+        row = 0
+        for student in students:
+            student.find("Number_of_Absences").attrib["info"] = str(absences[row])
+            student.find("Number_of_Excused").attrib["info"] = str(excused[row])
+            row += 1
 
+    @journaled
     def stuGrade(self, name):
-        """ Determines whether the student has passed or failed by checking their
-        number of absences and the total of their group and individual grades. At
-        this time, the minimum necessary values are hard-coded. """
-
-        grade = "Pass"
-        student = self.findStudent(name)
-        print (int(student.find("Number_of_Absences").attrib["info"]))
-
-        if(int(student.find("Number_of_Absences").attrib["info"]) >= 3):
-            grade = "Fail"
-
-        assignlist = student.findall("AssignDate")
-        assigns = self.findHW()
-        totalpoints = 0
-        for x in range(0, len(assignlist)):
-            if (assignlist[x].attrib["name"] in assigns):
-                totalpoints += int(assignlist[x].attrib["info"])
-        if (totalpoints < 150): grade = "Fail"
-
-
-        weeklylist = self.findGroupStu(name).findall("WeekGrade")
-        weekpoints = 0
-        dlist = ["Students", "Units"]
-        for x in range(0, len(weeklylist)):
-            if (weeklylist[x].attrib["name"] not in dlist):
-                weekpoints += int(weeklylist[x].attrib["info"])
-        if (weekpoints < 15): grade = "Fail"
-
-        student.find("Grade").attrib["info"] = grade
+        """ Determines the student's grade under the grading policy (see
+        setPolicy) from their number of absences, their homework points
+        and the weekly points of their group, and stores it. """
+
+        # counts the weekly points of the student's first group
+        groups = self.findGroupsStu(name)
+        weekpoints = self.groTotal(groups[0]) if groups else 0
+
+        grade = self.policy.grade([self.stuCall(name, "Number_of_Absences")],
+                                  [self.stuTotals(name)[0]], [weekpoints])[0]
+        self.stuMod(name, "Grade", grade)
+
+    @journaled
+    def stuGradeAll(self):
+        """ Determines the grade of every enrolled student at once, as
+        stuGrade does for one student, stores them and returns a
+        dictionary from student name to grade. Each assignment is read
+        as a whole column, each group's weekly points are totalled once
+        rather than once per member, and the whole class is graded by a
+        single call to the policy using the running totals. """
+
+        names = self.stuMassCall("Name")
+        homework = [self.stuTotals(name)[0] for name in names]
+
+        # counts the weekly points of each student's first group
+        weekpoints = []
+        for name in names:
+            groups = self.findGroupsStu(name)
+            weekpoints.append(self.groTotal(groups[0]) if groups else 0)
+
+        grades = self.policy.grade(self.stuMassCall("Number_of_Absences"),
+                                   homework, weekpoints)
+        for x in range(0, len(names)):
+            self.stuMod(names[x], "Grade", grades[x])
+
+        return dict(zip(names, grades))
 
     def stuSort(self, vlist):
         """ Takes a list of student elements, removes all dropped or
         flagged students and sorts alphabetically.
         NOT FOR EXTERNAL USE. """
 
-        # initializes the sorting helper lists, name list and the returned list
-        nlist = []
-        v2list = []
+        # keeps the students who are neither flagged nor dropped
+        v2list = [student for student in vlist
+                  if student.find("Flag").attrib["info"] == "No"
+                  and student.find("In_Class").attrib["info"] == "Yes"]
+
+        # sorts the elements by student name in a single pass
+        v2list.sort(key=lambda student: student.attrib["info"])
+        return v2list
 
-        # iterates through the student element list, removing flagged or dropped student
-        for x in range(0, len(vlist)):
-            if (vlist[x].find("Flag").attrib["info"] == "No"
-                or vlist[x].find("In_Class").attrib["info"] == "Yes"):
-                # if a student is not flagged or dropped, their name is added to the name list
-                nlist.append(vlist[x].attrib["name"])
-        # alphabetically sorts the name list
-        nlist.sort()
+    def clearRoster(self):
+        """ Discards the cached roster after a student has been added,
+        dropped, flagged or re-enrolled. NOT FOR EXTERNAL USE. """
 
-        # creates a list of student elements in the order of the sorted name list
-        for x in range(0, len(nlist)):
-            v2list.append(self.findStudent(nlist[x]))
+        # the names of the active students in order, and each one's position
+        self.roster = None
+        self.rosterRows = None
 
-        # returns the sorted element list
-        return v2list
+    def sortRoster(self):
+        """ Returns the names of the non-flagged, non-dropped students in
+        alphabetical order, read from the stored data.
+        NOT FOR EXTERNAL USE. """
 
+        students = self.stuSort(list(self.data.find("Students")))
+        return [student.attrib["info"] for student in students]
+
+    def activeNames(self):
+        """ Returns the names of the non-flagged, non-dropped students in
+        alphabetical order as a tuple. This is the order of the lists
+        taken by stuMassMod and stuMassAssignDateMod, and of the rows of
+        the GUI tables. The tuple is kept until a student is added,
+        dropped, flagged or re-enrolled. """
+
+        # the roster and its positions are built together under the lock,
+        # so another thread never sees one of them without the other
+        with self.lock:
+            if self.roster is None:
+                roster = tuple(self.sortRoster())
+                self.rosterRows = dict((roster[x], x) for x in range(0, len(roster)))
+                self.roster = roster
+            return self.roster
+
+    def stuRow(self, name):
+        """ Returns the position of the student in activeNames, or None if
+        they are dropped, flagged or not in the database. """
+
+        with self.lock:
+            self.activeNames()
+            return self.rosterRows.get(name)
+
+    @journaled
     def stuRec(self, name):
         """ Reconciles a student's categories with the database
         headerList. Only for use in edge cases. """
 
-        # gets a list of the student's subelements
         student = self.findStudent(name)
-        catlist = student.getchildren()
-
-        # if the resulting list is the appropriate size, quit the function
-        if (len(catlist) == (len(self.headerList) + 9)): return True
 
-        # gets a list of unique AssignDates the student has
-        localheaders = []
-        for x in range(0, len(catlist)):
-            if (catlist[x].attrib["name"]):
-                localheaders.append(catlist[x].attrib["name"])
-
-        # adds sub elements from the header list the student does not have
+        # adds sub elements from the header list the student does not have,
+        # other than cells of sparse columns which are left at the default
         for x in range(0, len(self.headerList)):
-            if (self.headerList[x] not in localheaders):
+            if (self.findAssignDate(name, self.headerList[x]) is None
+                    and self.cellDefault(self.headerList[x]) is None):
                 cat = SubElement(student, "AssignDate")
                 cat.attrib["name"] =  self.headerList[x]
                 cat.attrib["info"] = ""
+                self.adIndex[name][self.headerList[x]] = cat
 
         return True
 
@@ -339,53 +1352,119 @@ class DataInterface:
 #############################################################################
 
 
+    @journaled
     def stuMod(self, name, header, value="", assign = False):
         """ Changes the attribute of the given header category within
         the given student element. Set assign to true if modifying a
         non-default category. """
 
-        if(assign): self.findAssignDate(name,header).attrib["info"] = value
-        else: self.findStudent(name).find(header).attrib["info"] = value
+        if(assign):
+            old = self.putAssignDate(name, header, value)
+            self.cellChanged(name, header, old, value)
+        else:
+            self.findStudent(name).find(header).attrib["info"] = value
+            if header in self.rosterHeaders: self.clearRoster()
 
     def stuCall(self, name, header, assign = False):
         """ Gets the attribute of the given header category within
         the given student element. Set assign to true if calling a
         non-default category. """
 
-        if(assign): return self.findAssignDate(name,header).attrib["info"]
+        if(assign):
+            cat = self.findAssignDate(name,header)
+            # a cell which is not stored has its sparse column's default
+            if cat is None: return self.cellDefault(header)
+            return cat.attrib["info"]
         student = self.findStudent(name)
         path = ".//" + header
         return student.find(path).attrib["info"]
 
 
+    def putAssignDate(self, name, header, value):
+        """ Sets the student's cell in the given column to value and returns
+        the old value. A sparse column's cell is removed instead of being
+        stored when it is set to the column's default.
+        NOT FOR EXTERNAL USE. """
+
+        student = self.findStudent(name)
+        cat = self.findAssignDate(name, header)
+        default = self.cellDefault(header)
+
+        if cat is None:
+            if value != default:
+                cat = SubElement(student, "AssignDate")
+                cat.attrib["info"] = value
+                cat.attrib["name"] = header
+                self.adIndex[name][header] = cat
+            return default
+
+        old = cat.attrib["info"]
+        if value == default:
+            student.remove(cat)
+            del self.adIndex[name][header]
+        else:
+            cat.attrib["info"] = value
+        return old
 
+    @journaled
     def stuAdd(self, header, value=""):
         """ Adds a category with the tag given by the header to all
         students and adds this category to the list of
         categories which will be given to students added in the future.
         If a default is given in the value input
-        this will be given to all students. This function will add
-        duplicate categories, which will cause errors.
-        Thus, this function should be used in conjunction with stuQuery
-        which checks for duplicates. """
-
-        self.headerList.append(header)
+        this will be given to all students. An existing category with
+        the same header is replaced, every student's value being set to
+        value; use stuQuery to check for one first. If sparseColumns is
+        true, value becomes the column's default instead, so that no
+        cells are stored until a student's value is changed. """
+
+        replacing = header in self.headerSet
+        self.uncountColumn(header)
+        self.indexHeader(header)
         students = self.data.find("Students")
-        clist = students.getchildren()
+        clist = list(students)
+
+        if self.sparseColumns:
+            # removes the cells of a column being replaced
+            if replacing:
+                for student in clist:
+                    for cat in student.findall("AssignDate"):
+                        if cat.attrib["name"] == header:
+                            student.remove(cat)
+                    self.adIndex.pop(student.attrib["info"], None)
+            self.declareDefault(header, value)
+            self.countColumn(header)
+            return
+
+        if header in self.defaults:
+            self.declareDefault(header, None)
 
         for x in range(0, len(clist)):
+            # overwrites the cell of a column being replaced
+            if replacing:
+                cat = self.findAssignDate(clist[x].attrib["info"], header)
+                if cat is not None:
+                    cat.attrib["info"] = value
+                    continue
             student = SubElement(clist[x], "AssignDate")
             student.attrib["info"] = value
             student.attrib["name"] = header
 
+            # keeps an already built column dictionary up to date
+            columns = self.adIndex.get(clist[x].attrib["info"])
+            if columns is not None:
+                columns.setdefault(header, student)
+        self.countColumn(header)
+
 
     def stuQuery(self, header):
         """ Returns true if the students have a category with the given
         header as a tag and false if they do not. Use
         this to avoid adding duplicate categories. """
 
-        return header in self.headerList
+        return header in self.headerSet
 
+    @journaled
     def addAssignment(self, hwName):
         """ Adds an assignment to the list of already added assignments. Use
          with stuAdd when adding an assignment. """
@@ -393,7 +1472,9 @@ class DataInterface:
         assignments = self.data.find("Assignments")
         assignment = SubElement(assignments, "Homework")
         assignment.attrib["info"] = hwName
+        self.countColumn(hwName)
 
+    @journaled
     def addDate(self, today):
         """ Adds an date to the list of already added date. Use
          with stuAdd when adding an date. """
@@ -401,8 +1482,10 @@ class DataInterface:
         dates = self.data.find("Dates")
         ddate = SubElement(dates, "Date")
         ddate.attrib["info"] = today
+        self.countColumn(today)
 
 
+    @journaled
     def stuMassMod(self, header, vlist):
         """ Changes all values of the given DEFAULT header to the corresponding
         values of a list of values. This list must
@@ -412,34 +1495,33 @@ class DataInterface:
         a category, the function will return
         false. Otherwise, true will be returned. """
 
-        slist = self.data.find("Students").getchildren()
-        slist = self.stuSort(slist)
+        names = self.activeNames()
 
         # checks to make sure that given modify list has the same length as the
         # sorted student list.
-        if ((len(slist) != len(vlist)) or (header in self.headerList)):
+        if ((len(names) != len(vlist)) or (header in self.headerList)):
             return False
 
-        for x in range(0, len(slist)):
-            slist[x].find(header).attrib["info"] = vlist[x]
+        for x in range(0, len(names)):
+            self.findStudent(names[x]).find(header).attrib["info"] = vlist[x]
 
+        if header in self.rosterHeaders: self.clearRoster()
         return True
 
+    @journaled
     def stuMassAssignDateMod(self, header, vlist):
         """ Has the same function as stuMassMod except it is specifically
         for modifying AssignDate subElements. Failing to use this function when
         modifying subElements of this type will result in crashes. """
 
-        slist = self.data.find("Students").getchildren()
-        slist = self.stuSort(slist)
+        names = self.activeNames()
 
-        if ((len(slist) != len(vlist)) or (header in self.headerList)):
+        if ((len(names) != len(vlist)) or (header not in self.headerSet)):
             return False
 
-        for x in range(0, len(slist)):
-            path = ".//AssignDate[@name ='" + header + "']"
-            slist[x].find(path).attrib["info"] = vlist[x]
-
+        for x in range(0, len(names)):
+            old = self.putAssignDate(names[x], header, vlist[x])
+            self.cellChanged(names[x], header, old, vlist[x])
         return True
 
     def stuMassCall(self, header):
@@ -450,7 +1532,7 @@ class DataInterface:
         header is not the tag of a category, then the function will
         return an empty string. """
 
-        students = self.data.find("Students").getchildren()
+        students = list(self.data.find("Students"))
 
         vlist = []
         headers = self.deflist
@@ -474,20 +1556,71 @@ class DataInterface:
         for calling AssignDate subElements. Failing to use this function when
         calling subElements of this type will result in crashes. """
 
-        path = ".//AssignDate[@name='" + header + "']"
-        students = self.data.findall(path)
+        students = self.data.find("Students")
 
         vlist = []
-        headers = self.deflist + self.headerList
 
-        if (header not in headers):
+        if (header not in self.headerSet):
             return vlist
 
-        for x in range(0, len(students)):
-            if(students[x].find("In_Class").attrib["info"] == "Yes"): vlist.append(students[x].attrib["info"])
+        # a cell which is not stored has its sparse column's default
+        default = self.cellDefault(header)
+        if default is None:
+            default = ""
+
+        # gets each non-dropped student's value at the desired element
+        for student in students:
+            if(student.find("In_Class").attrib["info"] == "Yes"):
+                cat = self.findAssignDate(student.attrib["info"], header)
+                vlist.append(default if cat is None else cat.attrib["info"])
 
         return vlist
 
+    def stuMassColumnCall(self, headers, typed=False):
+        """ Returns the values of several AssignDate categories at once, as
+        a list with one column per header in the given order. Each column
+        has the value of every non-flagged, non-dropped student in the
+        order of activeNames, the same order stuMassAssignDateMod takes.
+        A header which is not a category gives an empty column. If typed
+        is true, assignment columns are returned as arrays of points
+        (floats, with blank or non-numeric cells as 0) and date columns as
+        arrays of PRESENT, EXCUSED or ABSENT, so that they can be totalled
+        without reading each string. A cell which is not stored is None,
+        or 0 points and PRESENT if typed is true. """
+
+        names = self.activeNames()
+        homework = set(self.findHW())
+        dates = set(self.findDates())
+
+        columns = []
+        for header in headers:
+            if header not in self.headerSet:
+                columns.append([])
+                continue
+            values = self.columnValues(header, names)
+            if typed and header in homework:
+                values = array("d", [GradingPolicy.number(value) for value in values])
+            elif typed and header in dates:
+                kinds = {"Y": PRESENT, "E": EXCUSED, None: PRESENT}
+                values = array("B", [kinds.get(value, ABSENT) for value in values])
+            columns.append(values)
+        return columns
+
+    def columnValues(self, header, names):
+        """ Returns the value each of the given students has in the given
+        AssignDate category, or None for a cell which is not stored in a
+        column which is not sparse. NOT FOR EXTERNAL USE. """
+
+        # a cell which is not stored has its sparse column's default
+        default = self.cellDefault(header)
+
+        values = []
+        for name in names:
+            cat = self.findAssignDate(name, header)
+            values.append(default if cat is None else cat.attrib["info"])
+        return values
+
+    @journaled
     def stuCatMod(self, target, name):
         """ Allows the tag of a preexisting student category to be
         changed without affecting the category's
@@ -496,26 +1629,211 @@ class DataInterface:
         # if the header does not exist, returns false
         if (target not in self.headerList): return False
 
-        self.headerList.remove(target)
-        stulist = self.data.find("Students").getchildren()
-
-        # iterates through the list of students, changing the target element's
-        # name if it is found and adding it if it is not
+        # renames the header in place, so the columns keep their order
+        self.headerList[self.headerList.index(target)] = name
+        self.headerSet.discard(target)
+        self.headerSet.add(name)
+        self.clearTotals()
+        stulist = list(self.data.find("Students"))
+
+        # a sparse column keeps its default under the new name
+        default = self.defaults.pop(target, None)
+        if default is not None:
+            default.attrib["name"] = name
+            self.defaults[name] = default
+
+        # iterates through the list of students, changing the target
+        # element's name if it is found. A cell which is not stored stays
+        # that way, as in the other engines.
         for x in range(0, len(stulist)):
-            path = ".//AssignDate[@name='" + target + "']"
-            if (stulist[x].find(path)):
-                stulist[x].find(path).attrib["name"] = name
-            else:
-                cat = SubElement(stulist[x], "AssignDate")
+            sname = stulist[x].attrib["info"]
+            cat = self.findAssignDate(sname, target)
+            if (cat is not None):
                 cat.attrib["name"] = name
-                cat.attrib["info"] = ""
+                del self.adIndex[sname][target]
+                self.adIndex[sname][name] = cat
 
         return True
 
+#############################################################################
+#                        Running Student Totals                             #
+#############################################################################
+
+    def clearTotals(self):
+        """ Discards the running totals after a change which affects a
+        whole column, such as a new date or assignment, so that they are
+        recomputed the next time they are needed. NOT FOR EXTERNAL USE. """
+
+        # each student's [homework points, absences, excused absences],
+        # or None until they are built, and each group's weekly points
+        self.totals = None
+        self.groTotals = {}
+
+    def buildTotals(self):
+        """ Computes the running totals of every enrolled student from
+        their assignment and date columns. NOT FOR EXTERNAL USE. """
+
+        # the columns which count towards the totals
+        self.totalHW = set(self.findHW()) & self.headerSet
+        self.totalDates = set(self.findDates()) & self.headerSet
+
+        names = self.stuMassCall("Name")
+        rows = [[0.0, 0, 0] for name in names]
+        for header in self.totalHW | self.totalDates:
+            column = self.columnValues(header, names)
+            for x in range(0, len(rows)):
+                homework, absence, excused = self.cellTotals(header, column[x])
+                rows[x][0] += homework
+                rows[x][1] += absence
+                rows[x][2] += excused
+
+        self.totals = dict(zip(names, rows))
+
+    def cellTotals(self, header, value):
+        """ Returns the homework points, absences and excused absences a
+        cell with the given header and value adds to its student's
+        totals. NOT FOR EXTERNAL USE. """
+
+        # a cell which is not stored, as the old findHeaders bug left some
+        # students, counts as present and as no points, as in stuAbsenceAll
+        if value is None:
+            return 0, 0, 0
+
+        homework = absence = excused = 0
+        if header in self.totalHW:
+            homework = self.policy.points(header, value)
+        if header in self.totalDates:
+            if value == "E":
+                excused = 1
+            elif value != "Y":
+                absence = 1
+        return homework, absence, excused
+
+    def cellChanged(self, name, header, old, new):
+        """ Updates the student's running totals after one of their cells
+        has changed from old to new. NOT FOR EXTERNAL USE. """
+
+        if self.totals is None or name not in self.totals:
+            return
+        if header not in self.totalHW and header not in self.totalDates:
+            return
+
+        totals = self.totals[name]
+        before = self.cellTotals(header, old)
+        after = self.cellTotals(header, new)
+        for x in range(0, 3):
+            totals[x] += after[x] - before[x]
+
+    def countColumn(self, header):
+        """ Adds the cells of a column to the running totals once it is
+        both a category and a date or an assignment, if it was not
+        counted already. NOT FOR EXTERNAL USE. """
+
+        if self.totals is None or header not in self.headerSet:
+            return
+        if header in self.totalHW or header in self.totalDates:
+            return
+        if header in self.findHW():
+            self.totalHW.add(header)
+        if header in self.findDates():
+            self.totalDates.add(header)
+        self.addColumnTotals(header, 1)
+
+    def uncountColumn(self, header):
+        """ Takes the cells of a column out of the running totals before
+        the whole column is replaced. NOT FOR EXTERNAL USE. """
+
+        if self.totals is None:
+            return
+        if header not in self.totalHW and header not in self.totalDates:
+            return
+        self.addColumnTotals(header, -1)
+        self.totalHW.discard(header)
+        self.totalDates.discard(header)
+
+    def addColumnTotals(self, header, sign):
+        """ Adds (sign 1) or subtracts (sign -1) what each student's cell
+        in the given column adds to their running totals.
+        NOT FOR EXTERNAL USE. """
+
+        names = list(self.totals)
+        values = self.columnValues(header, names)
+        for x in range(0, len(names)):
+            totals = self.totals[names[x]]
+            cell = self.cellTotals(header, values[x])
+            for y in range(0, 3):
+                totals[y] += sign * cell[y]
+
+    def weekChanged(self, gname, header, old, new):
+        """ Updates the group's kept weekly points after one of its
+        WeekGrades has changed from old to new, where old is None for a
+        WeekGrade which was just added. NOT FOR EXTERNAL USE. """
+
+        if gname not in self.groTotals or header in ["Students", "Units"]:
+            return
+        self.groTotals[gname] += (GradingPolicy.number(new)
+                                  - GradingPolicy.number(old))
+
+    def stuTotals(self, name):
+        """ Returns the student's homework points, under the grading
+        policy's caps, number of absences and number of excused absences
+        as they stand in their assignment and date categories. The
+        totals are kept up to date as cells change, so this does not
+        read the student's categories. """
+
+        if self.totals is None:
+            self.buildTotals()
+
+        totals = self.totals.get(name)
+        if totals is None:
+            # a student who was added or dropped after the totals were built
+            totals = [0.0, 0, 0]
+            for header in self.totalHW | self.totalDates:
+                cell = self.cellTotals(header, self.stuCall(name, header, True))
+                for x in range(0, 3):
+                    totals[x] += cell[x]
+            self.totals[name] = totals
+
+        return tuple(totals)
+
+    def groTotal(self, gname):
+        """ Returns the total of the given group's weekly points, which is
+        kept until one of the group's WeekGrades changes. """
+
+        points = self.groTotals.get(gname)
+        if points is None:
+            points = self.groPoints(gname)
+            self.groTotals[gname] = points
+        return points
+
+    def checkTotals(self):
+        """ Recomputes every running total from the stored data and
+        returns the names of the students and groups whose kept totals
+        were wrong, so an empty list means that they were consistent.
+        The recomputed totals replace the kept ones. """
+
+        if self.totals is None:
+            return []
+        totals = self.totals
+        groTotals = self.groTotals
+        self.clearTotals()
+
+        wrong = []
+        for name in totals:
+            fresh = self.stuTotals(name)
+            if (abs(fresh[0] - totals[name][0]) > 1e-6
+                    or list(fresh[1:]) != totals[name][1:]):
+                wrong.append(name)
+        for gname in groTotals:
+            if abs(self.groTotal(gname) - groTotals[gname]) > 1e-6:
+                wrong.append(gname)
+        return wrong
+
 #############################################################################
 #                       Group Roster Functions                              #
 #############################################################################
 
+    @journaled
     def addGroup(self, name):
         """ Adds a group with the give name and initializes default categories. """
 
@@ -524,60 +1842,71 @@ class DataInterface:
         # adds the group element with the given name as its 'info' attribute
         group = SubElement(groups, "Group")
         group.attrib["info"] = name
+        self.groIndex[name] = group
 
         # sets default categories
         SubElement(group, "Units").attrib["info"] = "0"
-        SubElement(group, "Students").attrib["info"] = []
+        SubElement(group, "Students")
+        self.groMembers[name] = {}
 
+    @journaled
     def groStuAdd(self, gname, sname):
         """ Adds a student with the name sname to the group with gname.
         will fail if a group with the given name does not exist or if
         a student with the given name does not exist. Also adds the
-        given student's units to the group's unit total. """
+        given student's units to the group's unit total. If the student
+        is already a member, nothing is changed. """
 
-        # finds the group and adds the sname to the group's student list
+        # finds the group and adds a Member for sname to its student list
         group = self.findGroup(gname)
-        group.find("Students").attrib["info"].append(sname)
+        members = self.groMembers[gname]
+        if sname in members: return
+        members[sname] = SubElement(group.find("Students"), "Member")
+        members[sname].attrib["info"] = sname
+        self.indexGroupStu(gname, sname)
 
         # find's the group and the student's current units, adds them,
         # and sets the group's units to this number
         groupUnits=int(group.find("Units").attrib["info"])
-        studentUnits=int(self.findStudent(sname).find("Units").attrib["info"])
+        studentUnits=int(self.stuCall(sname, "Units"))
         groupUnits+=studentUnits
         group.find("Units").attrib["info"]=str(groupUnits)
 
+    @journaled
     def groStudRemove(self, gname, sname):
         """ Remove's the given student and their units from the group's
         student list and unit count respectively. If the student is not
-        in the group, this function will improperly remove units from the
-        group. Once again, if the group or student does not exist, this
-        function will fail. """
+        in the group, nothing is changed. Once again, if the group or
+        student does not exist, this function will fail. """
 
-        # finds group and student list
-        group = self.findGroup(gname)
-        slist = group.find("Students").attrib["info"]
-        newlist = []
-
-        # iterates through the student list, adding students which do not
-        # have name sname to the new list
-        for x in range(0, len(slist)):
-            if sname != slist[x]: newlist.append(slist[x])
+        # checks the student is actually a member of the group
+        groups = self.stuGroIndex.get(sname, [])
+        if gname not in groups: return
+        groups.remove(gname)
 
-        # sets the group's student list equal to the new list
-        group.find("Students").attrib["info"] = newlist
+        # finds the group and removes the student's Member Element
+        group = self.findGroup(gname)
+        group.find("Students").remove(self.groMembers[gname].pop(sname))
 
         # modifies the group's unit count as above except uses subtraction.
         groupUnits=int(group.find("Units").attrib["info"])
-        studentUnits=int(self.findStudent(sname).find("Units").attrib["info"])
+        studentUnits=int(self.stuCall(sname, "Units"))
         groupUnits-=studentUnits
         group.find("Units").attrib["info"]=str(groupUnits)
 
+    def groHasStu(self, gname, sname):
+        """ Returns True if the student with the name sname is a member of
+        the group with gname, and False otherwise. """
+
+        return sname in self.groMembers.get(gname, ())
+
 
 
 #############################################################################
 #                        Group Data Management                              #
 #############################################################################
 
+    @journaled
     def groMod(self, name, header, value):
         """ Changes the attribute of the given header category within
         the given group element. Cannot modify Units or Students as
@@ -585,7 +1914,9 @@ class DataInterface:
 
         group = self.findGroup(name)
         path = ".//WeekGrade[@name='" + header + "']"
-        group.find(path).attrib["info"] = value
+        week = group.find(path)
+        self.weekChanged(name, header, week.attrib["info"], value)
+        week.attrib["info"] = value
 
     def groCall(self, name, header):
         """ Retrieves the attribute of the given header category within
@@ -596,16 +1927,19 @@ class DataInterface:
         path = ".//WeekGrade[@name='" + header + "']"
         return group.find(path).attrib["info"]
 
+    @journaled
     def groAdd(self, group, header, value=""):
         """ Adds a WeekGrade subElement with the name given by header and with the
         info attribute set to value. This subelement currently cannot be removed
         or modified. """
 
+        self.weekChanged(group, header, None, value)
         group = self.findGroup(group)
         cat = SubElement(group, "WeekGrade")
         cat.attrib["info"] = value
         cat.attrib["name"] = header
 
+    @journaled
     def groCommentMod(self, name, header, comment):
         """ Modifies the comment stored in the WeekGrade subelement with the name
         attribute given by header. The comment must be a string. """
@@ -621,6 +1955,16 @@ class DataInterface:
         path = ".//WeekGrade[@name='" + header + "']"
         return group.find(path).text
 
+    def groPoints(self, gname):
+        """ Returns the total of the weekly points stored in the given
+        group's WeekGrade subelements. """
+
+        weekpoints = 0
+        for week in self.findGroup(gname).findall("WeekGrade"):
+            if (week.attrib["name"] not in ["Students", "Units"]):
+                weekpoints += GradingPolicy.number(week.attrib["info"])
+        return weekpoints
+
     def groMassDateCall(self, gname):
         """ Retrieves the names of all stored WeekGrade subelements and returns them as an
         unsorted list of strings. """
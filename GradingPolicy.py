@@ -0,0 +1,168 @@
+__author__ = 'Jake'
+
+# The rules used by DataInterface to decide students' final grades.
+#
+# A policy is a dictionary of settings, saved as JSON either in the
+# "policy" attribute of the gradebook's root or in a sidecar file next to
+# the database (database.xml.policy). Every setting is optional:
+#
+#   maxAbsences   a student with at least this many absences fails
+#   minHomework   a student with fewer (capped) homework points fails
+#   minGroup      a student whose group has fewer weekly points fails
+#   caps          the most points counted for each assignment, by name
+#   cap           the most points counted for any other assignment
+#   weights       the weight of each category in the score: Homework,
+#                 Group and Absences (usually negative)
+#   cutoffs       [score, letter] pairs. If given, a student who meets
+#                 every threshold gets the letter of the highest score
+#                 they reach, instead of the pass grade
+#   pass, fail    the grades given for passing and failing
+#
+# A threshold or cap of null is not applied. The defaults are the rules
+# stuGrade used to have built in.
+
+import bisect
+import json
+
+defaults = {"maxAbsences": 3, "minHomework": 150, "minGroup": 15,
+            "caps": {}, "cap": None,
+            "weights": {"Homework": 1, "Group": 1, "Absences": 0},
+            "cutoffs": [], "pass": "Pass", "fail": "Fail"}
+
+
+def number(value):
+    """ Returns the number stored in a cell, or 0 if the cell is blank
+    or does not hold a number. """
+
+    try:
+        return float(value or 0)
+    except ValueError:
+        return 0.0
+
+
+class GradingPolicy:
+    """ A set of grading rules. The settings are checked when the policy
+    is made and turned into numbers once, which then grade any number
+    of students in one call (see grade). """
+
+    def __init__(self, settings=None):
+        """ Makes a policy from a dictionary of settings, using the
+        default for every setting which is not given. Raises a ValueError
+        if a setting is unknown or has the wrong type. """
+
+        if settings is None:
+            settings = {}
+        if not isinstance(settings, dict):
+            raise ValueError("a grading policy must be a dictionary")
+        for key in settings:
+            if key not in defaults:
+                raise ValueError("unknown grading policy setting: " + str(key))
+        for key in ("caps", "weights"):
+            if not isinstance(settings.get(key, {}), dict):
+                raise ValueError("the grading policy setting %s must be a "
+                                 "dictionary" % key)
+        for name in settings.get("weights", {}):
+            if name not in defaults["weights"]:
+                raise ValueError("unknown grading policy weight: " + str(name))
+
+        self.settings = {}
+        for key in defaults:
+            self.settings[key] = settings.get(key, defaults[key])
+        weights = dict(defaults["weights"])
+        weights.update(self.settings["weights"])
+        self.settings["weights"] = weights
+
+        # any other setting of the wrong type fails here
+        try:
+            self.compile()
+        except (AttributeError, TypeError, ValueError) as error:
+            raise ValueError("invalid grading policy: %s (%s)"
+                             % (error, sorted(settings)))
+
+    def compile(self):
+        """ Converts the settings into the numbers grade works with.
+        NOT FOR EXTERNAL USE. """
+
+        settings = self.settings
+
+        # a threshold or cap of None is not applied, so it stays None
+        def optional(value):
+            return None if value is None else float(value)
+
+        self.maxAbsences = optional(settings["maxAbsences"])
+        self.minHomework = optional(settings["minHomework"])
+        self.minGroup = optional(settings["minGroup"])
+        self.cap = optional(settings["cap"])
+        self.caps = dict((str(name), optional(cap))
+                         for name, cap in settings["caps"].items())
+        self.weights = dict((name, float(weight))
+                            for name, weight in settings["weights"].items())
+
+        # the cutoffs in ascending order of score, for bisect
+        for cutoff in settings["cutoffs"]:
+            if not isinstance(cutoff, (list, tuple)) or len(cutoff) != 2:
+                raise ValueError("a cutoff must be a [score, letter] pair")
+        cutoffs = sorted((float(score), str(letter))
+                         for score, letter in settings["cutoffs"])
+        self.scores = [score for score, letter in cutoffs]
+        self.letters = [letter for score, letter in cutoffs]
+        self.passGrade = str(settings["pass"])
+        self.failGrade = str(settings["fail"])
+
+    @classmethod
+    def fromJSON(cls, text):
+        """ Makes a policy from the JSON text of its settings. Raises a
+        ValueError if the text is not a valid policy. """
+
+        settings = json.loads(text)
+        if not isinstance(settings, dict):
+            raise ValueError("a grading policy must be a JSON object")
+        return cls(settings)
+
+    def toJSON(self):
+        """ Returns the policy's settings as JSON text. """
+
+        return json.dumps(self.settings, sort_keys=True)
+
+    def points(self, name, value):
+        """ Returns the points counted for the given value of the named
+        assignment. Ungraded assignments ('') count as 0 points. """
+
+        points = number(value)
+        cap = self.caps.get(name, self.cap)
+        if cap is not None and points > cap:
+            return cap
+        return points
+
+    def grade(self, absences, homework, groupPoints):
+        """ Grades a whole class at once. Takes each student's number of
+        absences, total homework points (each assignment capped, see
+        points) and group points, all in the same student order, and
+        returns the list of grades in that order. """
+
+        numRows = len(absences)
+        absences = [number(count) for count in absences]
+        groupPoints = [number(points) for points in groupPoints]
+
+        wHomework = self.weights["Homework"]
+        wGroup = self.weights["Group"]
+        wAbsences = self.weights["Absences"]
+        maxAbsences, minHomework, minGroup = self.maxAbsences, self.minHomework, self.minGroup
+        scores, letters = self.scores, self.letters
+        passGrade, failGrade = self.passGrade, self.failGrade
+
+        grades = []
+        for row in range(0, numRows):
+            if ((maxAbsences is not None and absences[row] >= maxAbsences)
+                    or (minHomework is not None and homework[row] < minHomework)
+                    or (minGroup is not None and groupPoints[row] < minGroup)):
+                grades.append(failGrade)
+            elif not scores:
+                grades.append(passGrade)
+            else:
+                score = (wHomework * homework[row] + wGroup * groupPoints[row]
+                         + wAbsences * absences[row])
+                x = bisect.bisect_right(scores, score)
+                grades.append(letters[x - 1] if x else failGrade)
+
+        return grades
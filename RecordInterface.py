@@ -0,0 +1,447 @@
+__author__ = 'Jake'
+
+# Imports the XML database classes whose API this engine implements.
+
+from array import array
+import xml.etree.cElementTree as ET
+from xml.etree.ElementTree import SubElement
+
+from DataInterface import DataInterface, journaled
+from TableInterface import TableInterface
+import Snapshot
+
+
+class StudentRecord:
+    """ One student of a RecordInterface: their name and an array with
+    the code of their value in each category, in the order of the
+    database's slots. A record made before a category was added is
+    shorter than the list of slots; the missing cells have the
+    category's default. NOT FOR EXTERNAL USE. """
+
+    __slots__ = ("name", "cells")
+
+    def __init__(self, name, cells):
+        self.name = name
+        self.cells = cells
+
+
+class RecordInterface(TableInterface):
+    """ A DataInterface which keeps each student in memory as a compact
+    StudentRecord instead of as Elements. Every category is given a slot
+    number when it is added, and each value is stored as a code into a
+    table of the distinct strings in the database, so a name like
+    "Number_of_Absences" or a value like "Yes" is stored once however
+    many students have it. The XML file is only used to load and save
+    the database; groups, dates and assignments are still kept as
+    Elements. All public methods take and return the same values as in
+    DataInterface. """
+
+#############################################################################
+#          Database Initialization, Creation, Saving and Upkeep             #
+#############################################################################
+
+    def loadSnapshot(self, snap):
+        """ Makes the records straight from the cell matrix of a snapshot
+        read by Snapshot.loads, whose string table becomes the table of
+        distinct strings, and builds the group indexes.
+        NOT FOR EXTERNAL USE. """
+
+        self.data = Snapshot.toTree(snap, students=False)
+        self.buildIndex()
+
+        self.resetStrings(snap["strings"])
+
+        # buildIndex has given the default categories and the sparse columns
+        # their slots, with codes into the old string table; the columns of
+        # the cell matrix follow them
+        for header, value in self.stuDefaults:
+            self.slotDefaults[self.slots[header]] = self.code(value)
+        for header in snap["defaults"]:
+            self.slotDefaults[self.slots[header]] = self.code(snap["defaults"][header])
+        empty = self.code("")
+        for header in snap["dense"]:
+            self.newSlot(header, empty)
+            self.indexHeader(header)
+
+        cells = snap["cells"]
+        width = snap["width"]
+        numDefaults = len(self.stuDefaults)
+        sparse = [(snap["sparse"][header], self.slotDefaults[self.slots[header]])
+                  for header in snap["headers"] if header in snap["defaults"]]
+        for row in range(0, len(snap["names"])):
+            start = row * width
+            record = cells[start:start + numDefaults]
+            record.extend([stored.get(row, default) for stored, default in sparse])
+            record.extend(cells[start + numDefaults:start + width])
+            self.newRecord(snap["names"][row], record)
+
+    def buildIndex(self):
+        """ Reads the student Elements into records, then removes them
+        from the tree so that only the records are kept, and builds the
+        group indexes. NOT FOR EXTERNAL USE. """
+
+        DataInterface.buildIndex(self)
+        self.data.find("Students").clear()
+
+    def resetIndex(self):
+        """ Empties the records and the indexes. NOT FOR EXTERNAL USE. """
+
+        DataInterface.resetIndex(self)
+
+        self.resetStrings()
+
+        # the records in the order the students were added, and the record
+        # of each name
+        self.records = []
+        self.recordIndex = {}
+
+        # the slot of each category, the categories in slot order and the
+        # code of each slot's default
+        self.slots = {}
+        self.slotNames = []
+        self.slotDefaults = array("I")
+        for header, value in self.stuDefaults:
+            self.newSlot(header, self.code(value))
+
+    def indexDefault(self, default):
+        """ Gives the sparse column described by the given Default Element
+        a slot. NOT FOR EXTERNAL USE. """
+
+        DataInterface.indexDefault(self, default)
+        self.newSlot(default.attrib["name"], self.code(default.attrib["info"]))
+
+    def indexStudent(self, student):
+        """ Adds a record for the given student Element, then empties the
+        Element since it is no longer needed. NOT FOR EXTERNAL USE. """
+
+        cells = array("I", self.slotDefaults)
+        for cat in student:
+            if cat.tag == "AssignDate":
+                header = cat.attrib["name"]
+                if header not in self.headerSet:
+                    # a cell of a category which is not sparse is None
+                    # for the students whose Elements do not have it
+                    self.newSlot(header, self.code(None))
+                    self.indexHeader(header)
+                    cells.append(self.code(None))
+            else:
+                header = cat.tag
+            cells[self.slots[header]] = self.code(cat.attrib["info"])
+        self.newRecord(student.attrib["info"], cells)
+        student.clear()
+
+    def toXML(self):
+        """ Returns a Gradebook Element which has the Students rebuilt from
+        the records and shares all other Elements with self.data.
+        NOT FOR EXTERNAL USE. """
+
+        root = ET.Element("Gradebook", dict(self.data.attrib))
+        for child in self.data:
+            if child.tag != "Students":
+                root.append(child)
+                continue
+
+            strings = self.strings
+            headers = [(header, self.slots[header], header in self.defaults)
+                       for header in self.headerList]
+            students = SubElement(root, "Students")
+            for record in self.records:
+                student = SubElement(students, "Name")
+                student.attrib["info"] = record.name
+                for header, value in self.stuDefaults:
+                    SubElement(student, header).attrib["info"] = \
+                        strings[record.cells[self.slots[header]]]
+                for header, slot, sparse in headers:
+                    code = self.getCell(record, slot)
+                    # a sparse column's cells at its default are not saved,
+                    # nor are cells which were never stored
+                    if sparse and code == self.slotDefaults[slot]:
+                        continue
+                    if strings[code] is None:
+                        continue
+                    cat = SubElement(student, "AssignDate")
+                    cat.attrib["info"] = strings[code]
+                    cat.attrib["name"] = header
+
+        return root
+
+    def newSlot(self, header, default):
+        """ Gives the category with the given header the next slot, whose
+        cells have the given default code until they are set, and returns
+        the slot. NOT FOR EXTERNAL USE. """
+
+        slot = len(self.slotNames)
+        self.slots[header] = slot
+        self.slotNames.append(header)
+        self.slotDefaults.append(default)
+        return slot
+
+    def newRecord(self, name, cells):
+        """ Adds a record for the given student with the given array of
+        cells and returns it. NOT FOR EXTERNAL USE. """
+
+        record = StudentRecord(name, cells)
+        self.records.append(record)
+        self.recordIndex[name] = record
+        return record
+
+    def getCell(self, record, slot):
+        """ Returns the code in the given slot of a record.
+        NOT FOR EXTERNAL USE. """
+
+        cells = record.cells
+        return cells[slot] if slot < len(cells) else self.slotDefaults[slot]
+
+    def setCell(self, record, slot, code):
+        """ Stores the code in the given slot of a record, first filling
+        in the defaults of any slots the record is missing.
+        NOT FOR EXTERNAL USE. """
+
+        cells = record.cells
+        if slot >= len(cells):
+            cells.extend(self.slotDefaults[len(cells):slot + 1])
+        cells[slot] = code
+
+    def activeRecords(self):
+        """ Returns the records of the students in activeNames, in the
+        same order. NOT FOR EXTERNAL USE. """
+
+        recordIndex = self.recordIndex
+        return [recordIndex[name] for name in self.activeNames()]
+
+    def enrolledRecords(self):
+        """ Returns the records of the non-dropped students in the order
+        they were added, which is the order of the stuMassCall lists.
+        NOT FOR EXTERNAL USE. """
+
+        yes = self.codes.get("Yes")
+        slot = self.slots["In_Class"]
+        return [record for record in self.records if record.cells[slot] == yes]
+
+    def sortRoster(self):
+        """ Returns the names of the non-flagged, non-dropped students in
+        alphabetical order, read from the records. NOT FOR EXTERNAL USE. """
+
+        yes = self.codes.get("Yes")
+        no = self.codes.get("No")
+        inclass = self.slots["In_Class"]
+        flag = self.slots["Flag"]
+        return sorted(record.name for record in self.records
+                      if record.cells[inclass] == yes and record.cells[flag] == no)
+
+#############################################################################
+#                           Finding Functions                               #
+#############################################################################
+
+    def findStudent(self, name):
+        """ Returns the record of the student with the given name, or None
+        if there is no such student. NOT FOR EXTERNAL USE. """
+
+        return self.recordIndex.get(name)
+
+#############################################################################
+#                        Student Roster Functions                           #
+#############################################################################
+
+    def newStudent(self, name, email="", units=""):
+        """ Adds a record for a student who is not in the database yet,
+        with the given email and units and every other category empty.
+        NOT FOR EXTERNAL USE. """
+
+        cells = array("I", self.slotDefaults[:len(self.stuDefaults)])
+        cells[self.slots["Email"]] = self.code(email)
+        cells[self.slots["Units"]] = self.code(units)
+        cells.extend(array("I", [self.code("")]) * len(self.headerList))
+        self.newRecord(name, cells)
+
+    @journaled
+    def dropStudent(self, name):
+        """ Sets the InClass attribute to indicate that the student
+        has dropped. """
+
+        self.recordIndex[name].cells[self.slots["In_Class"]] = self.code("No")
+        self.clearRoster()
+
+    def dateMatrix(self):
+        """ Returns the string table, the date columns and the number of
+        records, for stuAbsenceAll. NOT FOR EXTERNAL USE. """
+
+        columns = []
+        for date in set(self.findDates()):
+            slot = self.slots.get(date)
+            if slot is not None:
+                columns.append(array("I", [self.getCell(record, slot)
+                                           for record in self.records]))
+        return self.strings, columns, len(self.records)
+
+    def storeAbsences(self, absences, excused):
+        """ Sets every student's number of absences and excused absences
+        from lists in the order of the records. NOT FOR EXTERNAL USE. """
+
+        absenceSlot = self.slots["Number_of_Absences"]
+        excusedSlot = self.slots["Number_of_Excused"]
+        for x in range(0, len(self.records)):
+            cells = self.records[x].cells
+            cells[absenceSlot] = self.code(str(absences[x]))
+            cells[excusedSlot] = self.code(str(excused[x]))
+
+    @journaled
+    def stuRec(self, name):
+        """ Every record has a cell, stored or default, for every slot,
+        so a student's categories always match the headerList. """
+
+        return True
+
+#############################################################################
+#                       Student Data Management                             #
+#############################################################################
+
+    @journaled
+    def stuMod(self, name, header, value="", assign = False):
+        """ Changes the attribute of the given header category within
+        the given student element. Set assign to true if modifying a
+        non-default category. """
+
+        record = self.recordIndex[name]
+        slot = self.slots[header]
+        old = self.strings[self.getCell(record, slot)]
+        self.setCell(record, slot, self.code(value))
+        self.cellChanged(name, header, old, value)
+        if header in self.rosterHeaders: self.clearRoster()
+
+    def stuCall(self, name, header, assign = False):
+        """ Gets the attribute of the given header category within
+        the given student element. Set assign to true if calling a
+        non-default category. """
+
+        return self.strings[self.getCell(self.recordIndex[name], self.slots[header])]
+
+    @journaled
+    def stuAdd(self, header, value=""):
+        """ Adds a category with the given header, with every student's
+        value set to value, and adds the header to the list of categories
+        given to students added in the future. Only the category's slot
+        is added; the records get the cell when it is first changed.
+        This function replaces an existing category with the same
+        header, so it should be used in conjunction with stuQuery which
+        checks for duplicates. """
+
+        self.uncountColumn(header)
+        code = self.code(value)
+        slot = self.slots.get(header)
+        if slot is None:
+            self.newSlot(header, code)
+            self.indexHeader(header)
+        else:
+            # sets the cells of the category being replaced
+            self.slotDefaults[slot] = code
+            for record in self.records:
+                if slot < len(record.cells):
+                    record.cells[slot] = code
+
+        if self.sparseColumns:
+            self.declareDefault(header, value)
+        elif header in self.defaults:
+            self.declareDefault(header, None)
+        self.countColumn(header)
+
+    @journaled
+    def stuMassMod(self, header, vlist):
+        """ Changes all values of the given DEFAULT header to the corresponding
+        values of a list of values. This list must
+        include all non-flagged, non-dropped students and must be
+        arranged in alphabetical order by student
+        name. If the list given is the wrong size or the header is not
+        a category, the function will return
+        false. Otherwise, true will be returned. """
+
+        records = self.activeRecords()
+        if ((len(records) != len(vlist)) or (header in self.headerList)
+                or header not in self.slots):
+            return False
+
+        slot = self.slots[header]
+        for x in range(0, len(records)):
+            records[x].cells[slot] = self.code(vlist[x])
+        if header in self.rosterHeaders: self.clearRoster()
+        return True
+
+    @journaled
+    def stuMassAssignDateMod(self, header, vlist):
+        """ Has the same function as stuMassMod except it is specifically
+        for modifying AssignDate categories. """
+
+        records = self.activeRecords()
+        if ((len(records) != len(vlist)) or (header not in self.headerSet)):
+            return False
+
+        slot = self.slots[header]
+        strings = self.strings
+        for x in range(0, len(records)):
+            old = strings[self.getCell(records[x], slot)]
+            self.setCell(records[x], slot, self.code(vlist[x]))
+            self.cellChanged(records[x].name, header, old, vlist[x])
+        return True
+
+    def stuMassCall(self, header):
+        """ Returns a list of the values each student has of a given
+        category with the DEFAULT header as a tag. This
+        list is in the order the students were added and only includes
+        non-dropped students. If the given header is not a default
+        category, then the function will return an empty list. """
+
+        if (header not in self.deflist):
+            return []
+        if header == "Name":
+            return [record.name for record in self.enrolledRecords()]
+
+        slot = self.slots.get(header)
+        if slot is None:
+            return []
+        strings = self.strings
+        return [strings[record.cells[slot]] for record in self.enrolledRecords()]
+
+    def stuMassAssignDateCall(self, header):
+        """ Has the same function as stuMassCall except it is specifically
+        for calling AssignDate categories. """
+
+        if (header not in self.headerSet):
+            return []
+        slot = self.slots[header]
+        strings = self.cellStrings()
+        return [strings[self.getCell(record, slot)] for record in self.enrolledRecords()]
+
+    def columnValues(self, header, names):
+        """ Returns the value each of the given students has in the given
+        category, or None for a cell which is not stored.
+        NOT FOR EXTERNAL USE. """
+
+        slot = self.slots[header]
+        recordIndex = self.recordIndex
+        strings = self.strings
+        return [strings[self.getCell(recordIndex[name], slot)] for name in names]
+
+    @journaled
+    def stuCatMod(self, target, name):
+        """ Allows the tag of a preexisting student category to be
+        changed without affecting the category's
+        stored data. """
+
+        # if the header does not exist, returns false
+        if (target not in self.headerList): return False
+
+        self.headerList[self.headerList.index(target)] = name
+        self.headerSet.discard(target)
+        self.headerSet.add(name)
+        slot = self.slots.pop(target)
+        self.slots[name] = slot
+        self.slotNames[slot] = name
+
+        # a sparse column keeps its default under the new name
+        default = self.defaults.pop(target, None)
+        if default is not None:
+            default.attrib["name"] = name
+            self.defaults[name] = default
+
+        self.clearTotals()
+        return True
@@ -0,0 +1,358 @@
+__author__ = 'Jake'
+
+# Reads and writes the binary snapshot of a gradebook which DataInterface
+# keeps next to database.xml so that it can start without parsing XML.
+#
+# A snapshot is the magic bytes, then the size in bytes and the
+# modification time in nanoseconds of the XML file it was made from as
+# unsigned 64 bit little-endian numbers, then sections, each an unsigned
+# 32 bit little-endian count followed by that many unsigned 32 bit codes:
+#
+#   string table lengths, then the table itself as NUL separated UTF-8
+#   root attributes   key, value, key, value, ...
+#   column schema     the AssignDate headers
+#   column defaults   per header, the default of a sparse column, or NONE
+#   student names
+#   cell matrix       one row per student: the default categories in the
+#                     order of the engine's stuDefaults, then one value
+#                     per header which is not sparse, or NONE if the
+#                     student has no cell
+#   sparse cells      per sparse header, in schema order: the number of
+#                     stored cells, then (row, value)...
+#   assignments, dates
+#   groups            per group: name, units, number of students,
+#                     students..., number of WeekGrades,
+#                     (name, info, comment)...
+#
+# Every string is stored once in the string table and referred to by its
+# code everywhere else. XML cannot contain NUL, so it is a safe separator.
+
+from array import array
+import os
+import struct
+import sys
+import xml.etree.cElementTree as ET
+from xml.etree.ElementTree import SubElement
+
+MAGIC = b"CMSSNAP3"
+
+# the layout of the size and modification time of the XML file
+SOURCE = struct.Struct("<QQ")
+
+# the code stored for a WeekGrade without a comment or a column without
+# a default
+NONE = 0xFFFFFFFF
+
+
+def stamp(fileloc):
+    """ Returns the size and modification time in nanoseconds of the file
+    at fileloc, which a snapshot records for the XML it was made from so
+    that it is not loaded once the XML has changed. """
+
+    info = os.stat(fileloc)
+    return (info.st_size, info.st_mtime_ns)
+
+
+def dumps(root, stuDefaults, source=(0, 0)):
+    """ Returns the snapshot of the given Gradebook Element as bytes,
+    recording source as the stamp of the XML file it was made from.
+    stuDefaults is the engine's list of (category, value) pairs, whose
+    categories are stored in that order at the start of each row. """
+
+    categories = [header for header, value in stuDefaults]
+
+    strings = []
+    codes = {}
+
+    def code(value):
+        if value is None:
+            return NONE
+        c = codes.get(value)
+        if c is None:
+            c = len(strings)
+            strings.append(value)
+            codes[value] = c
+        return c
+
+    rootattrib = []
+    for key, value in root.attrib.items():
+        rootattrib += [code(key), code(value)]
+
+    # the sparse columns come first, then every other AssignDate header in
+    # the order they first appear
+    defaults = {}
+    headers = []
+    if root.find("Defaults") is not None:
+        for default in root.find("Defaults"):
+            defaults[default.attrib["name"]] = default.attrib["info"]
+            headers.append(default.attrib["name"])
+    columns = {}
+    students = root.find("Students")
+    for student in students:
+        for cat in student.iter("AssignDate"):
+            header = cat.attrib["name"]
+            if header not in columns and header not in defaults:
+                columns[header] = len(columns)
+                headers.append(header)
+
+    names = []
+    cells = array("I")
+    sparse = dict((header, []) for header in defaults)
+    empty = code("")
+    for student in students:
+        names.append(code(student.attrib["info"]))
+        # a header the student has no cell for stays NONE
+        row = [empty] * len(categories) + [NONE] * len(columns)
+        for x in range(0, len(categories)):
+            cat = student.find(categories[x])
+            if cat is not None:
+                row[x] = code(cat.attrib["info"])
+        for cat in student.iter("AssignDate"):
+            header = cat.attrib["name"]
+            if header in sparse:
+                sparse[header] += [len(names) - 1, code(cat.attrib["info"])]
+            else:
+                row[len(categories) + columns[header]] = code(cat.attrib["info"])
+        cells.extend(row)
+
+    flat = []
+    for header in defaults:
+        flat.append(len(sparse[header]) // 2)
+        flat += sparse[header]
+
+    homework = [code(hw.attrib["info"]) for hw in root.find("Assignments")]
+    dates = [code(date.attrib["info"]) for date in root.find("Dates")]
+
+    groups = []
+    for group in root.find("Groups"):
+        members = [member.attrib["info"] for member in group.find("Students")]
+        weeks = group.findall("WeekGrade")
+        groups += [code(group.attrib["info"]),
+                   code(group.find("Units").attrib["info"]), len(members)]
+        groups += [code(sname) for sname in members]
+        groups.append(len(weeks))
+        for week in weeks:
+            groups += [code(week.attrib["name"]), code(week.attrib["info"]),
+                       code(week.text)]
+
+    schema = [code(header) for header in headers]
+    schemaDefaults = [code(defaults.get(header)) for header in headers]
+
+    blob = "\0".join(strings).encode("utf-8")
+    parts = [MAGIC, SOURCE.pack(*source), section([len(strings), len(blob)]), blob]
+    for values in (rootattrib, schema, schemaDefaults, names, cells, flat,
+                   homework, dates, groups):
+        parts.append(section(values))
+    return b"".join(parts)
+
+
+def setSource(data, source):
+    """ Returns the snapshot data with its record of the XML file it was
+    made from replaced by the given stamp, for a snapshot which was made
+    before the XML was written. """
+
+    return data[:len(MAGIC)] + SOURCE.pack(*source) + data[len(MAGIC) + SOURCE.size:]
+
+
+def section(values):
+    """ Returns a count followed by the given codes as little-endian bytes.
+    NOT FOR EXTERNAL USE. """
+
+    values = array("I", values)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return struct.pack("<I", len(values)) + values.tobytes()
+
+
+def loads(data, stuDefaults):
+    """ Reads a snapshot written by dumps with the same stuDefaults.
+    Returns a dictionary with the stamp of the XML file it was made
+    from (source), the default categories of each row (categories), the
+    string table
+    (strings), the root attributes (attrib), the headers, the default
+    of each sparse column (defaults), the student names, the
+    cell matrix of string codes (cells) with its row width and the
+    headers of its columns (dense), the stored cells of each sparse
+    column as a dictionary from row to string code (sparse), the
+    assignments, the dates and the groups as tuples of (name, units,
+    students, [(name, info, comment), ...]). A cell which is not stored
+    has the code of a None added to the end of the string table. Raises
+    a ValueError if the data is not a complete snapshot. """
+
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("not a gradebook snapshot")
+    if len(data) < len(MAGIC) + SOURCE.size:
+        raise ValueError("truncated gradebook snapshot")
+    source = SOURCE.unpack_from(data, len(MAGIC))
+    pos = [len(MAGIC) + SOURCE.size]
+
+    def readSection():
+        if pos[0] + 4 > len(data):
+            raise ValueError("truncated gradebook snapshot")
+        count = struct.unpack_from("<I", data, pos[0])[0]
+        start = pos[0] + 4
+        pos[0] = start + 4 * count
+        if pos[0] > len(data):
+            raise ValueError("truncated gradebook snapshot")
+        values = array("I")
+        values.frombytes(data[start:pos[0]])
+        if sys.byteorder == "big":
+            values.byteswap()
+        return values
+
+    numStrings, blobLength = readSection()
+    blob = data[pos[0]:pos[0] + blobLength]
+    pos[0] += blobLength
+    strings = blob.decode("utf-8").split("\0") if numStrings else []
+    if len(strings) != numStrings:
+        raise ValueError("corrupt gradebook snapshot")
+
+    try:
+        snap = readBody(readSection, strings,
+                        [header for header, value in stuDefaults])
+    except IndexError:
+        raise ValueError("corrupt gradebook snapshot")
+    snap["source"] = source
+    return snap
+
+
+def readBody(readSection, strings, categories):
+    """ Reads the sections of a snapshot which follow its string table,
+    for loads. A code or count out of range raises a ValueError here, or
+    an IndexError which loads turns into one. NOT FOR EXTERNAL USE. """
+
+    def check(codes, limit):
+        if codes and max(codes) >= limit:
+            raise ValueError("corrupt gradebook snapshot")
+        return codes
+
+    rootattrib = readSection()
+    headers = [strings[c] for c in readSection()]
+    schemaDefaults = readSection()
+    names = [strings[c] for c in readSection()]
+    cells = readSection()
+    flat = readSection()
+
+    defaults = {}
+    dense = []
+    for x in range(0, len(headers)):
+        if schemaDefaults[x] == NONE:
+            dense.append(headers[x])
+        else:
+            defaults[headers[x]] = strings[schemaDefaults[x]]
+
+    width = len(categories) + len(dense)
+    if len(cells) != width * len(names):
+        raise ValueError("corrupt gradebook snapshot")
+
+    # a cell which is not stored gets the code of None, added to the end
+    # of the string table, so that every cell is a code into the table;
+    # only AssignDate cells, after the default categories, are ever missing
+    missing = NONE in cells
+    if missing:
+        for row in range(0, len(names)):
+            if NONE in cells[row * width:row * width + len(categories)]:
+                raise ValueError("corrupt gradebook snapshot")
+        cells = array("I", [len(strings) if c == NONE else c for c in cells])
+    check(cells, len(strings) + missing)
+
+    sparse = {}
+    x = 0
+    for header in headers:
+        if header in defaults:
+            count = flat[x]
+            if x + 1 + 2 * count > len(flat):
+                raise ValueError("corrupt gradebook snapshot")
+            rows = check(flat[x + 1:x + 1 + 2 * count:2], len(names))
+            values = check(flat[x + 2:x + 2 + 2 * count:2], len(strings))
+            sparse[header] = dict(zip(rows, values))
+            x += 1 + 2 * count
+
+    homework = [strings[c] for c in readSection()]
+    dates = [strings[c] for c in readSection()]
+    flat = readSection()
+
+    groups = []
+    x = 0
+    while x < len(flat):
+        name, units, count = strings[flat[x]], strings[flat[x + 1]], flat[x + 2]
+        if x + 3 + count > len(flat):
+            raise ValueError("corrupt gradebook snapshot")
+        members = [strings[c] for c in flat[x + 3:x + 3 + count]]
+        x += 3 + count
+        if x + 1 + 3 * flat[x] > len(flat):
+            raise ValueError("corrupt gradebook snapshot")
+        weeks = []
+        for y in range(0, flat[x]):
+            comment = flat[x + 3 + 3 * y]
+            weeks.append((strings[flat[x + 1 + 3 * y]], strings[flat[x + 2 + 3 * y]],
+                          None if comment == NONE else strings[comment]))
+        x += 1 + 3 * flat[x]
+        groups.append((name, units, members, weeks))
+
+    return {"categories": categories,
+            "strings": strings + [None] if missing else strings,
+            "attrib": dict((strings[rootattrib[x]], strings[rootattrib[x + 1]])
+                           for x in range(0, len(rootattrib), 2)),
+            "headers": headers, "defaults": defaults, "names": names,
+            "cells": cells, "width": width,
+            "dense": dense, "sparse": sparse,
+            "homework": homework, "dates": dates, "groups": groups}
+
+
+def toTree(snap, students=True):
+    """ Returns the Gradebook Element described by a snapshot read with
+    loads. If students is false the Students Element is left empty. """
+
+    root = ET.Element("Gradebook", snap["attrib"])
+    studentsElem = SubElement(root, "Students")
+    assignments = SubElement(root, "Assignments")
+    groups = SubElement(root, "Groups")
+    dates = SubElement(root, "Dates")
+
+    if snap["defaults"]:
+        defaults = ET.Element("Defaults")
+        root.insert(0, defaults)
+        for header in snap["headers"]:
+            if header in snap["defaults"]:
+                SubElement(defaults, "Default",
+                           {"info": snap["defaults"][header], "name": header})
+
+    if students:
+        categories = snap["categories"]
+        strings = snap["strings"]
+        cells = snap["cells"]
+        width = snap["width"]
+        dense = snap["dense"]
+        sparse = [(header, snap["sparse"][header]) for header in snap["headers"]
+                  if header in snap["defaults"]]
+        for row in range(0, len(snap["names"])):
+            student = SubElement(studentsElem, "Name", {"info": snap["names"][row]})
+            start = row * width
+            for x in range(0, len(categories)):
+                SubElement(student, categories[x], {"info": strings[cells[start + x]]})
+            start += len(categories)
+            for x in range(0, len(dense)):
+                if strings[cells[start + x]] is not None:
+                    SubElement(student, "AssignDate",
+                               {"info": strings[cells[start + x]], "name": dense[x]})
+            for header, stored in sparse:
+                if row in stored:
+                    SubElement(student, "AssignDate",
+                               {"info": strings[stored[row]], "name": header})
+
+    for hwName in snap["homework"]:
+        SubElement(assignments, "Homework", {"info": hwName})
+    for today in snap["dates"]:
+        SubElement(dates, "Date", {"info": today})
+
+    for name, units, members, weeks in snap["groups"]:
+        group = SubElement(groups, "Group", {"info": name})
+        SubElement(group, "Units", {"info": units})
+        students = SubElement(group, "Students")
+        for sname in members:
+            SubElement(students, "Member", {"info": sname})
+        for header, value, comment in weeks:
+            SubElement(group, "WeekGrade", {"info": value, "name": header}).text = comment
+
+    return root
@@ -0,0 +1,770 @@
+__author__ = 'Jake'
+
+# Imports the SQLite driver and the XML database class whose API this
+# engine implements.
+
+import os
+import sqlite3
+import threading
+from xml.etree.ElementTree import SubElement, ElementTree
+
+from DataInterface import DataInterface, journaled
+
+
+# the tables and indexes of a gradebook database. The default student
+# categories are columns of the students table; every AssignDate is a row
+# of the cells table.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS gradebook (
+    key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS students (
+    id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE,
+    Email TEXT, Units TEXT, Number_of_Absences TEXT, Number_of_Excused TEXT,
+    In_Class TEXT, Flag TEXT, Grade TEXT);
+CREATE TABLE IF NOT EXISTS headers (
+    id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS cells (
+    student INTEGER NOT NULL, header INTEGER NOT NULL, info TEXT,
+    PRIMARY KEY (student, header));
+CREATE INDEX IF NOT EXISTS cells_header ON cells (header);
+CREATE TABLE IF NOT EXISTS dates (
+    id INTEGER PRIMARY KEY, info TEXT);
+CREATE TABLE IF NOT EXISTS assignments (
+    id INTEGER PRIMARY KEY, info TEXT);
+CREATE TABLE IF NOT EXISTS studentgroups (
+    id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, units TEXT);
+CREATE TABLE IF NOT EXISTS members (
+    id INTEGER PRIMARY KEY, grp INTEGER NOT NULL, student TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS members_grp ON members (grp);
+CREATE INDEX IF NOT EXISTS members_student ON members (student);
+CREATE TABLE IF NOT EXISTS weekgrades (
+    id INTEGER PRIMARY KEY, grp INTEGER NOT NULL, name TEXT, info TEXT,
+    comment TEXT);
+CREATE INDEX IF NOT EXISTS weekgrades_grp ON weekgrades (grp, name);
+"""
+
+
+class SqliteInterface(DataInterface):
+    """ A DataInterface which keeps the whole gradebook in a SQLite file
+    instead of an XML file. Changes are made with indexed UPDATEs and
+    INSERTs inside a transaction which save commits, so saving no longer
+    rewrites the whole database. Use migrate to convert an existing
+    database.xml, and exportXML to write the gradebook back out as XML.
+    All public methods take and return the same values as in
+    DataInterface. """
+
+#############################################################################
+#          Database Initialization, Creation, Saving and Upkeep             #
+#############################################################################
+
+    def __init__(self, fileloc="database.db", year="", semester=""):
+        """ Opens the SQLite gradebook at fileloc, creating it with the
+        given year and semester if it does not exist yet. """
+
+        # the state used by the journaled methods. A SQLite gradebook is
+        # never journaled since every save is already a small commit.
+        self.journaling = False
+        self.replaying = False
+        self.changeDepth = 0
+        self.batchDepth = 0
+        self.listeners = []
+        self.lock = threading.RLock()
+        self.saveError = None
+        self.saveStats = {"requested": 0, "performed": 0, "failed": 0,
+                          "seconds": 0.0}
+
+        self.fileloc = fileloc
+        self.saveFile = fileloc
+        self.conn = sqlite3.connect(fileloc, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.execute("INSERT OR IGNORE INTO gradebook VALUES ('year', ?)",
+                          (year,))
+        self.conn.execute("INSERT OR IGNORE INTO gradebook VALUES ('semester', ?)",
+                          (semester,))
+        self.conn.commit()
+
+        # the list of AssignDate headers in the order they were added
+        self.headerList = [row[0] for row in
+                           self.conn.execute("SELECT name FROM headers ORDER BY id")]
+        self.headerSet = set(self.headerList)
+        self.groHeaderList = []
+
+        # every cell is stored, so no column is sparse
+        self.defaults = {}
+
+        self.loadPolicy()
+        self.clearTotals()
+        self.clearRoster()
+
+    def save(self, filename=""):
+        """ Commits all changes made since the last save. The file name is
+        ignored since the gradebook is always stored where it was
+        opened; use exportXML to write an XML copy. """
+
+        self.saveStats["requested"] += 1
+        # inside a batch, the commit is made once the batch is committed
+        if self.batchDepth:
+            self.pendingSave = filename
+            return
+        self.startSave(filename)
+
+    def startSave(self, filename):
+        """ Commits the changes once no batch is open.
+        NOT FOR EXTERNAL USE. """
+
+        self.saveStats["performed"] += 1
+        with self.lock:
+            self.conn.commit()
+
+    def begin(self):
+        """ Starts a batch of changes (see DataInterface.batch), which
+        SQLite keeps in a savepoint so that it can be rolled back. """
+
+        DataInterface.begin(self)
+        if self.batchDepth == 1:
+            self.conn.execute("SAVEPOINT batch")
+
+    def commit(self):
+        """ Ends the current batch, keeping its changes, and commits them
+        if it is the outermost batch. """
+
+        if self.batchDepth == 1:
+            self.conn.execute("RELEASE batch")
+        DataInterface.commit(self)
+
+    def undoBatch(self):
+        """ Rolls the database back to the savepoint made when the batch
+        began and rereads what is kept in memory. NOT FOR EXTERNAL USE. """
+
+        self.conn.execute("ROLLBACK TO batch")
+        self.conn.execute("RELEASE batch")
+        self.headerList = [row[0] for row in
+                           self.conn.execute("SELECT name FROM headers ORDER BY id")]
+        self.headerSet = set(self.headerList)
+        self.loadPolicy()
+        self.clearTotals()
+        self.clearRoster()
+
+    def recordUndo(self, op, call):
+        """ Does nothing, since the savepoint undoes every change.
+        NOT FOR EXTERNAL USE. """
+
+        pass
+
+    def flush(self):
+        """ Commits all changes made since the last save. """
+
+        with self.lock:
+            self.conn.commit()
+
+    def checkpoint(self, filename=""):
+        """ Commits all changes and folds the SQLite write-ahead log back
+        into the database file. """
+
+        with self.lock:
+            self.conn.commit()
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        """ Commits all changes and closes the database. Should be called
+        when the program exits. """
+
+        self.checkpoint()
+        self.conn.close()
+
+    def toXML(self):
+        """ Returns the whole gradebook as a Gradebook Element in the same
+        layout DataInterface saves. NOT FOR EXTERNAL USE. """
+
+        sql = self.conn.execute
+        info = dict(sql("SELECT key, value FROM gradebook"))
+        root = self.newDB(info.get("year", ""), info.get("semester", ""))
+
+        # the AssignDate values of every student, keyed by student id
+        cells = {}
+        for student, header, value in sql(
+                "SELECT c.student, h.name, c.info FROM cells c "
+                "JOIN headers h ON h.id = c.header"):
+            cells.setdefault(student, {})[header] = value
+
+        columns = ", ".join(header for header, value in self.stuDefaults)
+        students = root.find("Students")
+        for row in sql("SELECT id, name, " + columns + " FROM students ORDER BY id"):
+            student = SubElement(students, "Name")
+            student.attrib["info"] = row[1]
+            for x in range(0, len(self.stuDefaults)):
+                SubElement(student, self.stuDefaults[x][0]).attrib["info"] = row[x + 2]
+            values = cells.get(row[0], {})
+            for header in self.headerList:
+                # a cell which is not stored is left out, as it was read
+                if header not in values:
+                    continue
+                cat = SubElement(student, "AssignDate")
+                cat.attrib["info"] = values[header]
+                cat.attrib["name"] = header
+
+        for hwName in self.findHW():
+            SubElement(root.find("Assignments"), "Homework").attrib["info"] = hwName
+        for today in self.findDates():
+            SubElement(root.find("Dates"), "Date").attrib["info"] = today
+
+        for gid, name, units in sql("SELECT id, name, units FROM studentgroups ORDER BY id"):
+            group = SubElement(root.find("Groups"), "Group")
+            group.attrib["info"] = name
+            SubElement(group, "Units").attrib["info"] = units
+            students = SubElement(group, "Students")
+            for sname in self.groStuList(gid):
+                SubElement(students, "Member").attrib["info"] = sname
+            for header, value, comment in sql(
+                    "SELECT name, info, comment FROM weekgrades WHERE grp = ? "
+                    "ORDER BY id", (gid,)):
+                cat = SubElement(group, "WeekGrade")
+                cat.attrib["info"] = value
+                cat.attrib["name"] = header
+                cat.text = comment
+
+        return root
+
+    def infoCall(self, key):
+        """ Returns the gradebook attribute with the given key, or None if
+        it is not set. NOT FOR EXTERNAL USE. """
+
+        row = self.conn.execute("SELECT value FROM gradebook WHERE key = ?",
+                                (key,)).fetchone()
+        return None if row is None else row[0]
+
+    def infoMod(self, key, value):
+        """ Sets the gradebook attribute with the given key to value, or
+        removes it if value is None. NOT FOR EXTERNAL USE. """
+
+        if value is None:
+            self.conn.execute("DELETE FROM gradebook WHERE key = ?", (key,))
+        else:
+            self.conn.execute("INSERT OR REPLACE INTO gradebook VALUES (?, ?)",
+                              (key, value))
+
+    def exportXML(self, filename="database.xml"):
+        """ Writes the gradebook to an XML file in the format
+        DataInterface reads. """
+
+        with self.lock:
+            ElementTree(self.toXML()).write(filename)
+
+    def importXML(self, fileloc):
+        """ Copies everything in the XML database at fileloc into this
+        gradebook in one transaction. Use on an empty gradebook.
+        NOT FOR EXTERNAL USE; see migrate. """
+
+        # replays the journal, so that changes made since the last
+        # checkpoint are carried over too
+        source = DataInterface(fileloc, journal=True)
+        root = source.data
+        sql = self.conn.execute
+
+        with self.lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO gradebook VALUES (?, ?)",
+                                  root.attrib.items())
+
+            headers = {}
+            for header in source.headerList:
+                headers[header] = sql("INSERT INTO headers (name) VALUES (?)",
+                                      (header,)).lastrowid
+                self.indexHeader(header)
+
+            cells = []
+            for student in root.find("Students"):
+                values = [student.attrib["info"]]
+                for header, value in self.stuDefaults:
+                    cat = student.find(header)
+                    values.append(value if cat is None else cat.attrib["info"])
+                sid = sql("INSERT INTO students (name, " +
+                          ", ".join(header for header, value in self.stuDefaults) +
+                          ") VALUES (?, ?, ?, ?, ?, ?, ?, ?)", values).lastrowid
+
+                for cat in student.findall("AssignDate"):
+                    cells.append((sid, headers[cat.attrib["name"]], cat.attrib["info"]))
+
+                # stores the cells the XML leaves at a sparse column's default
+                for header in source.defaults:
+                    if source.findAssignDate(values[0], header) is None:
+                        cells.append((sid, headers[header], source.cellDefault(header)))
+            self.conn.executemany("INSERT OR REPLACE INTO cells VALUES (?, ?, ?)", cells)
+
+            self.conn.executemany("INSERT INTO assignments (info) VALUES (?)",
+                                  [(hwName,) for hwName in source.findHW()])
+            self.conn.executemany("INSERT INTO dates (info) VALUES (?)",
+                                  [(today,) for today in source.findDates()])
+
+            for group in root.find("Groups"):
+                gid = sql("INSERT INTO studentgroups (name, units) VALUES (?, ?)",
+                          (group.attrib["info"],
+                           group.find("Units").attrib["info"])).lastrowid
+                self.conn.executemany(
+                    "INSERT INTO members (grp, student) VALUES (?, ?)",
+                    [(gid, sname) for sname in source.groStuList(group)])
+                self.conn.executemany(
+                    "INSERT INTO weekgrades (grp, name, info, comment) "
+                    "VALUES (?, ?, ?, ?)",
+                    [(gid, cat.attrib["name"], cat.attrib["info"], cat.text)
+                     for cat in group.findall("WeekGrade")])
+
+        # the imported gradebook may have its own grading policy
+        self.loadPolicy()
+        self.clearTotals()
+        self.clearRoster()
+        return self
+
+#############################################################################
+#                           Finding Functions                               #
+#############################################################################
+
+    def findStudent(self, name):
+        """ Returns the id of the student with the given name, or None if
+        there is no such student. NOT FOR EXTERNAL USE. """
+
+        row = self.conn.execute("SELECT id FROM students WHERE name = ?",
+                                (name,)).fetchone()
+        return row and row[0]
+
+    def findHeader(self, header):
+        """ Returns the id of the AssignDate header with the given name,
+        or None if there is no such header. NOT FOR EXTERNAL USE. """
+
+        row = self.conn.execute("SELECT id FROM headers WHERE name = ?",
+                                (header,)).fetchone()
+        return row and row[0]
+
+    def findGroup(self, name):
+        """ Returns the id of the group with the given name, or None if
+        there is no such group. NOT FOR EXTERNAL USE. """
+
+        row = self.conn.execute("SELECT id FROM studentgroups WHERE name = ?",
+                                (name,)).fetchone()
+        return row and row[0]
+
+    def groStuList(self, group):
+        """ Returns the list of names of the students in the group with
+        the given id, in the order they were added.
+        NOT FOR EXTERNAL USE. """
+
+        return [row[0] for row in self.conn.execute(
+            "SELECT student FROM members WHERE grp = ? ORDER BY id", (group,))]
+
+    def findGroupStu(self, sname):
+        """ Returns the id of the first group with the given student as a
+        member, or None if they are in no group. NOT FOR EXTERNAL USE. """
+
+        row = self.conn.execute("SELECT grp FROM members WHERE student = ? "
+                                "ORDER BY grp LIMIT 1", (sname,)).fetchone()
+        return row and row[0]
+
+    def findGroupsStu(self, sname):
+        """ Returns the list of names of every group the given student is
+        a member of. NOT FOR EXTERNAL USE. """
+
+        return [row[0] for row in self.conn.execute(
+            "SELECT DISTINCT g.name FROM members m JOIN studentgroups g "
+            "ON g.id = m.grp WHERE m.student = ? ORDER BY g.id", (sname,))]
+
+    def findDates(self):
+        """ Returns the list of Date names. NOT FOR EXTERNAL USE. """
+
+        return [row[0] for row in
+                self.conn.execute("SELECT info FROM dates ORDER BY id")]
+
+    def findHW(self):
+        """ Returns the list of Assignment names. NOT FOR EXTERNAL USE. """
+
+        return [row[0] for row in
+                self.conn.execute("SELECT info FROM assignments ORDER BY id")]
+
+    def findAllGroups(self):
+        """ Returns the list of Group names. NOT FOR EXTERNAL USE. """
+
+        return [row[0] for row in
+                self.conn.execute("SELECT name FROM studentgroups ORDER BY id")]
+
+    def checkHeader(self, header):
+        """ Raises a KeyError unless header is one of the default student
+        categories, which are the only names allowed as SQL columns.
+        NOT FOR EXTERNAL USE. """
+
+        if header not in [default for default, value in self.stuDefaults]:
+            raise KeyError(header)
+
+#############################################################################
+#                        Student Roster Functions                           #
+#############################################################################
+
+    def newStudent(self, name, email="", units=""):
+        """ Adds a student who is not in the database yet, with the given
+        email and units and an empty cell for every header.
+        NOT FOR EXTERNAL USE. """
+
+        values = [name] + [value for header, value in self.stuDefaults]
+        values[1:3] = [email, units]
+        sid = self.conn.execute(
+            "INSERT INTO students (name, " +
+            ", ".join(header for header, value in self.stuDefaults) +
+            ") VALUES (?, ?, ?, ?, ?, ?, ?, ?)", values).lastrowid
+        self.conn.execute("INSERT INTO cells SELECT ?, id, '' FROM headers", (sid,))
+
+    @journaled
+    def dropStudent(self, name):
+        """ Sets the InClass attribute to indicate that the student
+        has dropped. """
+
+        self.conn.execute("UPDATE students SET In_Class = 'No' WHERE name = ?",
+                          (name,))
+        self.clearRoster()
+
+    @journaled
+    def stuAbsenceAll(self):
+        """ Tallies the number of absences and excused absences of every
+        student at once, as stuAbsence does for one student, in a single
+        grouped query, and stores them all. """
+
+        sql = self.conn.execute
+        sql("UPDATE students SET Number_of_Excused = '0', Number_of_Absences = '0'")
+        sql("CREATE TEMP TABLE IF NOT EXISTS tally "
+            "(student INTEGER PRIMARY KEY, excused TEXT, absence TEXT)")
+        sql("DELETE FROM tally")
+        sql("INSERT INTO tally SELECT c.student, "
+            "CAST(COUNT(CASE WHEN c.info = 'E' THEN 1 END) AS TEXT), "
+            "CAST(COUNT(CASE WHEN c.info NOT IN ('E', 'Y') THEN 1 END) AS TEXT) "
+            "FROM cells c JOIN headers h ON h.id = c.header "
+            "WHERE h.name IN (SELECT info FROM dates) GROUP BY c.student")
+        sql("UPDATE students SET "
+            "Number_of_Excused = (SELECT excused FROM tally WHERE tally.student = students.id), "
+            "Number_of_Absences = (SELECT absence FROM tally WHERE tally.student = students.id) "
+            "WHERE id IN (SELECT student FROM tally)")
+
+    @journaled
+    def stuRec(self, name):
+        """ Reconciles a student's categories with the database
+        headerList. Only for use in edge cases. """
+
+        self.conn.execute(
+            "INSERT OR IGNORE INTO cells SELECT s.id, h.id, '' "
+            "FROM students s, headers h WHERE s.name = ?", (name,))
+        return True
+
+    def sortRoster(self):
+        """ Returns the names of the non-flagged, non-dropped students in
+        alphabetical order, read from the database. NOT FOR EXTERNAL USE. """
+
+        return [row[0] for row in self.conn.execute(
+            "SELECT name FROM students WHERE In_Class = 'Yes' AND Flag = 'No' "
+            "ORDER BY name")]
+
+#############################################################################
+#                       Student Data Management                             #
+#############################################################################
+
+    @journaled
+    def stuMod(self, name, header, value="", assign = False):
+        """ Changes the attribute of the given header category within
+        the given student element. Set assign to true if modifying a
+        non-default category. """
+
+        if (assign):
+            # reads the old value only if the running totals need it
+            old = None
+            if (self.totals is not None and name in self.totals
+                    and (header in self.totalHW or header in self.totalDates)):
+                old = self.stuCall(name, header, True)
+            # stores the cell even if the student did not have it
+            self.conn.execute(
+                "INSERT OR REPLACE INTO cells SELECT s.id, h.id, ? "
+                "FROM students s, headers h WHERE s.name = ? AND h.name = ?",
+                (value, name, header))
+            self.cellChanged(name, header, old, value)
+        else:
+            self.checkHeader(header)
+            self.conn.execute("UPDATE students SET " + header +
+                              " = ? WHERE name = ?", (value, name))
+            if header in self.rosterHeaders: self.clearRoster()
+
+    def stuCall(self, name, header, assign = False):
+        """ Gets the attribute of the given header category within
+        the given student element. Set assign to true if calling a
+        non-default category. """
+
+        if (assign):
+            row = self.conn.execute(
+                "SELECT info FROM cells "
+                "WHERE student = (SELECT id FROM students WHERE name = ?) "
+                "AND header = (SELECT id FROM headers WHERE name = ?)",
+                (name, header)).fetchone()
+        else:
+            self.checkHeader(header)
+            row = self.conn.execute("SELECT " + header +
+                                    " FROM students WHERE name = ?", (name,)).fetchone()
+        # a cell which is not stored is None, as in DataInterface
+        return None if row is None else row[0]
+
+    @journaled
+    def stuAdd(self, header, value=""):
+        """ Adds a category with the given header to all students, with
+        every student's value set to value, and adds this category to the
+        list of categories which will be given to students added in the
+        future. An existing category with the same header is replaced,
+        as in DataInterface. """
+
+        sql = self.conn.execute
+        self.uncountColumn(header)
+        if header in self.headerSet:
+            hid = sql("SELECT id FROM headers WHERE name = ?", (header,)).fetchone()[0]
+        else:
+            hid = sql("INSERT INTO headers (name) VALUES (?)", (header,)).lastrowid
+        sql("INSERT OR REPLACE INTO cells SELECT id, ?, ? FROM students", (hid, value))
+        self.indexHeader(header)
+        self.countColumn(header)
+
+    @journaled
+    def addAssignment(self, hwName):
+        """ Adds an assignment to the list of already added assignments. Use
+         with stuAdd when adding an assignment. """
+
+        self.conn.execute("INSERT INTO assignments (info) VALUES (?)", (hwName,))
+        self.countColumn(hwName)
+
+    @journaled
+    def addDate(self, today):
+        """ Adds an date to the list of already added date. Use
+         with stuAdd when adding an date. """
+
+        self.conn.execute("INSERT INTO dates (info) VALUES (?)", (today,))
+        self.countColumn(today)
+
+    @journaled
+    def stuMassMod(self, header, vlist):
+        """ Changes all values of the given DEFAULT header to the corresponding
+        values of a list of values. This list must
+        include all non-flagged, non-dropped students and must be
+        arranged in alphabetical order by student
+        name. If the list given is the wrong size or the header is not
+        a category, the function will return
+        false. Otherwise, true will be returned. """
+
+        names = self.activeNames()
+        if ((len(names) != len(vlist)) or (header in self.headerList)):
+            return False
+        self.checkHeader(header)
+
+        self.conn.executemany("UPDATE students SET " + header +
+                              " = ? WHERE name = ?", zip(vlist, names))
+        if header in self.rosterHeaders: self.clearRoster()
+        return True
+
+    @journaled
+    def stuMassAssignDateMod(self, header, vlist):
+        """ Has the same function as stuMassMod except it is specifically
+        for modifying AssignDate categories. """
+
+        names = self.activeNames()
+        hid = self.findHeader(header)
+        if ((len(names) != len(vlist)) or hid is None):
+            return False
+
+        # reads the old values only if the running totals need them
+        counted = (self.totals is not None
+                   and (header in self.totalHW or header in self.totalDates))
+        old = self.columnValues(header, names) if counted else [None] * len(names)
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO cells SELECT s.id, ?, ? "
+            "FROM students s WHERE s.name = ?",
+            [(hid, vlist[x], names[x]) for x in range(0, len(names))])
+        for x in range(0, len(names)):
+            self.cellChanged(names[x], header, old[x], vlist[x])
+        return True
+
+    def stuMassCall(self, header):
+        """ Returns a list of the values each student has of a given
+        category with the DEFAULT header as a tag. This
+        list is in the order the students were added and only includes
+        non-dropped students. If the given header is not a default
+        category, then the function will return an empty list. """
+
+        if header == "Name":
+            header = "name"
+        elif header not in [default for default, value in self.stuDefaults]:
+            return []
+
+        return [row[0] for row in self.conn.execute(
+            "SELECT " + header + " FROM students WHERE In_Class = 'Yes' "
+            "ORDER BY id")]
+
+    def stuMassAssignDateCall(self, header):
+        """ Has the same function as stuMassCall except it is specifically
+        for calling AssignDate categories. """
+
+        hid = self.findHeader(header)
+        if hid is None:
+            return []
+
+        # a cell which is not stored reads as empty, as in DataInterface
+        return [row[0] for row in self.conn.execute(
+            "SELECT COALESCE(c.info, '') FROM students s "
+            "LEFT JOIN cells c ON c.student = s.id AND c.header = ? "
+            "WHERE s.In_Class = 'Yes' ORDER BY s.id", (hid,))]
+
+    def columnValues(self, header, names):
+        """ Returns the value each of the given students has in the given
+        category, or None for a cell which is not stored, reading the
+        whole category in one query. NOT FOR EXTERNAL USE. """
+
+        values = dict(self.conn.execute(
+            "SELECT s.name, c.info FROM cells c JOIN students s ON s.id = c.student "
+            "WHERE c.header = ?", (self.findHeader(header),)))
+        return [values.get(name) for name in names]
+
+    @journaled
+    def stuCatMod(self, target, name):
+        """ Allows the tag of a preexisting student category to be
+        changed without affecting the category's
+        stored data. """
+
+        # if the header does not exist, returns false
+        if (target not in self.headerList): return False
+
+        self.conn.execute("UPDATE headers SET name = ? WHERE name = ?",
+                          (name, target))
+        self.headerList[self.headerList.index(target)] = name
+        self.headerSet.discard(target)
+        self.headerSet.add(name)
+        self.clearTotals()
+        return True
+
+#############################################################################
+#                       Group Roster Functions                              #
+#############################################################################
+
+    @journaled
+    def addGroup(self, name):
+        """ Adds a group with the give name and initializes default categories. """
+
+        self.conn.execute("INSERT INTO studentgroups (name, units) VALUES (?, '0')",
+                          (name,))
+
+    @journaled
+    def groStuAdd(self, gname, sname):
+        """ Adds a student with the name sname to the group with gname.
+        will fail if a group with the given name does not exist or if
+        a student with the given name does not exist. Also adds the
+        given student's units to the group's unit total. If the student
+        is already a member, nothing is changed. """
+
+        gid = self.findGroup(gname)
+        if self.groHasStu(gname, sname): return
+        units = int(self.stuCall(sname, "Units"))
+        self.conn.execute("INSERT INTO members (grp, student) VALUES (?, ?)",
+                          (gid, sname))
+        self.conn.execute("UPDATE studentgroups SET units = "
+                          "CAST(CAST(units AS INTEGER) + ? AS TEXT) WHERE id = ?",
+                          (units, gid))
+
+    @journaled
+    def groStudRemove(self, gname, sname):
+        """ Remove's the given student and their units from the group's
+        student list and unit count respectively. If the student is not
+        in the group, nothing is changed. Once again, if the group or
+        student does not exist, this function will fail. """
+
+        gid = self.findGroup(gname)
+        if not self.conn.execute("DELETE FROM members WHERE grp = ? AND student = ?",
+                                 (gid, sname)).rowcount:
+            return
+        units = int(self.stuCall(sname, "Units"))
+        self.conn.execute("UPDATE studentgroups SET units = "
+                          "CAST(CAST(units AS INTEGER) - ? AS TEXT) WHERE id = ?",
+                          (units, gid))
+
+    def groHasStu(self, gname, sname):
+        """ Returns True if the student with the name sname is a member of
+        the group with gname, and False otherwise. """
+
+        return self.conn.execute(
+            "SELECT 1 FROM members m JOIN studentgroups g ON g.id = m.grp "
+            "WHERE g.name = ? AND m.student = ?", (gname, sname)).fetchone() is not None
+
+#############################################################################
+#                        Group Data Management                              #
+#############################################################################
+
+    @journaled
+    def groMod(self, name, header, value):
+        """ Changes the attribute of the given header category within
+        the given group element. Cannot modify Units or Students as
+        those categories are handled in groStuAdd and groStuRemove."""
+
+        gid = self.findGroup(name)
+        for row in self.conn.execute("SELECT info FROM weekgrades "
+                                     "WHERE grp = ? AND name = ?", (gid, header)).fetchall():
+            self.weekChanged(name, header, row[0], value)
+        self.conn.execute("UPDATE weekgrades SET info = ? WHERE grp = ? AND name = ?",
+                          (value, gid, header))
+
+    def groCall(self, name, header):
+        """ Retrieves the attribute of the given header category within
+        the given group element. Cannot modify Units or Students as
+        those categories are handled in groStuAdd and groStuRemove."""
+
+        return self.conn.execute(
+            "SELECT info FROM weekgrades WHERE grp = ? AND name = ? ORDER BY id",
+            (self.findGroup(name), header)).fetchone()[0]
+
+    @journaled
+    def groAdd(self, group, header, value=""):
+        """ Adds a WeekGrade entry with the name given by header and with the
+        info attribute set to value. This entry currently cannot be removed
+        or modified. """
+
+        self.conn.execute("INSERT INTO weekgrades (grp, name, info) VALUES (?, ?, ?)",
+                          (self.findGroup(group), header, value))
+        self.weekChanged(group, header, None, value)
+
+    @journaled
+    def groCommentMod(self, name, header, comment):
+        """ Modifies the comment stored in the WeekGrade entry with the name
+        attribute given by header. The comment must be a string. """
+
+        self.conn.execute(
+            "UPDATE weekgrades SET comment = ? WHERE grp = ? AND name = ?",
+            (comment, self.findGroup(name), header))
+
+    def groCommentCall(self, name, header):
+        """ Retrieves the comment stored in the WeekGrade entry with the name
+        attribute given by header. The comment returned will be a string. """
+
+        return self.conn.execute(
+            "SELECT comment FROM weekgrades WHERE grp = ? AND name = ? ORDER BY id",
+            (self.findGroup(name), header)).fetchone()[0]
+
+    def groPoints(self, gname):
+        """ Returns the total of the weekly points stored in the given
+        group's WeekGrade entries. """
+
+        return self.conn.execute(
+            "SELECT TOTAL(CAST(info AS REAL)) FROM weekgrades WHERE grp = ? "
+            "AND name NOT IN ('Students', 'Units')",
+            (self.findGroup(gname),)).fetchone()[0]
+
+    def groMassDateCall(self, gname):
+        """ Retrieves the names of all stored WeekGrade entries and returns them as an
+        unsorted list of strings. """
+
+        return [row[0] for row in self.conn.execute(
+            "SELECT name FROM weekgrades WHERE grp = ? ORDER BY id",
+            (self.findGroup(gname),))]
+
+
+def migrate(xmlfile="database.xml", dbfile="database.db"):
+    """ Converts the XML database at xmlfile into a new SQLite gradebook
+    at dbfile and returns it opened. """
+
+    if os.path.isfile(dbfile):
+        raise FileExistsError(dbfile)
+    return SqliteInterface(dbfile).importXML(xmlfile)
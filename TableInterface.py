@@ -0,0 +1,54 @@
+__author__ = 'Jake'
+
+# Imports the XML database class whose API the table engines implement.
+
+from DataInterface import DataInterface
+
+
+class TableInterface(DataInterface):
+    """ The base of the DataInterfaces which keep the students in memory
+    as codes into a table of the distinct strings in the database,
+    instead of as Elements (see ColumnarInterface and RecordInterface).
+    It holds the string table shared by both; each subclass decides how
+    the codes of a student are laid out. The XML file is only used to
+    load and save the database. """
+
+#############################################################################
+#          Database Initialization, Creation, Saving and Upkeep             #
+#############################################################################
+
+    def load(self, fileloc):
+        """ Reads the database file at fileloc. indexStudent converts and
+        empties each student as soon as it has been read, so the student
+        Elements are never all held in memory at once; the emptied ones
+        are dropped at the end.
+        NOT FOR EXTERNAL USE. """
+
+        DataInterface.load(self, fileloc)
+        self.data.find("Students").clear()
+
+    def resetStrings(self, strings=()):
+        """ Makes the given list the table of distinct strings, emptying
+        it by default. NOT FOR EXTERNAL USE. """
+
+        # the table of distinct strings and the code of each string
+        self.strings = list(strings)
+        self.codes = dict((self.strings[x], x) for x in range(0, len(self.strings)))
+
+    def code(self, value):
+        """ Returns the code of the given string, adding it to the string
+        table if it is not there yet. NOT FOR EXTERNAL USE. """
+
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.strings)
+            self.strings.append(value)
+            self.codes[value] = code
+        return code
+
+    def cellStrings(self):
+        """ Returns the string table with the code of a cell which is not
+        stored reading as empty, as stuMassAssignDateCall does in
+        DataInterface. NOT FOR EXTERNAL USE. """
+
+        return ["" if value is None else value for value in self.strings]
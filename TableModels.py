@@ -0,0 +1,483 @@
+__author__ = 'Jake'
+
+# Qt table models which show the gradebook straight from a DataInterface.
+# A model keeps only its row order (the student names, or a group's
+# WeekGrade dates) and its column headers; every cell is read from the
+# database when a view asks for it and every edit is written back through
+# setData, so a view costs nothing per cell however large the class is.
+# Each model subscribes to the database's change events (see
+# DataInterface.subscribe) and updates only the rows, columns and cells a
+# change touched, whichever part of the program made it.
+
+from bisect import bisect_left, bisect_right
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QStringListModel
+
+
+class StudentTableModel(QAbstractTableModel):
+    """ A table with one row per student. The first columns are the
+    default categories in fixedColumns, as (title, header, editable)
+    tuples, and they are followed by one editable column per AssignDate
+    header. Subclasses choose the columns. """
+
+    fixedColumns = [("Name", "Name", False)]
+
+    # the kind of AssignDate header ("Date" or "Homework") which gets a new
+    # column when one is added to the database, if any
+    columnKind = None
+
+    # whether the rows follow the roster (see DataInterface.activeNames),
+    # gaining a row in its place when a student is added or unflagged and
+    # losing it when they are dropped or flagged
+    followsRoster = True
+
+    # the default categories which decide whether a student is on the roster
+    rosterHeaders = ("In_Class", "Flag")
+
+    def __init__(self, db, names, headers=(), parent=None):
+        """ Makes a model of the given students, in the given order, with
+        a column for each of the given AssignDate headers. A model which
+        follows the roster should be given db.activeNames(). """
+
+        QAbstractTableModel.__init__(self, parent)
+        self.db = db
+        self.names = list(names)
+        self.headers = list(headers)
+        # maps each student's name to their row
+        self.rows = dict((name, row) for row, name in enumerate(self.names))
+        self.indexColumns()
+        # while a block is being written, the cells changed so far, which
+        # the views are told about at once when it is done
+        self.changedCells = None
+        db.subscribe(self.applyChange)
+
+    def indexColumns(self):
+        """ Maps each header to its column. NOT FOR EXTERNAL USE. """
+
+        self.columns = {}
+        for col in range(len(self.fixedColumns) + len(self.headers) - 1, -1, -1):
+            self.columns[self.column(col)[0]] = col
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.names)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.fixedColumns) + len(self.headers)
+
+    def column(self, col):
+        """ Returns the header of the given column and whether it is an
+        AssignDate header. NOT FOR EXTERNAL USE. """
+
+        if col < len(self.fixedColumns):
+            return self.fixedColumns[col][1], False
+        return self.headers[col - len(self.fixedColumns)], True
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Vertical:
+            return section + 1
+        if section < len(self.fixedColumns):
+            return self.fixedColumns[section][0]
+        return self.headers[section - len(self.fixedColumns)]
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.EditRole):
+            return None
+        name = self.names[index.row()]
+        header, assign = self.column(index.column())
+        if header == "Name":
+            return name
+        return self.db.stuCall(name, header, assign)
+
+    def flags(self, index):
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        col = index.column()
+        if col >= len(self.fixedColumns) or self.fixedColumns[col][2]:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=Qt.EditRole):
+        """ Writes an edited cell to the database and saves it. The views
+        are updated by the change events. """
+
+        if role != Qt.EditRole or not (self.flags(index) & Qt.ItemIsEditable):
+            return False
+        name = self.names[index.row()]
+        header, assign = self.column(index.column())
+        self.db.stuMod(name, header, str(value), assign)
+        self.cellEdited(index.row(), header)
+        self.db.save()
+        return True
+
+    def setValues(self, row, col, values):
+        """ Writes a block of values, given as a list of rows of strings,
+        into the cells starting at (row, col), as when a block copied from
+        a spreadsheet is pasted. Values which fall outside the table or on
+        a cell which cannot be edited are skipped. The block is written as
+        one batch (see DataInterface.batch), so the database is saved once,
+        and the views are told about every cell it changed at once. Returns
+        the number of cells written. """
+
+        written = 0
+        self.changedCells = []
+        try:
+            with self.db.batch():
+                for r in range(row, min(row + len(values), len(self.names))):
+                    for c in range(col, min(col + len(values[r - row]), self.columnCount())):
+                        if not (self.flags(self.index(r, c)) & Qt.ItemIsEditable):
+                            continue
+                        header, assign = self.column(c)
+                        self.db.stuMod(self.names[r], header, values[r - row][c - col], assign)
+                        self.cellEdited(r, header)
+                        written += 1
+                self.db.save()
+        finally:
+            cells, self.changedCells = self.changedCells, None
+
+        if cells:
+            rows = [r for r, c in cells]
+            cols = [c for r, c in cells]
+            self.dataChanged.emit(self.index(min(rows), min(cols)),
+                                  self.index(max(rows), max(cols)))
+        return written
+
+    def cellEdited(self, row, header):
+        """ Called after a student's cell has been written, before the
+        database is saved, to update the cells which depend on it.
+        NOT FOR EXTERNAL USE. """
+
+        pass
+
+    def applyChange(self, event, *details):
+        """ Updates the model after a change to the database (see
+        DataInterface.subscribe for the events). """
+
+        if event == "cellChanged":
+            name, header = details
+            if header in self.rosterHeaders and self.followsRoster:
+                self.placeStudent(name)
+            if name in self.rows and header in self.columns:
+                self.cellChanged(self.rows[name], self.columns[header])
+        elif event == "columnChanged":
+            header = details[0]
+            if header in self.rosterHeaders and self.followsRoster:
+                self.setNames(self.db.activeNames())
+            elif header in self.columns and self.names:
+                col = self.columns[header]
+                self.dataChanged.emit(self.index(0, col),
+                                      self.index(len(self.names) - 1, col))
+        elif event in ("studentAdded", "studentDropped") and self.followsRoster:
+            self.placeStudent(details[0])
+        elif event == "columnAdded":
+            header, kind = details
+            if kind == self.columnKind and header not in self.headers:
+                self.addColumn(header)
+        elif event == "columnRenamed":
+            self.renameColumn(*details)
+
+    def cellChanged(self, row, col):
+        """ Tells the views that a cell has changed, or notes it while a
+        block is being written. NOT FOR EXTERNAL USE. """
+
+        if self.changedCells is not None:
+            self.changedCells.append((row, col))
+        else:
+            self.dataChanged.emit(self.index(row, col), self.index(row, col))
+
+    def detach(self):
+        """ Stops the model from following the database, once it is no
+        longer shown. """
+
+        self.db.unsubscribe(self.applyChange)
+
+    def setNames(self, names):
+        """ Shows the given students instead, in the given order. """
+
+        self.beginResetModel()
+        self.names = list(names)
+        self.rows = dict((name, row) for row, name in enumerate(self.names))
+        self.endResetModel()
+
+    def placeStudent(self, name):
+        """ Gives the student a row at their place in the roster if they
+        are on it (see DataInterface.stuRow), and removes their row if
+        they are not. NOT FOR EXTERNAL USE. """
+
+        row = self.db.stuRow(name)
+        if row is None:
+            self.removeStudent(name)
+        elif name not in self.rows:
+            self.addStudent(name, row)
+
+    def addStudent(self, name, row=None):
+        """ Adds a row for a student who was added to the database, at the
+        given row or by default after the others. """
+
+        if name in self.rows:
+            return
+        if row is None or row > len(self.names):
+            row = len(self.names)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.names.insert(row, name)
+        for later in self.names[row + 1:]:
+            self.rows[later] += 1
+        self.rows[name] = row
+        self.endInsertRows()
+
+    def removeStudent(self, name):
+        """ Removes the row of a student who was dropped from the
+        database. Does nothing if they have no row. """
+
+        row = self.rows.get(name)
+        if row is None:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.names[row]
+        del self.rows[name]
+        for later in self.names[row:]:
+            self.rows[later] -= 1
+        self.endRemoveRows()
+
+    def addColumn(self, header):
+        """ Adds a column for an AssignDate header which was added to the
+        database. """
+
+        col = len(self.fixedColumns) + len(self.headers)
+        self.beginInsertColumns(QModelIndex(), col, col)
+        self.headers.append(header)
+        self.indexColumns()
+        self.endInsertColumns()
+
+    def renameColumn(self, old, new):
+        """ Renames the column of an AssignDate header which was renamed in
+        the database. Does nothing if there is no such column. """
+
+        if old not in self.headers:
+            return
+        col = len(self.fixedColumns) + self.headers.index(old)
+        self.headers[col - len(self.fixedColumns)] = new
+        self.indexColumns()
+        self.headerDataChanged.emit(Qt.Horizontal, col, col)
+
+    def refreshRow(self, name):
+        """ Tells the views that every cell of the given student may have
+        changed. """
+
+        row = self.rows.get(name)
+        if row is not None:
+            self.dataChanged.emit(self.index(row, 0),
+                                  self.index(row, self.columnCount() - 1))
+
+
+class RosterModel(StudentTableModel):
+    """ The roster: each student's name, email and units. """
+
+    fixedColumns = [("Name", "Name", False), ("Email", "Email", True),
+                    ("Units", "Units", True)]
+
+
+class MemberModel(StudentTableModel):
+    """ The members of a project group and their units. """
+
+    fixedColumns = [("Name", "Name", False), ("Units", "Units", False)]
+    followsRoster = False
+
+    def __init__(self, db, group, names=None, parent=None):
+        if names is None:
+            names = db.groStuList(db.findGroup(group))
+        self.group = group
+        StudentTableModel.__init__(self, db, names, (), parent)
+
+    def applyChange(self, event, *details):
+        if event == "groupChanged":
+            if details[0] == self.group:
+                self.setNames(self.db.groStuList(self.db.findGroup(self.group)))
+        else:
+            StudentTableModel.applyChange(self, event, *details)
+
+
+class AttendanceModel(StudentTableModel):
+    """ Each student's name, total absences and attendance on every date.
+    Editing a date recounts that student's absences. """
+
+    fixedColumns = [("Name", "Name", False),
+                    ("Total Unexcused", "Number_of_Absences", False)]
+    columnKind = "Date"
+
+    def __init__(self, db, names, dates=None, parent=None):
+        if dates is None:
+            dates = db.findDates()
+        StudentTableModel.__init__(self, db, names, dates, parent)
+
+    def cellEdited(self, row, header):
+        self.db.stuAbsence(self.names[row])
+
+
+class GradesModel(StudentTableModel):
+    """ Each student's name and their grade on every assignment. """
+
+    columnKind = "Homework"
+
+    def __init__(self, db, names, assignments=None, parent=None):
+        if assignments is None:
+            assignments = db.findHW()
+        StudentTableModel.__init__(self, db, names, assignments, parent)
+
+
+class FeedbackModel(QAbstractTableModel):
+    """ The weekly points and comments of a project group, one row per
+    WeekGrade. """
+
+    titles = ["Date", "Points", "Comment"]
+
+    def __init__(self, db, group, dates=None, parent=None):
+        QAbstractTableModel.__init__(self, parent)
+        self.db = db
+        self.group = group
+        if dates is None:
+            dates = db.groMassDateCall(group)
+        self.dates = list(dates)
+        db.subscribe(self.applyChange)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.dates)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.titles)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Vertical:
+            return section + 1
+        return self.titles[section]
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.EditRole):
+            return None
+        ddate = self.dates[index.row()]
+        if index.column() == 0:
+            return ddate
+        if index.column() == 1:
+            return self.db.groCall(self.group, ddate)
+        return self.db.groCommentCall(self.group, ddate)
+
+    def flags(self, index):
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if index.column() > 0:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=Qt.EditRole):
+        """ Writes edited points or an edited comment to the database and
+        saves it. The views are updated by the change events. """
+
+        if role != Qt.EditRole or index.column() == 0:
+            return False
+        ddate = self.dates[index.row()]
+        if index.column() == 1:
+            self.db.groMod(self.group, ddate, str(value))
+        else:
+            self.db.groCommentMod(self.group, ddate, str(value))
+        self.db.save()
+        return True
+
+    def applyChange(self, event, *details):
+        """ Rereads the group's WeekGrades after it has changed, adding rows
+        for new ones. """
+
+        if event != "groupChanged" or details[0] != self.group:
+            return
+        dates = self.db.groMassDateCall(self.group)
+        if dates[:len(self.dates)] == self.dates:
+            if len(dates) > len(self.dates):
+                self.beginInsertRows(QModelIndex(), len(self.dates), len(dates) - 1)
+                self.dates = list(dates)
+                self.endInsertRows()
+            if self.dates:
+                self.dataChanged.emit(self.index(0, 1),
+                                      self.index(len(self.dates) - 1, len(self.titles) - 1))
+        else:
+            self.beginResetModel()
+            self.dates = list(dates)
+            self.endResetModel()
+
+    def detach(self):
+        """ Stops the model from following the database, once it is no
+        longer shown. """
+
+        self.db.unsubscribe(self.applyChange)
+
+
+class RosterNameModel(QStringListModel):
+    """ The names of the enrolled students, sorted without regard to case,
+    for the pickers which choose a student. One model can be shared by
+    every picker; it follows the roster through the database's change
+    events. Since it is kept sorted, a QCompleter told that the model is
+    CaseInsensitivelySortedModel finds the names which start with what has
+    been typed by a binary search rather than by reading every name. """
+
+    def __init__(self, db, names=None, parent=None):
+        if names is None:
+            names = db.stuMassCall("Name")
+        self.db = db
+        self.names = sorted(names, key=str.lower)
+        # the sort key of each name, kept for bisect
+        self.keys = [name.lower() for name in self.names]
+        QStringListModel.__init__(self, self.names, parent)
+        db.subscribe(self.applyChange)
+
+    def flags(self, index):
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def find(self, name):
+        """ Returns the row of the given name, or None if it is not
+        there. """
+
+        key = name.lower()
+        for row in range(bisect_left(self.keys, key), bisect_right(self.keys, key)):
+            if self.names[row] == name:
+                return row
+        return None
+
+    def addName(self, name):
+        """ Adds a name in its sorted place, unless it is already there. """
+
+        if self.find(name) is not None:
+            return
+        key = name.lower()
+        row = bisect_right(self.keys, key)
+        self.names.insert(row, name)
+        self.keys.insert(row, key)
+        self.insertRows(row, 1)
+        self.setData(self.index(row), name)
+
+    def removeName(self, name):
+        """ Removes a name. Does nothing if it is not there. """
+
+        row = self.find(name)
+        if row is None:
+            return
+        del self.names[row]
+        del self.keys[row]
+        self.removeRows(row, 1)
+
+    def applyChange(self, event, *details):
+        """ Follows the students added to and dropped from the roster (see
+        DataInterface.subscribe). """
+
+        if event == "studentAdded":
+            self.addName(details[0])
+        elif event == "studentDropped":
+            self.removeName(details[0])
+        elif event == "columnChanged" and details[0] == "In_Class":
+            self.names = sorted(self.db.stuMassCall("Name"), key=str.lower)
+            self.keys = [name.lower() for name in self.names]
+            self.setStringList(self.names)
+
+    def detach(self):
+        """ Stops the model from following the database, once it is no
+        longer used. """
+
+        self.db.unsubscribe(self.applyChange)
@@ -0,0 +1,689 @@
+__author__ = 'Jake'
+
+# Times the DataInterface operations the GUI relies on so that changes to
+# the database code can be checked against large classes.
+# Run with: python benchmark.py
+#
+# python benchmark.py --json results.json instead runs the fixed suite
+# (see suite) on a gradebook written by generate.py, on every engine, and
+# writes the timings as JSON so that versions can be compared.
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+import ColumnarInterface
+import DataInterface
+import RecordInterface
+import SqliteInterface
+import generate
+
+
+def timeit(label, func, *args):
+    """ Calls func with the given arguments, prints how long it took
+    under the given label and returns the function's result. """
+
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    print("%-48s %10.4f s" % (label, elapsed))
+    return result
+
+
+def engines(dbfile):
+    """ Returns (label, constructor) pairs for the ElementTree, columnar
+    and SQLite engines. The SQLite gradebook is kept in dbfile. """
+
+    return [("DataInterface", DataInterface.DataInterface),
+            ("ColumnarInterface", ColumnarInterface.ColumnarInterface),
+            ("SqliteInterface", lambda year, semester:
+             SqliteInterface.SqliteInterface(dbfile, year, semester))]
+
+
+def fillRoster(db, numStudents, numDates):
+    """ Does the same database work as getRoster followed by
+    populateAttendanceFromDB: adds every student, sets their email and
+    units and then reads back every attendance cell. """
+
+    names = []
+    for x in range(0, numStudents):
+        name = "Student " + str(x)
+        db.addStudent(name)
+        db.stuMod(name, "Email", name + "@example.edu")
+        db.stuMod(name, "Units", "4")
+        names.append(name)
+
+    for x in range(0, numDates):
+        date = "Date " + str(x)
+        db.stuAdd(date, "Y")
+        db.addDate(date)
+
+    for date in db.findDates():
+        for name in names:
+            db.stuCall(name, "Number_of_Absences")
+            db.stuCall(name, date, True)
+
+    return names
+
+
+def newGradebook(engine=DataInterface.DataInterface, numStudents=0, numDates=0,
+                 **options):
+    """ Makes a new Fall 2014 gradebook with the given engine and options,
+    fills it with fillRoster and returns it and the students' names. """
+
+    db = engine(year="2014", semester="Fall", **options)
+    return db, fillRoster(db, numStudents, numDates)
+
+
+def benchRoster(numStudents=2000, numDates=10):
+    """ Times filling a roster of numStudents students with numDates
+    attendance dates. """
+
+    db, names = newGradebook()
+    timeit("fill %d-student roster" % numStudents,
+           fillRoster, db, numStudents, numDates)
+
+
+def editAndSave(db, names, filename):
+    """ Does the same database work as entering one grade per student
+    in the grades table: one stuMod and one save per edit. """
+
+    for name in names:
+        db.stuMod(name, "Date 0", "N", True)
+        db.save(filename)
+
+
+def benchSave(numStudents=1000, numEdits=200):
+    """ Times numEdits single-cell edits, each followed by a save, with
+    and without the change journal and the background save thread. """
+
+    with tempfile.TemporaryDirectory() as folder:
+        for journal, saveDelay in ((False, 0), (True, 0), (False, 500)):
+            filename = os.path.join(folder, "database%d%d.xml" % (journal, saveDelay))
+            db, names = newGradebook(numStudents=numStudents, numDates=10,
+                                     journal=journal, saveDelay=saveDelay)
+            db.save(filename)
+            timeit("%d edits + saves (journal=%s, delay=%d)"
+                   % (numEdits, journal, saveDelay),
+                   editAndSave, db, names[:numEdits], filename)
+            db.close()
+            print("    saves requested %(requested)d, performed %(performed)d, "
+                  "%(seconds).4f s writing" % db.saveStats)
+
+
+def readColumns(db, headers, repeat):
+    """ Reads each of the given default columns repeat times. """
+
+    for x in range(0, repeat):
+        for header in headers:
+            db.stuMassCall(header)
+
+
+def readRows(db, names, dates):
+    """ Reads every date cell of every student, row by row. """
+
+    for name in names:
+        for date in dates:
+            db.stuCall(name, date, True)
+
+
+def updateCells(db, names, date):
+    """ Changes one date cell of every student. """
+
+    for name in names:
+        db.stuMod(name, date, "N", True)
+
+
+def benchEngines(numStudents=2000, numDates=100):
+    """ Compares column reads, row reads and single-cell updates on the
+    ElementTree, columnar and SQLite engines. """
+
+    headers = ["Name", "Email", "Units", "Number_of_Absences", "In_Class"]
+    with tempfile.TemporaryDirectory() as folder:
+        for label, engine in engines(os.path.join(folder, "bench.db")):
+            db, names = newGradebook(engine, numStudents, numDates)
+            dates = db.findDates()
+            timeit("%s: 10 reads of %d columns" % (label, len(headers)),
+                   readColumns, db, headers, 10)
+            timeit("%s: read %d x %d cells by row" % (label, numStudents, numDates),
+                   readRows, db, names, dates)
+            timeit("%s: %d single-cell updates" % (label, numStudents),
+                   updateCells, db, names, dates[0])
+            timeit("%s: save" % label, db.save, os.path.join(folder, "bench.xml"))
+            db.close()
+
+
+def peakMemory(func, *args):
+    """ Returns the peak memory in megabytes allocated while calling func
+    with the given arguments. """
+
+    tracemalloc.start()
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1e6
+
+
+def residentMemory(func, *args):
+    """ Calls func with the given arguments and returns its result and
+    the number of bytes it allocated which are still in use when it
+    returns. """
+
+    tracemalloc.start()
+    result = func(*args)
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, current
+
+
+def loader(engine, snapshots):
+    """ Returns a function which opens a database file with the given
+    engine, reading the snapshot next to it only if snapshots is true. """
+
+    def load(filename):
+        # restores the class attribute afterwards, even on DataInterface
+        # itself, where deleting it would remove the setting altogether
+        previous = engine.__dict__.get("snapshots")
+        engine.snapshots = snapshots
+        try:
+            return engine(filename)
+        finally:
+            if previous is None:
+                del engine.snapshots
+            else:
+                engine.snapshots = previous
+
+    return load
+
+
+def benchLoad(numStudents=2000, numDates=100):
+    """ Times loading a saved gradebook with numStudents students and
+    numDates dates from XML and from its snapshot, and reports the peak
+    memory used. ET.parse alone is the first of the passes the old
+    loader made over the file. """
+
+    loaders = [("ET.parse only", ET.parse)]
+    for engine in (DataInterface.DataInterface, ColumnarInterface.ColumnarInterface,
+                   RecordInterface.RecordInterface):
+        loaders.append((engine.__name__ + " XML", loader(engine, False)))
+        loaders.append((engine.__name__ + " snapshot", loader(engine, True)))
+
+    with tempfile.TemporaryDirectory() as folder:
+        filename = os.path.join(folder, "database.xml")
+        db, names = newGradebook(numStudents=numStudents, numDates=numDates)
+        db.save(filename)
+        for label, load in loaders:
+            timeit("%s: load %d x %d" % (label, numStudents, numDates),
+                   load, filename)
+            print("    peak memory %.1f MB" % peakMemory(load, filename))
+
+
+def importOneByOne(db, records, filename):
+    """ Imports a roster the way getRoster used to: addStudent and two
+    stuMod calls per student, then a save. """
+
+    for record in records:
+        name = record[0] + " " + record[1]
+        db.addStudent(name)
+        db.stuMod(name, "Email", record[2])
+        db.stuMod(name, "Units", str(record[3]))
+    db.save(filename)
+
+
+def benchImport(numStudents=2000):
+    """ Times importing a workbook roster of numStudents students one
+    student at a time and with addStudents. """
+
+    records = [["First%d" % x, "Last%d" % x, "s%d@example.edu" % x, 4]
+               for x in range(0, numStudents)]
+
+    with tempfile.TemporaryDirectory() as folder:
+        db, names = newGradebook()
+        timeit("import %d students one by one" % numStudents,
+               importOneByOne, db, records, os.path.join(folder, "one.xml"))
+
+        db, names = newGradebook()
+        db.saveFile = os.path.join(folder, "batch.xml")
+        timeit("import %d students with addStudents" % numStudents,
+               db.addStudents, records)
+
+
+def absenceOneByOne(db, names):
+    """ Tallies absences one student at a time with stuAbsence. """
+
+    for name in names:
+        db.stuAbsence(name)
+
+
+def benchAbsence(numStudents=2000, numDates=100):
+    """ Times tallying the absences of the whole class one student at a
+    time and with stuAbsenceAll, on the ElementTree and columnar
+    engines. NumPy is used by stuAbsenceAll when it is installed. """
+
+    print("    NumPy %s" % ("available" if DataInterface.numpy else "not installed"))
+    for engine in (DataInterface.DataInterface, ColumnarInterface.ColumnarInterface):
+        db, names = newGradebook(engine, numStudents, numDates)
+        label = engine.__name__
+        timeit("%s: stuAbsence x %d" % (label, numStudents),
+               absenceOneByOne, db, names)
+        timeit("%s: stuAbsenceAll" % label, db.stuAbsenceAll)
+
+
+def gradeOneByOne(db, names):
+    """ Grades the class one student at a time with stuGrade, then reads
+    back the grades, as export used to. """
+
+    for name in names:
+        db.stuGrade(name)
+    db.stuMassCall("Grade")
+
+
+def benchGrade(numStudents=1000, numHomework=20, numGroups=50):
+    """ Times grading a class of numStudents students with numHomework
+    assignments and numGroups groups one student at a time and with
+    stuGradeAll, on every engine, then regrades it under a policy with
+    letter cutoffs. """
+
+    with tempfile.TemporaryDirectory() as folder:
+        for label, engine in engines(os.path.join(folder, "grade.db")):
+            db, names = newGradebook(engine, numStudents, 10)
+            for x in range(0, numHomework):
+                hw = "HW " + str(x)
+                db.stuAdd(hw, "10")
+                db.addAssignment(hw)
+            for x in range(0, numGroups):
+                db.addGroup("Group " + str(x))
+            for x in range(0, numStudents):
+                db.groStuAdd("Group " + str(x % numGroups), names[x])
+            for x in range(0, numGroups):
+                db.groAdd("Group " + str(x), "Week 1", "20")
+            timeit("%s: stuGrade x %d" % (label, numStudents),
+                   gradeOneByOne, db, names)
+            timeit("%s: stuGradeAll" % label, db.stuGradeAll)
+            db.setPolicy({"caps": {"HW 0": 5}, "cutoffs": [[300, "A"], [250, "B"]]})
+            timeit("%s: stuGradeAll, letter grades" % label, db.stuGradeAll)
+            db.close()
+
+
+def editAndTally(db, names, dates):
+    """ Marks one student absent on each date in turn and tallies their
+    absences and grade after every change, as the attendance table does. """
+
+    for date in dates:
+        for name in names:
+            db.stuMod(name, date, "N", True)
+            db.stuAbsence(name)
+            db.stuGrade(name)
+
+
+def benchTotals(numStudents=2000, numDates=100, numEdits=200):
+    """ Times numEdits attendance edits, each followed by stuAbsence and
+    stuGrade for the edited student, which read the running totals,
+    and the check of the totals against a full recompute. """
+
+    with tempfile.TemporaryDirectory() as folder:
+        for label, engine in engines(os.path.join(folder, "totals.db")):
+            db, names = newGradebook(engine, numStudents, numDates)
+            timeit("%s: build totals" % label, db.stuTotals, names[0])
+            timeit("%s: %d edits + tallies" % (label, numEdits),
+                   editAndTally, db, names[:numEdits // 2], db.findDates()[:2])
+            wrong = timeit("%s: checkTotals" % label, db.checkTotals)
+            print("    %d inconsistent totals" % len(wrong))
+            db.close()
+
+
+def massModify(db, dates, repeat):
+    """ Sets every active student's value on each of the given dates with
+    stuMassAssignDateMod, repeat times. """
+
+    for x in range(0, repeat):
+        for date in dates:
+            db.stuMassAssignDateMod(date, ["N"] * len(db.activeNames()))
+
+
+def benchMassModify(numStudents=2000, numDates=10):
+    """ Times whole-column edits through the cached alphabetical roster
+    on every engine. """
+
+    with tempfile.TemporaryDirectory() as folder:
+        for label, engine in engines(os.path.join(folder, "mass.db")):
+            db, names = newGradebook(engine, numStudents, numDates)
+            timeit("%s: 10 x %d column edits" % (label, numDates),
+                   massModify, db, db.findDates(), 10)
+            db.close()
+
+
+def addDates(db, numDates):
+    """ Adds numDates attendance dates, every student present. """
+
+    for x in range(0, numDates):
+        date = "Day " + str(x)
+        db.stuAdd(date, "Y")
+        db.addDate(date)
+
+
+def benchSparse(numStudents=1000, numDates=100):
+    """ Times adding numDates dates to a class of numStudents students
+    with sparse and with fully stored columns, then marks one student
+    absent per date and reports the saved file size and the peak memory
+    used while adding the dates. """
+
+    with tempfile.TemporaryDirectory() as folder:
+        for engine in (DataInterface.DataInterface, ColumnarInterface.ColumnarInterface):
+            for sparse in (True, False):
+                # the roster has no date columns yet, so sparseColumns only
+                # affects the dates added below
+                db, names = newGradebook(engine, numStudents)
+                db.sparseColumns = sparse
+                label = "%s (sparse=%s)" % (engine.__name__, sparse)
+                timeit("%s: add %d dates" % (label, numDates), addDates, db, numDates)
+                for x in range(0, numDates):
+                    db.stuMod(names[x % numStudents], "Day " + str(x), "N", True)
+                filename = os.path.join(folder, "sparse%s%s.xml" % (engine.__name__, sparse))
+                db.save(filename)
+                print("    file %.1f KB" % (os.path.getsize(filename) / 1e3))
+
+                db, names = newGradebook(engine, numStudents)
+                db.sparseColumns = sparse
+                print("    peak memory %.1f MB" % peakMemory(addDates, db, numDates))
+
+
+def benchRecords(numStudents=1000, numColumns=300):
+    """ Reports the memory each student takes, in bytes, once a semester
+    of numStudents students and numColumns date columns, one cell in
+    five of which is not the default, is loaded by each engine. """
+
+    with tempfile.TemporaryDirectory() as folder:
+        filename = os.path.join(folder, "database.xml")
+        db, names = newGradebook(numStudents=numStudents)
+        addDates(db, numColumns)
+        for x in range(0, numStudents):
+            for y in range(x % 5, numColumns, 5):
+                db.stuMod(names[x], "Day " + str(y), "N", True)
+        db.save(filename)
+
+        for engine in (DataInterface.DataInterface, ColumnarInterface.ColumnarInterface,
+                       RecordInterface.RecordInterface):
+            db, used = residentMemory(loader(engine, False), filename)
+            print("%-48s %10d bytes per student" % ("%s: %d columns" % (engine.__name__, numColumns),
+                                                    used // numStudents))
+
+
+
+def columnsOneByOne(db, headers):
+    """ Reads each column with stuMassAssignDateCall, the way callers
+    did before stuMassColumnCall. """
+
+    for header in headers:
+        db.stuMassAssignDateCall(header)
+
+
+def benchColumns(numStudents=2000, numDates=100):
+    """ Times reading every date column at once, one column at a time
+    and typed, on every engine. """
+
+    with tempfile.TemporaryDirectory() as folder:
+        for label, engine in engines(os.path.join(folder, "columns.db")):
+            db, names = newGradebook(engine, numStudents, numDates)
+            dates = db.findDates()
+            timeit("%s: %d x stuMassAssignDateCall" % (label, numDates),
+                   columnsOneByOne, db, dates)
+            timeit("%s: stuMassColumnCall" % label, db.stuMassColumnCall, dates)
+            timeit("%s: stuMassColumnCall, typed" % label, db.stuMassColumnCall, dates, True)
+            db.close()
+
+
+def memberChecks(db, groups, names):
+    """ Asks whether every student is a member of every group. """
+
+    for gname in groups:
+        for name in names:
+            db.groHasStu(gname, name)
+
+
+def benchGroups(numStudents=2000, groupSize=4):
+    """ Times loading a gradebook with hundreds of project groups and
+    checking group membership. """
+
+    db, names = newGradebook(numStudents=numStudents)
+    groups = []
+    for x in range(0, numStudents // groupSize):
+        gname = "Team " + str(x)
+        db.addGroup(gname)
+        for name in names[x * groupSize:(x + 1) * groupSize]:
+            db.groStuAdd(gname, name)
+        groups.append(gname)
+
+    with tempfile.TemporaryDirectory() as folder:
+        filename = os.path.join(folder, "database.xml")
+        db.save(filename)
+        for engine in (DataInterface.DataInterface, ColumnarInterface.ColumnarInterface,
+                       RecordInterface.RecordInterface):
+            timeit("%s XML: load %d groups" % (engine.__name__, len(groups)),
+                   loader(engine, False), filename)
+    timeit("DataInterface: %d membership checks" % (len(groups) * 100),
+           memberChecks, db, groups, names[:100])
+
+
+def benchStartup(numStudents=2000):
+    """ Times how long example.py takes to show its window and to fill
+    its first tab, on the offscreen Qt platform, for gradebooks with more
+    and more groups and dates. Needs PyQt5 and openpyxl. """
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    for numGroups, numDates in ((10, 10), (500, 10), (10, 150), (500, 150)):
+        with tempfile.TemporaryDirectory() as folder:
+            generate.generate(os.path.join(folder, "database.xml"), numStudents,
+                              numDates, 10, numGroups)
+            result = subprocess.run([sys.executable, os.path.join(here, "example.py"),
+                                     "--time-startup"], cwd=folder, env=env,
+                                    stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                    universal_newlines=True)
+        if result.returncode != 0:
+            print("example.py could not be started: " + result.stderr.strip().splitlines()[-1])
+            return
+        for line in result.stdout.splitlines():
+            # lines are of the form "window shown after 0.030 s"
+            label, seconds = line.rsplit(" after ", 1)
+            print("%-48s %10.4f s" % ("%d groups, %d dates: %s" % (numGroups, numDates, label),
+                                      float(seconds.split()[0])))
+
+
+def suiteEngines(folder):
+    """ Returns (label, opener) pairs for every engine, where the opener
+    opens the gradebook in the given XML file. The SQLite engine imports
+    it into a new database in folder. """
+
+    def openSqlite(filename):
+        dbfile = os.path.join(folder, "suite.db")
+        if os.path.exists(dbfile):
+            os.remove(dbfile)
+        db = SqliteInterface.SqliteInterface(dbfile)
+        db.importXML(filename)
+        return db
+
+    return [("DataInterface", loader(DataInterface.DataInterface, False)),
+            ("ColumnarInterface", loader(ColumnarInterface.ColumnarInterface, False)),
+            ("RecordInterface", loader(RecordInterface.RecordInterface, False)),
+            ("SqliteInterface", openSqlite)]
+
+
+def suiteOperations(db, filename):
+    """ Returns the (name, function) pairs the suite times on an opened
+    gradebook, in the order they are run. Reads come before the edits
+    and every edit stores values the gradebook already has or adds new
+    columns, so each operation can be repeated. """
+
+    names = db.activeNames()
+    dates = db.findDates()
+    homework = db.findHW()
+    groups = db.findAllGroups()
+    date, hwName = dates[len(dates) // 2], homework[len(homework) // 2]
+    units = [db.stuCall(name, "Units") for name in names]
+    attendance = [db.stuCall(name, date, True) for name in names]
+    added = []
+
+    def findStudent():
+        for name in names:
+            db.findStudent(name)
+
+    def stuCallDefault():
+        for name in names:
+            db.stuCall(name, "Units")
+
+    def stuCallAssign():
+        for name in names:
+            db.stuCall(name, date, True)
+            db.stuCall(name, hwName, True)
+
+    def stuModDefault():
+        for name, value in zip(names, units):
+            db.stuMod(name, "Units", value)
+
+    def stuModAssign():
+        for name, value in zip(names, attendance):
+            db.stuMod(name, date, value, True)
+
+    def stuMassCall():
+        db.stuMassCall("Units")
+        db.stuMassCall("Email")
+
+    def stuAdd():
+        header = "Added " + str(len(added))
+        added.append(header)
+        db.stuAdd(header, "Y")
+
+    def stuAbsence():
+        for name in names:
+            db.stuAbsence(name)
+
+    def stuGrade():
+        for name in names:
+            db.stuGrade(name)
+
+    def groupRead():
+        for gname in groups:
+            db.groStuList(db.findGroup(gname))
+            db.groPoints(gname)
+            db.groMassDateCall(gname)
+
+    def groupMembership():
+        for gname in groups:
+            for name in names[:20]:
+                db.groHasStu(gname, name)
+
+    def groupMod():
+        for gname in groups:
+            db.groAdd(gname, "Suite week", "3")
+            db.groCommentMod(gname, "Suite week", "Suite comment")
+
+    return [("findStudent", findStudent),
+            ("stuCall default", stuCallDefault),
+            ("stuCall assign", stuCallAssign),
+            ("stuMassCall", stuMassCall),
+            ("group read", groupRead),
+            ("group membership", groupMembership),
+            ("stuMod default", stuModDefault),
+            ("stuMod assign", stuModAssign),
+            ("stuAdd", stuAdd),
+            ("stuAbsence", stuAbsence),
+            ("stuGrade", stuGrade),
+            ("stuGradeAll", db.stuGradeAll),
+            ("group mod", groupMod),
+            ("save", lambda: db.save(filename))]
+
+
+def best(func, *args, repeat=3):
+    """ Returns the fastest of repeat timings of func, in seconds. """
+
+    times = []
+    for x in range(0, repeat):
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def suite(students=2000, dates=30, assignments=10, groups=None, weeks=10,
+          seed=0, repeat=3):
+    """ Generates a gradebook with the given sizes and times loading it
+    and each operation of suiteOperations on every engine. Returns the
+    results as a dictionary which can be written as JSON: the sizes and
+    environment, and for every engine the best time of each operation in
+    seconds. """
+
+    with tempfile.TemporaryDirectory() as folder:
+        source = os.path.join(folder, "source.xml")
+        if groups is None:
+            groups = students // 4
+        names = generate.generate(source, students, dates, assignments,
+                                  groups, weeks, seed)
+        results = {"parameters": {"students": len(names), "dates": dates,
+                                  "assignments": assignments, "groups": groups,
+                                  "weeks": weeks, "seed": seed, "repeat": repeat},
+                   "python": platform.python_version(),
+                   "platform": platform.platform(),
+                   "engines": {}}
+
+        for label, opener in suiteEngines(folder):
+            timings = results["engines"][label] = {}
+            timings["load"] = best(opener, source, repeat=repeat)
+            db = opener(source)
+            filename = os.path.join(folder, label + ".xml")
+            for name, func in suiteOperations(db, filename):
+                timings[name] = best(func, repeat=repeat)
+            db.close()
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Times the database engines.")
+    parser.add_argument("--json", metavar="FILE",
+                        help="run the suite and write its results to FILE ('-' for stdout)")
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--dates", type=int, default=30)
+    parser.add_argument("--assignments", type=int, default=10)
+    parser.add_argument("--groups", type=int, default=None)
+    parser.add_argument("--weeks", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.json is None:
+        benchRoster()
+        # a wide semester, where per-cell lookups dominate
+        benchRoster(300, 300)
+        benchSave()
+        benchEngines()
+        benchLoad()
+        benchImport()
+        benchAbsence()
+        benchGrade()
+        benchTotals()
+        benchMassModify()
+        benchSparse()
+        benchRecords()
+        benchColumns()
+        benchGroups()
+        benchStartup()
+        return
+
+    results = suite(args.students, args.dates, args.assignments, args.groups,
+                    args.weeks, args.seed, args.repeat)
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if args.json == "-":
+        print(text)
+    else:
+        with open(args.json, "w") as out:
+            out.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
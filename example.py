@@ -1,8 +1,9 @@
 import sys
 import os.path
-import ast
+import time
 import loadworkbook
 import DataInterface
+import TableModels
 import xml.etree.ElementTree as ET
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
@@ -31,111 +32,15 @@ def getRoster(self):
     if fname != []:
         filename = (fname[0])
         students = loadworkbook.getStudentsFromWorkbook(filename)
-        # Add students to the table Widget
-        table = populateAttendance(students)
-        gradesTable = populateGrades(students)
-        # TableView needs a model
-        model = QStandardItemModel(len(students),3)
-        model.setHorizontalHeaderItem(0, QStandardItem("Name"))
-        model.setHorizontalHeaderItem(1, QStandardItem("Email"))
-        model.setHorizontalHeaderItem(2, QStandardItem("Units"))    
-        # Add students to tableView
-        model = populateTableView(model,students)    
-        # Display the attendanceTable and the tableView
-        table.show()
-        gradesTable.show()
-        ui.rosterView.setModel(model)
-        
-        db.save()
-
-
-def populateTableView(model,students):
-    """ This is a function for populating the roster;
-    populateTableView takes in a nested list of students with their info,
-    a model (standardItemModel), and adds data to the TableView; it then
-    returns the model.
-    This method also adds students to the database so it should only be
-    called when the database is empty """    
-    row = 0;
-    # Add students to tableView
-    for student in students:
-        name = student[0]+" "+student[1]
-        email = student[2]
-        units = str(student[3])
-        db.stuMod(name,"Email",email)
-        db.stuMod(name,"Units",units)
-        model.setItem(row,0,QStandardItem(name))
-        model.setItem(row,1,QStandardItem(email))
-        model.setItem(row,2,QStandardItem(units))
-        row += 1        
-    db.save()
-    return model
-
-
-def populateAttendance(students):
-    """ populateattendanceTable takes in a nested list of students with their info
-    and adds data to the (default) attendanceTable; it is called when a new
-    roster is uploaded """    
-    table = ui.attendanceTable
-    table.setColumnCount(2)
-    table.setHorizontalHeaderItem(0,QTableWidgetItem("Name"))
-    table.setHorizontalHeaderItem(1,QTableWidgetItem("Total Unexcused"))
-    table.setRowCount(len(students))
-    row=0;
-    for student in students:
-        name = student[0]+" "+student[1]
-        db.addStudent(name)
-        absences = db.stuCall(name,"Number_of_Absences")
-        table.setItem(row,0,QTableWidgetItem(name))
-        table.setItem(row,1,QTableWidgetItem(absences))
-        row += 1        
-    return table
-
-
-def populateGrades(students):
-    """ populateGrades takes in a nested list of students and adds their names
-    to the first column in the grades table; it is called when a new roster
-    is uploaded """    
-    table = ui.gradesTable
-    table.setColumnCount(1)
-    table.setHorizontalHeaderItem(0,QTableWidgetItem("Name"))
-    table.setRowCount(len(students))
-    row = 0;
-    for student in students:
-        name1 = QTableWidgetItem(student[0]+" "+student[1])
-        table.setItem(row,0,name1)
-        row += 1
-    return table
+        # Add students, their emails and units to the database in one pass
+        # and one save; the tables add their rows as they are told
+        db.addStudents(students)
 
 
 #############################################################################
 #                  Attendance Changes and Adding Dates                      #
 #############################################################################
 #--------------------------------------DONE----------------------------------
-def cellChangedAttendance(self):
-    """
-    cellChangedAttendance takes in no inputs and returns no outputs;
-    This function is called when a cell in the attendance table is changed;
-    it gets the student's name and adds the absence to the database using
-    stuAbsence(name)
-    """
-    col = ui.attendanceTable.currentColumn()
-    row = ui.attendanceTable.currentRow()    
-    #get student's name
-    if col!=0 & col!=1:#can't edit first two columns
-        name = ui.attendanceTable.item(row,0)
-        if name:
-            name = name.text()
-            date = ui.attendanceTable.horizontalHeaderItem(col)
-            if date:
-                date = date.text()
-                item = ui.attendanceTable.currentItem()
-                if item:
-                    item = item.text()
-                    db.stuMod(name,date,item,True)
-                    db.stuAbsence(name)
-                    db.save()
-
 def addTodaysDate(self):
     """
     addTodaysDate is called when the user clicks the Add Date button on the
@@ -148,44 +53,36 @@ def addTodaysDate(self):
     today, ok = inputDialog.getText(ui.add_assignment,"Add Date",
                                    "Enter Date:")
     if ok:
-        colnum = ui.attendanceTable.columnCount()
-        ui.attendanceTable.insertColumn(colnum)
-        ui.attendanceTable.setHorizontalHeaderItem(colnum,QTableWidgetItem(today))
+        #stuAdd would reset everyone's attendance on a date already added
+        if db.stuQuery(today):
+            mssgbx = QMessageBox()
+            mssgbx.setText("This date has already been added.")
+            mssgbx.exec_()
+            return
         db.stuAdd(today,"Y")
         db.addDate(today)        
         db.save()
-        
-        rows = ui.attendanceTable.rowCount()
-        for i in range(0,rows):
-            ui.attendanceTable.setItem(i,colnum,QTableWidgetItem("Y"))
+
+def pasteIntoTable(view):
+    """
+    pasteIntoTable is called when Ctrl+V is pressed on the attendance or
+    grades table. It writes the copied block of cells (rows on separate
+    lines and cells separated by tabs, as spreadsheets copy them) starting
+    at the current cell. The whole block is one batch, so the database is
+    saved and the absences are counted once rather than once per cell.
+    """
+    index = view.currentIndex()
+    model = view.model()
+    if model is None or not index.isValid():
+        return
+    text = QApplication.clipboard().text()
+    rows = [line.split("\t") for line in text.splitlines()]
+    model.setValues(index.row(),index.column(),rows)
 
 #############################################################################
 #                  Grades Changes and Adding Assignments                    #
 #############################################################################
 #--------------------------------------DONE----------------------------------
-def cellChangedGrades(self):
-    """
-    cellChangedAttendance takes in no inputs and returns no outputs;
-    This function is called when a cell in the grades table is changed;
-    it gets the student's name, the name of the homework assingment
-    and the value of the changed cell and adds it to the database
-    """
-    col = ui.gradesTable.currentColumn()
-    row = ui.gradesTable.currentRow()  
-    if col!=0:
-        name = ui.gradesTable.item(row,0) #student name
-        if name:
-            name = name.text()
-            header = ui.gradesTable.horizontalHeaderItem(col)#homework name
-            if header:
-                header = header.text()
-                item = ui.gradesTable.currentItem()#value of changed cell
-                if item:
-                    item = item.text()
-                    db.stuMod(name,header,item,True)
-                    db.save()
-                    
-
 def showDialog(self):
     """
     input: none; output: none
@@ -198,10 +95,12 @@ def showDialog(self):
     text, ok = inputDialog.getText(ui.add_assignment,"Add Assignment",
                                    "Enter Assignment Name:")
     if ok:
-        cols = ui.gradesTable.columnCount()
-        ui.gradesTable.insertColumn(cols)        
-        ui.gradesTable.setHorizontalHeaderItem(cols,QTableWidgetItem(text))
-        
+        #stuAdd would reset everyone's grade on an assignment already added
+        if db.stuQuery(text):
+            mssgbx = QMessageBox()
+            mssgbx.setText("This assignment has already been added.")
+            mssgbx.exec_()
+            return
         db.stuAdd(text, "0") #add assignment as tag in each student
         db.addAssignment(text) #add to list of assignments
         db.save()
@@ -214,17 +113,40 @@ def projComboBoxFill(dialog):
     """
     input: dialog containing the combo box
     output: the filled comboBox
-    projComboBoxFill adds all of the students in the class to the comboBox.
-    This function should be called to fill the comboBox in the Add New Project
-    dialog. 
+    projComboBoxFill makes a comboBox for choosing a student in the class.
+    Every such comboBox shows the one sorted list of names in ui.rosterNames,
+    which is made the first time it is needed and follows the roster from
+    then on, so no names are copied. Typing in the comboBox offers the names
+    starting with what was typed, found by a binary search of the list.
     """
+    if ui.rosterNames is None:
+        ui.rosterNames = TableModels.RosterNameModel(db,parent=window)
     combo = QComboBox(dialog)
-    names = db.stuMassCall("Name")
-    for name in names:
-        combo.addItem(name)
+    combo.setModel(ui.rosterNames)
+    #sizes the box and its list without measuring every name
+    combo.view().setUniformItemSizes(True)
+    combo.setSizeAdjustPolicy(QComboBox.AdjustToMinimumContentsLength)
+    combo.setMinimumContentsLength(20)
+    combo.setEditable(True)
+    combo.setInsertPolicy(QComboBox.NoInsert)
+    completer = QCompleter(ui.rosterNames,combo)
+    completer.setCaseSensitivity(Qt.CaseInsensitive)
+    completer.setModelSorting(QCompleter.CaseInsensitivelySortedModel)
+    combo.setCompleter(completer)
     return combo
 
 
+def pickedStudent(combo):
+    """
+    Returns the student chosen in a comboBox made by projComboBoxFill, or
+    None if what was typed is not the name of an enrolled student.
+    """
+    name = combo.currentText()
+    if ui.rosterNames.find(name) is None:
+        return None
+    return name
+
+
 def onChanged(self):
     """
     onChanged is called when the value of the SpinBox in the add new project
@@ -284,6 +206,10 @@ def addNewProject(self):
 
 
 def addProjectTables(projName):
+    #a project's page is only added once
+    page = ui.toolBox.findChild(QWidget,projName)
+    if page is not None:
+        return page.findChildren(QTableView)
     numPages = ui.toolBox.count() #the number of existing projects
     combo = ui.chooseProject
     #set up the page to display project data
@@ -303,36 +229,15 @@ def addProjectTables(projName):
     return [ui.students,ui.projectFeedback]
         
 
-def populateProjTable(model,names):
-    """
-    input: model for the student in project table view and a list of names
-    output: model;
-    populateProjTable is called once a new project is added. It creates a two-
-    column table that includes the names of the students in the project and the
-    number of units each student is registered for. 
-    """
-    model.setHorizontalHeaderItem(0,QStandardItem("Name"))
-    model.setHorizontalHeaderItem(1,QStandardItem("Units"))
-    row = 0
-    for name in names:
-        units = db.stuCall(name, "Units")
-        model.setItem(row,0,QStandardItem(name))
-        model.setItem(row,1,QStandardItem(units))
-        row += 1
-    return model    
-
-
 def accepted():
     """
     accepted handles the events that need to happen once we have the info
-    about the project and the students. It gets the Project's name and creates
-    a tableView for the students' information and a tableView for the feedback
-    on the project. It makes calls to populateProjTable and populateFeedTable.
-    It also adds the project group and students in it to the database.
+    about the project and the students. It gets the Project's name and adds
+    the project group and students in it to the database; the project's page
+    is added when the database reports the new group (see projectChanged).
     """
     form = ui.form
     rows = form.count()
-    fields = []#contains names of students
 
     projNameObj = form.itemAt(2)#returns QLayoutItem
     projName = projNameObj.widget()#should be lineEdit
@@ -342,29 +247,11 @@ def accepted():
     for i in range(6,rows):#starts at item 6 in row 4
         layoutObj = form.itemAt(i)
         objWidget = layoutObj.widget()
-        comboText = objWidget.currentText()
-        fields.append(comboText)
-        db.groStuAdd(projName,comboText)#add student to group
+        comboText = pickedStudent(objWidget)
+        if comboText is not None:
+            db.groStuAdd(projName,comboText)#add student to group
 
     db.save()
-    
-    tables = addProjectTables(projName)
-    students = tables[0]
-    projectFeedback = tables[1]
-    
-    #create model for student & units:
-    model = QStandardItemModel(len(fields),2)
-    model = populateProjTable(model,fields)
-    students.show()
-    students.setModel(model)
-    
-    #create model for project feedback & dates
-    feedmodel = QStandardItemModel(0,3)
-    feedmodel.setHorizontalHeaderItem(0,QStandardItem("Date"))
-    feedmodel.setHorizontalHeaderItem(1,QStandardItem("Points"))
-    feedmodel.setHorizontalHeaderItem(2,QStandardItem("Feedback"))
-    projectFeedback.show()
-    projectFeedback.setModel(feedmodel)
 
 #############################################################################
 #                                Feedback Box                               #
@@ -377,23 +264,13 @@ def submitFeedback(self):
     points = ui.weeklyPoints.currentText()#get weekely points from ComboBox
     text = ui.feedBackText.toPlainText()#get text from TextEdit
 
-    project = ui.page.findChild(QTableView,"projFeedback_"+proj)
-    #should return a tableView
-    feedModel = project.model()
-    toAdd = [QStandardItem(ddate),QStandardItem(points),QStandardItem(text)]
-    
-    if feedModel == None:
-        feedModel = QStandardItemModel()
-        feedModel.setHorizontalHeaderItem(0,QStandardItem("Date"))
-        feedModel.setHorizontalHeaderItem(1,QStandardItem("Points"))
-        feedModel.setHorizontalHeaderItem(2,QStandardItem("Feedback"))
-    feedModel.appendRow(toAdd)
-    project.setModel(feedModel)
-    project.show()
-    
-    db.groAdd(proj,ddate,points)#add weekly points and date of feedback
+    if db.findGroup(proj) is None:
+        return
+    #adds the weekly points, date and feedback to the DB; the project's
+    #table shows them when it is told of the change
+    db.groAdd(proj,ddate,points)
     db.groCommentMod(proj,ddate,text)
-    db.save()  
+    db.save()
 
     ui.chooseProject.setCurrentIndex(0)    
     year = date.today().year
@@ -405,133 +282,83 @@ def submitFeedback(self):
 #      Roster, Attedance, Grades, Project Feedback for non-empty DB         #
 #############################################################################
 #--------------------------------------DONE----------------------------------
-def populateRosterFromDB():
+def populateRosterFromDB(names=None):
     """
-    input: model for the roster tableView and the list of student names.
-    populateRosterFromDB gets the values of the students' emails and units
-    and adds them to the model for each student.
+    populateRosterFromDB shows every enrolled, unflagged student in the
+    roster tableView in alphabetical order, or the given list of their
+    names, and returns the list of names. The cells are read from the
+    database as they are displayed.
     """
-    names = db.stuMassCall("Name")
-    emails = db.stuMassCall("Email")
-    units = db.stuMassCall("Units")
-
-    model = QStandardItemModel(len(names),3)
-    model.setHorizontalHeaderItem(0, QStandardItem("Name"))
-    model.setHorizontalHeaderItem(1, QStandardItem("Email"))
-    model.setHorizontalHeaderItem(2, QStandardItem("Units"))
-    
-    for row in range(0,len(names)):
-        model.setItem(row,0,QStandardItem(names[row]))
-        model.setItem(row,1,QStandardItem(emails[row]))
-        model.setItem(row,2,QStandardItem(units[row]))
-
-    ui.rosterView.setModel(model)
-        
+    if names is None:
+        names = db.activeNames()
+    detach(ui.rosterModel)
+    ui.rosterModel = TableModels.RosterModel(db,names,parent=ui.rosterView)
+    ui.rosterView.setModel(ui.rosterModel)
     return names
     
 
-def populateAttendanceFromDB(names):
-    """
-    input: list of student names.
-    populateAttendanceFromDB finds all the dates for the attendance to display
-    them in the attendance table. It also displays the total unexcused absences
-    for each student.
-    """
-    dates = db.findDates()    
-    table = ui.attendanceTable
-    table.setColumnCount(len(dates)+2)
-    table.setRowCount(len(names))
-    table.setHorizontalHeaderItem(0,QTableWidgetItem("Name"))
-    table.setHorizontalHeaderItem(1,QTableWidgetItem("Total Unexcused"))
-    col = table.columnCount()-1
-    rows = len(names)
-
-    if len(dates) != 0:
-        for date in dates:
-            table.setHorizontalHeaderItem(col,QTableWidgetItem(date))
-            for i in range(0,rows):
-                table.setItem(i,0,QTableWidgetItem(names[i]))
-                absences = db.stuCall(names[i],"Number_of_Absences")
-                table.setItem(i,1,QTableWidgetItem(absences))
-                #look up student's attendance on that date
-                att = db.stuCall(names[i],date,True)
-                table.setItem(i,col,QTableWidgetItem(att))
-            col = col-1
-
-    else:
-         for i in range(0,rows):
-            table.setItem(i,0,QTableWidgetItem(names[i]))
-            absences = db.stuCall(names[i],"Number_of_Absences")
-            table.setItem(i,1,QTableWidgetItem(absences))
-
-
-def populateGradesFromDB(names):
-    """
-    input: list of student names
-    populateGradesFromDB takes in a nested list of students and adds their
-    names to the first column in the grades table. It also adds their
-    grade for each assingment.
-    """    
-    table = ui.gradesTable
-    assignments = db.findHW()
-    table.setColumnCount(len(assignments)+1)
-    table.setHorizontalHeaderItem(0,QTableWidgetItem("Name"))
-    table.setRowCount(len(names))
-    row = 0
-    for student in names:
-        name = names[row]
-        table.setItem(row,0,QTableWidgetItem(name))
-        col = 1
-        for hw in assignments:
-            table.setHorizontalHeaderItem(col,QTableWidgetItem(hw))
-            grade = db.stuCall(name,hw,True) #get student's grade
-            table.setItem(row,col,QTableWidgetItem(grade))
-            col += 1
-        row += 1
-
-
-def populateFeedTableFromDB(group):
-    """
-    input: model for the project feedback table view and a list of names
-    output: model;
-    populateProjTable is called once a new project is added. It creates a two-
-    column table that includes the names of the students in the project and the
-    number of units each student is registered for. 
+def populateAttendanceFromDB(names, dates=None):
+    """
+    input: list of student names and optionally the list of dates.
+    populateAttendanceFromDB shows the given students' total unexcused
+    absences and their attendance on every date in the attendance table.
+    """
+    detach(ui.attendanceModel)
+    ui.attendanceModel = TableModels.AttendanceModel(db,names,dates,
+                                                     parent=ui.attendanceTable)
+    ui.attendanceTable.setModel(ui.attendanceModel)
+
+
+def populateGradesFromDB(names, assignments=None):
+    """
+    input: list of student names and optionally the list of assignments
+    populateGradesFromDB shows the given students' grade for each
+    assignment in the grades table.
     """    
-    dates = db.groMassDateCall(group)
-    
-    model = QStandardItemModel(len(dates),3)
-    model.setHorizontalHeaderItem(0,QStandardItem("Date"))
-    model.setHorizontalHeaderItem(1,QStandardItem("Points"))
-    model.setHorizontalHeaderItem(2,QStandardItem("Comment"))
-        
-    row = 0
-    for i in range(0,len(dates)):
-        model.setItem(row,0,QStandardItem(dates[i]))
-        model.setItem(row,1,QStandardItem(db.groCall(group,dates[i])))#points
-        model.setItem(row,2,QStandardItem(db.groCommentCall(group,dates[i])))
-        row += 1
-        
-    return model
+    detach(ui.gradesModel)
+    ui.gradesModel = TableModels.GradesModel(db,names,assignments,
+                                             parent=ui.gradesTable)
+    ui.gradesTable.setModel(ui.gradesModel)
+
+
+def detach(model):
+    """Stops a model which is being replaced from following the database"""
+    if model is not None:
+        model.detach()
+
 
 def populateGroups(groups):
+    """
+    populateGroups adds an empty page for each of the given projects; each
+    page's tables are filled the first time it is shown (see showProjectPage).
+    """
     for group in groups:
-        tables = addProjectTables(group)
-        students = tables[0]
-        projectFeedback = tables[1]
-        
-        studentsInGroup = db.findGroup(group).find("Students").attrib["info"]
-        studentsInGroup = ast.literal_eval(studentsInGroup)#this converts
-                        #the string representation of the list into an
-                        #actual list
-        studentModel = QStandardItemModel(len(studentsInGroup),2)
-        studentModel = populateProjTable(studentModel,studentsInGroup)
-        students.setModel(studentModel)
-        students.show()
-        
-        feedModel = populateFeedTableFromDB(group)
-        projectFeedback.setModel(feedModel)
-        projectFeedback.show()
+        addProjectTables(group)
+
+
+def fetchProject(group):
+    """
+    Returns the members of the given project and the dates of its feedback.
+    Runs on a worker thread when called through fetch.
+    """
+    return db.groStuList(db.findGroup(group)), db.groMassDateCall(group)
+
+
+def fillProjectPage(group, fetched):
+    """
+    Fills the tables on the given project's page with the members and
+    feedback dates returned by fetchProject.
+    """
+    members, dates = fetched
+    students = ui.toolBox.findChild(QTableView,"students_"+group)
+    projectFeedback = ui.toolBox.findChild(QTableView,"projFeedback_"+group)
+    if students is None or students.model() is not None:
+        return
+    students.setModel(TableModels.MemberModel(db,group,members,parent=students))
+    students.show()
+    projectFeedback.setModel(TableModels.FeedbackModel(db,group,dates,
+                                                       parent=projectFeedback))
+    projectFeedback.show()
 
         
 #############################################################################
@@ -541,11 +368,9 @@ def populateGroups(groups):
 def export():
     """ export saves the student name and final grades into a excel file"""
     names = db.stuMassCall("Name")
-    #call the grade function for each student 
-    for name in names:
-        db.stuGrade(name)
-    #get the list of grade from database
-    finalgrades = db.stuMassCall("Grade")
+    #grade the whole class at once
+    grades = db.stuGradeAll()
+    finalgrades = [grades[name] for name in names]
      
     #make an excel workbook
 
@@ -617,17 +442,11 @@ def addStudentToRoster():
             if res == QMessageBox.Save:
                 db.stuMod(name,"In_Class","Yes")
                 db.save()
-                updateRosterView(name)
-                updateAttedanceTable(name)
-                updateGradesTable(name)
 
         elif stuAdd == 1:    #stuAdd is 1    
             db.stuMod(name,"Email", email)
             db.stuMod(name,"Units", units)
             db.save()
-            updateRosterView(name)
-            updateAttedanceTable(name)
-            updateGradesTable(name)
 
         else:
             mssgbx = QMessageBox()
@@ -636,47 +455,6 @@ def addStudentToRoster():
             
         
 
-def removeStudentFromTables(name):
-    #something's not working about this
-    rows = ui.attendanceTable.rowCount()
-    attendance = ui.attendanceTable
-    grades = ui.gradesTable
-    rosterView = ui.rosterView
-    row=0
-    while attendance.item(row,0) != name and row < rows:
-        row += 1
-    attendance.removeRow(row)
-    grades.removeRow(row)
-    rosterView.hideRow(row)
-
-def updateRosterView(name):
-    email = db.stuCall(name,"Email")
-    email = QStandardItem(email)
-    units = db.stuCall(name,"Units")
-    units = QStandardItem(units)
-    name = QStandardItem(name)
-    ui.rosterView.model().appendRow([name,email,units])        
-
-def updateAttedanceTable(name):
-    email = db.stuCall(name,"Email")
-    units = db.stuCall(name,"Units")
-    table = ui.attendanceTable
-    row = table.rowCount()
-    table.insertRow(row)
-    table.setItem(row,0,QTableWidgetItem(name))
-    absences = db.stuCall(name,"Number_of_Absences")
-    table.setItem(row,1,QTableWidgetItem(absences))
-
-def updateGradesTable(name):
-    email = db.stuCall(name,"Email")
-    units = db.stuCall(name,"Units")
-    table = ui.gradesTable
-    row = table.rowCount()
-    table.insertRow(row)
-    table.setItem(row,0,QTableWidgetItem(name))
-
-
-        
 def dropStudentFromRoster():
     """Drops a student from roster"""
     dialog = QDialog()
@@ -696,25 +474,156 @@ def dropStudentFromRoster():
     result = dialog.exec_()
 
     if result:
-        name = combo.currentText()
+        name = pickedStudent(combo)
+        if name is None:
+            return
         db.dropStudent(name)
         db.save()
-        removeStudentFromTables(name)
 
 #############################################################################
 #                                    REFRESH                                #
 #############################################################################
 
 def refresh():
-    names = populateRosterFromDB()
-    populateAttendanceFromDB(names)
-    populateGradesFromDB(names)
-        
+    """
+    refresh empties the roster, attendance and grades tables and fills the
+    one that is showing again from the database; the others are filled
+    when they are next shown. The tables follow every change made to the
+    database, so this is only needed if they have got out of step with it.
+    """
+    for model in (ui.rosterModel,ui.attendanceModel,ui.gradesModel):
+        detach(model)
+    ui.rosterModel = ui.attendanceModel = ui.gradesModel = None
+    for page in (ui.Roster,ui.Attendance,ui.Grades):
+        ui.shownTabs.discard(page)
+    showTab(ui.tabWidget.currentIndex())
+
+#############################################################################
+#                      Lazy Tabs and Background Loading                     #
+#############################################################################
+
+class Fetch(QThread):
+    """
+    Runs func(*args) on a worker thread, holding the database lock once the
+    database is open, and passes its result to done on the UI thread.
+    """
+    fetched = pyqtSignal(object)
+
+    def __init__(self, func, done, *args):
+        QThread.__init__(self)
+        self.func = func
+        self.args = args
+        self.fetched.connect(done)
+        self.finished.connect(lambda: running.remove(self))
+
+    def run(self):
+        if db is None:
+            self.fetched.emit(self.func(*self.args))
+        else:
+            with db.lock:
+                result = self.func(*self.args)
+            self.fetched.emit(result)
+
+#the fetches which have not finished, kept so they are not deleted early
+running = []
+
+def fetch(func, done, *args):
+    """Calls func(*args) off the UI thread and passes the result to done"""
+    thread = Fetch(func, done, *args)
+    running.append(thread)
+    thread.start()
+
+
+def openDatabase(filename):
+    """Opens database.xml, or a new database if there is none"""
+    if os.path.isfile(filename):
+        # loads database.xml.snap instead of the XML while it matches it
+        return DataInterface.DataInterface(filename, journal=True,
+                                           saveDelay=500)
+    return DataInterface.DataInterface(journal=True, saveDelay=500)
+
+
+def databaseOpened(database):
+    """
+    databaseOpened is called on the UI thread once openDatabase has
+    finished; it enables the window and fills the tab that is showing.
+    """
+    global db
+    db = database
+    # writes any unsaved changes and folds the change journal into
+    # database.xml on exit
+    app.aboutToQuit.connect(db.close)
+    # adds a page for each new project once the project pages are shown
+    db.subscribe(projectChanged)
+    ui.tabWidget.setEnabled(True)
+    ui.statusbar.clearMessage()
+    showTab(ui.tabWidget.currentIndex())
+
+
+def showTab(index):
+    """
+    showTab is called when a tab is shown. The first time each tab is
+    shown, its data is read from the database on a worker thread and its
+    tables are filled when the data arrives.
+    """
+    page = ui.tabWidget.widget(index)
+    if db is None or page in ui.shownTabs:
+        return
+    ui.shownTabs.add(page)
+
+    if page is ui.Roster:
+        fetch(db.activeNames, tabFilled(populateRosterFromDB))
+    elif page is ui.Attendance:
+        fetch(lambda: (db.activeNames(),db.findDates()),
+              tabFilled(lambda fetched: populateAttendanceFromDB(*fetched)))
+    elif page is ui.Grades:
+        fetch(lambda: (db.activeNames(),db.findHW()),
+              tabFilled(lambda fetched: populateGradesFromDB(*fetched)))
+    elif page is ui.Projects:
+        fetch(db.findAllGroups, tabFilled(populateGroups))
+
+
+def tabFilled(fill):
+    """
+    Returns a function which fills a tab with fill and then, when the
+    startup is being timed, reports how long it took and quits.
+    """
+    def done(fetched):
+        fill(fetched)
+        if timing:
+            print("first tab filled after %.3f s" % (time.perf_counter()-started))
+            app.quit()
+    return done
+
+
+def projectChanged(event, *details):
+    """
+    projectChanged is told of every change to the database (see
+    DataInterface.subscribe) and adds a page for a newly added project if
+    the Projects tab has already been filled.
+    """
+    if event == "groupChanged" and ui.Projects in ui.shownTabs:
+        addProjectTables(details[0])
+
+
+def showProjectPage(index):
+    """
+    showProjectPage is called when a project's page is opened in the
+    toolBox; the first time, the project's members and feedback are read
+    on a worker thread and its tables are filled when they arrive.
+    """
+    group = ui.toolBox.itemText(index)
+    students = ui.toolBox.findChild(QTableView,"students_"+group)
+    if db is None or students is None or students.model() is not None:
+        return
+    fetch(fetchProject, lambda fetched: fillProjectPage(group,fetched), group)
+
 #############################################################################
 #                                      MAIN                                 #
 #############################################################################
 #--------------------------------------TODO----------------------------------
 if __name__=="__main__":
+    started = time.perf_counter()
     app = QApplication(sys.argv)
     window = QMainWindow()
     ui = Ui_MainWindow()
@@ -727,33 +636,38 @@ if __name__=="__main__":
     ui.weeklyPoints.addItem("3")
 
     filename = "database.xml"
-    
-    if os.path.isfile(filename):
-        db = DataInterface.DataInterface(filename)
-        
-        names = populateRosterFromDB()
-        populateAttendanceFromDB(names)
-        populateGradesFromDB(names)
-        
-        #Project stuff gets filled here:
-        groups = db.findAllGroups()#contains the project names
-        populateGroups(groups)
-            
-    else:
-        db = DataInterface.DataInterface()	
+    # with --time-startup, prints how long the window and the first tab
+    # took to appear and quits; use QT_QPA_PLATFORM=offscreen to run it
+    # without a display
+    timing = "--time-startup" in sys.argv
+
+    # the window is shown at once and the database is opened on a worker
+    # thread; each tab is filled the first time it is shown
+    db = None
+    ui.rosterModel = ui.attendanceModel = ui.gradesModel = None
+    ui.rosterNames = None
+    ui.shownTabs = set()
+    ui.tabWidget.setEnabled(False)
+    ui.statusbar.showMessage("Loading " + filename + "...")
+    ui.tabWidget.currentChanged.connect(showTab)
+    ui.toolBox.currentChanged.connect(showProjectPage)
+    fetch(openDatabase, databaseOpened, filename)
 
     ui.pushButton.clicked.connect(getRoster)
     ui.add_assignment.clicked.connect(showDialog)
     ui.addProjectBttn.clicked.connect(addNewProject)
     ui.addDateButton.clicked.connect(addTodaysDate)
-    ui.attendanceTable.cellChanged.connect(cellChangedAttendance)
-    ui.gradesTable.cellChanged.connect(cellChangedGrades)    
     ui.export_2.clicked.connect(export)
     ui.submitFeedback.clicked.connect(submitFeedback)
     ui.addStudentBttn.clicked.connect(addStudentToRoster)
     ui.dropStudentBttn.clicked.connect(dropStudentFromRoster)
     ui.refreshBttn.clicked.connect(refresh)
+    for view in (ui.attendanceTable,ui.gradesTable):
+        QShortcut(QKeySequence.Paste,view,lambda view=view: pasteIntoTable(view))
 
     window.show()
+    if timing:
+        app.processEvents()
+        print("window shown after %.3f s" % (time.perf_counter()-started))
     sys.exit(app.exec_())
 
@@ -0,0 +1,135 @@
+__author__ = 'Jake'
+
+# Writes synthetic gradebooks in the database.xml format so that the
+# database code can be measured against classes of any size.
+# Run with: python generate.py database.xml --students 2000 --dates 30
+#
+# The same arguments and seed always give the same file. Attendance is
+# mostly present, homework is mostly graded, a few students are dropped
+# or flagged, and students are put into project groups which have a
+# WeekGrade with points and a comment for every week.
+
+import argparse
+import random
+import xml.etree.cElementTree as ET
+from xml.etree.ElementTree import SubElement, ElementTree
+
+firstNames = ["Ana", "Ben", "Carlos", "Dana", "Eli", "Fatima", "Grace", "Hiro",
+              "Ines", "Jake", "Kim", "Luis", "Maya", "Nikhil", "Olivia", "Priya",
+              "Quinn", "Rosa", "Sam", "Tariq", "Uma", "Victor", "Wen", "Yara"]
+lastNames = ["Adams", "Brown", "Chen", "Dominguez", "Evans", "Garcia", "Huang",
+             "Ibrahim", "Johnson", "Kim", "Lopez", "Martin", "Nguyen", "O'Neil",
+             "Patel", "Rossi", "Smith", "Tanaka", "Walker", "Young"]
+comments = ["", "Good progress.", "Missed the milestone.", "Presented a demo.",
+            "Needs to split the work more evenly.", "Great teamwork this week."]
+
+
+def studentNames(numStudents, rand):
+    """ Returns numStudents distinct names of the form 'First Last', with
+    a number added once the combinations run out. """
+
+    names = []
+    seen = set()
+    while len(names) < numStudents:
+        name = rand.choice(firstNames) + " " + rand.choice(lastNames)
+        if name in seen:
+            name += " " + str(len(names))
+        if name not in seen:
+            seen.add(name)
+            names.append(name)
+    return names
+
+
+def generate(filename, students=500, dates=30, assignments=10, groups=None,
+             weeks=10, seed=0, year="2014", semester="Fall"):
+    """ Writes a gradebook to filename with the given numbers of students,
+    attendance dates, homework assignments, groups and weekly group
+    grades, and returns the list of student names. By default there is
+    one group for every four students. """
+
+    rand = random.Random(seed)
+    if groups is None:
+        groups = students // 4
+
+    root = ET.Element("Gradebook")
+    root.attrib["year"] = year
+    root.attrib["semester"] = semester
+    studentsElem = SubElement(root, "Students")
+    assignmentsElem = SubElement(root, "Assignments")
+    groupsElem = SubElement(root, "Groups")
+    datesElem = SubElement(root, "Dates")
+
+    dateNames = ["Date %d" % x for x in range(1, dates + 1)]
+    hwNames = ["Homework %d" % x for x in range(1, assignments + 1)]
+    for today in dateNames:
+        SubElement(datesElem, "Date").attrib["info"] = today
+    for hwName in hwNames:
+        SubElement(assignmentsElem, "Homework").attrib["info"] = hwName
+
+    names = studentNames(students, rand)
+    units = {}
+    for name in names:
+        # mostly present, with the odd absence and excused absence
+        attendance = [rand.choice("YYYYYYYYYYYYYYNE") for today in dateNames]
+        # mostly graded out of 20, with a few not handed in yet
+        homework = ["" if rand.random() < 0.05 else str(rand.randint(0, 20))
+                    for hwName in hwNames]
+        units[name] = str(rand.randint(1, 4))
+
+        student = SubElement(studentsElem, "Name")
+        student.attrib["info"] = name
+        email = name.lower().replace(" ", ".").replace("'", "") + "@example.edu"
+        SubElement(student, "Email").attrib["info"] = email
+        SubElement(student, "Units").attrib["info"] = units[name]
+        SubElement(student, "Number_of_Absences").attrib["info"] = \
+            str(len(attendance) - attendance.count("Y") - attendance.count("E"))
+        SubElement(student, "Number_of_Excused").attrib["info"] = str(attendance.count("E"))
+        SubElement(student, "In_Class").attrib["info"] = "No" if rand.random() < 0.03 else "Yes"
+        SubElement(student, "Flag").attrib["info"] = "Yes" if rand.random() < 0.02 else "No"
+        SubElement(student, "Grade").attrib["info"] = "Pass"
+
+        for header, value in zip(dateNames + hwNames, attendance + homework):
+            cat = SubElement(student, "AssignDate")
+            cat.attrib["info"] = value
+            cat.attrib["name"] = header
+
+    # deals the students out into the groups in a random order
+    order = list(names)
+    rand.shuffle(order)
+    for x in range(0, groups):
+        members = order[x::groups]
+        group = SubElement(groupsElem, "Group")
+        group.attrib["info"] = "Project %d" % (x + 1)
+        SubElement(group, "Units").attrib["info"] = \
+            str(sum(int(units[sname]) for sname in members))
+        studentsList = SubElement(group, "Students")
+        for sname in members:
+            SubElement(studentsList, "Member").attrib["info"] = sname
+        for week in range(1, weeks + 1):
+            grade = SubElement(group, "WeekGrade")
+            grade.attrib["info"] = str(rand.randint(0, 5))
+            grade.attrib["name"] = "Week %d" % week
+            grade.text = rand.choice(comments)
+
+    ElementTree(root).write(filename)
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Writes a synthetic gradebook.")
+    parser.add_argument("filename", nargs="?", default="database.xml")
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--dates", type=int, default=30)
+    parser.add_argument("--assignments", type=int, default=10)
+    parser.add_argument("--groups", type=int, default=None,
+                        help="number of groups (default: one per four students)")
+    parser.add_argument("--weeks", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    generate(args.filename, args.students, args.dates, args.assignments,
+             args.groups, args.weeks, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# Shared fixtures for the tests: the engines, each opened on a file in a
+# temporary folder, and a small gradebook in the old layout.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import ColumnarInterface
+import DataInterface
+import RecordInterface
+import SqliteInterface
+
+# a gradebook in which "Late Student" has no cells for D1, D2 or HW1, as
+# the old findHeaders bug left students who were added after a column
+LEGACY = """<Gradebook year="2014" semester="Fall"><Students>
+<Name info="Early Student"><Email info=""/><Units info="4"/><Number_of_Absences info="0"/><Number_of_Excused info="0"/><In_Class info="Yes"/><Flag info="No"/><Grade info="Pass"/>
+<AssignDate info="N" name="D1"/><AssignDate info="Y" name="D2"/><AssignDate info="5" name="HW1"/><AssignDate info="E" name="D3"/></Name>
+<Name info="Late Student"><Email info=""/><Units info="4"/><Number_of_Absences info="0"/><Number_of_Excused info="0"/><In_Class info="Yes"/><Flag info="No"/><Grade info="Pass"/>
+<AssignDate info="N" name="D3"/></Name>
+</Students><Assignments><Homework info="HW1"/></Assignments><Groups/><Dates><Date info="D1"/><Date info="D2"/><Date info="D3"/></Dates></Gradebook>"""
+
+# the engines which keep the gradebook in an XML file
+xmlEngines = [DataInterface.DataInterface, ColumnarInterface.ColumnarInterface,
+              RecordInterface.RecordInterface]
+
+
+class TempFolder:
+    """ A temporary folder for a test's files, removed by cleanup. """
+
+    def __init__(self):
+        self.path = tempfile.mkdtemp()
+
+    def file(self, name, text=None):
+        """ Returns the path of the named file in the folder, first
+        writing text to it if it is given. """
+
+        path = os.path.join(self.path, name)
+        if text is not None:
+            with open(path, "w") as f:
+                f.write(text)
+        return path
+
+    def cleanup(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class EngineTestCase(unittest.TestCase):
+    """ A test with a temporary folder, self.folder, for its files. The
+    databases opened by engines and openEngines are closed in tearDown,
+    before the folder is removed. """
+
+    def setUp(self):
+        self.folder = TempFolder()
+        self.databases = []
+
+    def tearDown(self):
+        for db in self.databases:
+            db.close()
+        self.folder.cleanup()
+
+    def opened(self, db):
+        """ Returns db, closing it in tearDown. """
+
+        self.databases.append(db)
+        return db
+
+    def engines(self):
+        """ Yields (label, database) for every engine opened on an empty
+        gradebook. """
+
+        for engine in xmlEngines:
+            yield engine.__name__, self.opened(engine())
+        yield "SqliteInterface", self.opened(SqliteInterface.SqliteInterface(
+            self.folder.file("database%d.db" % len(self.databases))))
+
+    def openEngines(self, text):
+        """ Yields (label, database) for every engine opened on a
+        gradebook with the given XML text: each XML engine reading the
+        XML, each reading a snapshot of it, and SQLite importing it. """
+
+        for engine in xmlEngines:
+            for snapshot in (False, True):
+                label = engine.__name__ + (" snapshot" if snapshot else "")
+                path = self.folder.file("%s%d.xml" % (engine.__name__, snapshot), text)
+                if snapshot:
+                    # saving writes the snapshot next to the XML
+                    engine(path).save(path)
+                yield label, self.opened(engine(path))
+
+        source = self.folder.file("source.xml", text)
+        db = self.opened(SqliteInterface.SqliteInterface(
+            self.folder.file("database%d.db" % len(self.databases))))
+        db.importXML(source)
+        yield "SqliteInterface", db
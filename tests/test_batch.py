@@ -0,0 +1,62 @@
+from tests.helpers import EngineTestCase, LEGACY
+
+
+class BatchTests(EngineTestCase):
+    """ A batch keeps its changes when it ends normally and undoes all of
+    them when it is rolled back, in every engine. """
+
+    def state(self, db):
+        names = sorted(db.activeNames())
+        return (list(db.headerList), names,
+                [[db.stuCall(name, header, True) for header in db.headerList]
+                 for name in names],
+                [db.stuCall(name, "Number_of_Absences") for name in names],
+                [db.stuTotals(name) for name in names])
+
+    def test_rollback_undoes_cell_edits(self):
+        for label, db in self.openEngines(LEGACY):
+            with self.subTest(engine=label):
+                db.stuTotals("Early Student")
+                before = self.state(db)
+                events = []
+                db.subscribe(lambda *event: events.append(event))
+                with self.assertRaises(KeyError):
+                    with db.batch():
+                        db.stuMod("Early Student", "HW1", "9", True)
+                        db.stuMassAssignDateMod("D3", ["Y", "Y"])
+                        db.stuAbsence("Early Student")
+                        raise KeyError("cancelled")
+                self.assertEqual(self.state(db), before)
+                self.assertEqual(db.checkTotals(), [])
+                self.assertEqual(events, [])
+
+    def test_rollback_undoes_structural_changes(self):
+        for label, db in self.openEngines(LEGACY):
+            with self.subTest(engine=label):
+                before = self.state(db)
+                db.begin()
+                db.addStudent("New Student")
+                db.stuAdd("D4", "N")
+                db.addDate("D4")
+                db.begin()
+                db.stuCatMod("D1", "D1b")
+                db.commit()
+                db.rollback()
+                self.assertEqual(db.batchDepth, 0)
+                self.assertEqual(self.state(db), before)
+                self.assertEqual(db.checkTotals(), [])
+
+    def test_commit_keeps_changes_and_tallies_once(self):
+        for label, db in self.openEngines(LEGACY):
+            with self.subTest(engine=label):
+                events = []
+                db.subscribe(lambda *event: events.append(event))
+                with db.batch():
+                    db.stuMod("Late Student", "D1", "N", True)
+                    db.stuAbsence("Late Student")
+                    db.stuMod("Late Student", "D2", "N", True)
+                    db.stuAbsence("Late Student")
+                self.assertEqual(db.stuCall("Late Student", "Number_of_Absences"), "3")
+                self.assertEqual(db.stuTotals("Late Student"), (0.0, 3, 0))
+                self.assertEqual(events.count(("cellChanged", "Late Student",
+                                               "Number_of_Absences")), 1)
@@ -0,0 +1,38 @@
+from array import array
+
+from tests.helpers import EngineTestCase, LEGACY
+from DataInterface import ABSENT, EXCUSED, PRESENT
+
+
+class ColumnCallTests(EngineTestCase):
+    """ stuMassColumnCall reads whole columns in activeNames order, as
+    strings or as typed arrays. """
+
+    headers = ["HW1", "D1", "D3", "Missing"]
+
+    def prepare(self, db):
+        # a flagged student is left out of every column
+        db.addStudent("Flagged Student")
+        db.stuMod("Flagged Student", "Flag", "Yes")
+        db.stuMod("Early Student", "D2", "x", True)
+
+    def test_columns_in_activeNames_order(self):
+        for label, db in self.openEngines(LEGACY):
+            with self.subTest(engine=label):
+                self.prepare(db)
+                self.assertEqual(db.activeNames(), ("Early Student", "Late Student"))
+                self.assertEqual(db.stuMassColumnCall(self.headers),
+                                 [["5", None], ["N", None], ["E", "N"], []])
+
+    def test_typed_columns(self):
+        for label, db in self.openEngines(LEGACY):
+            with self.subTest(engine=label):
+                self.prepare(db)
+                db.stuMod("Late Student", "HW1", "not a number", True)
+                homework, d1, d3, missing = db.stuMassColumnCall(self.headers, typed=True)
+                self.assertEqual(homework, array("d", [5.0, 0.0]))
+                self.assertEqual(d1, array("B", [ABSENT, PRESENT]))
+                self.assertEqual(d3, array("B", [EXCUSED, ABSENT]))
+                self.assertEqual(missing, [])
+                self.assertEqual(db.stuMassColumnCall(["D2"], typed=True),
+                                 [array("B", [ABSENT, PRESENT])])
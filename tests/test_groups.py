@@ -0,0 +1,68 @@
+from unittest import mock
+import xml.etree.cElementTree as ET
+
+from tests.helpers import EngineTestCase, LEGACY, xmlEngines
+
+# LEGACY with a group saved before members were Member Elements, as the
+# string form of a list which names one student twice
+LEGACYGROUP = LEGACY.replace("<Groups/>", """<Groups><Group info="Team"><Units info="8"/>\
+<Students info="['Early Student', 'Late Student', 'Early Student']"/></Group></Groups>""")
+
+
+class GroupMembershipTests(EngineTestCase):
+    """ Group membership is looked up by exact student name, and a
+    student can be in several groups. """
+
+    def test_names_are_matched_exactly(self):
+        for label, db in self.engines():
+            with self.subTest(engine=label):
+                for name in ("Ann", "Anna"):
+                    db.addStudent(name)
+                    db.stuMod(name, "Units", "4")
+                db.addGroup("G1")
+                db.addGroup("G2")
+                db.groStuAdd("G1", "Anna")
+                db.groStuAdd("G2", "Ann")
+                db.groStuAdd("G1", "Ann")
+
+                self.assertEqual(sorted(db.findGroupsStu("Ann")), ["G1", "G2"])
+                self.assertEqual(db.findGroupsStu("Anna"), ["G1"])
+                self.assertEqual(db.findGroupsStu("An"), [])
+                self.assertFalse(db.groHasStu("G2", "Anna"))
+
+                db.groStudRemove("G1", "Ann")
+                self.assertEqual(db.findGroupsStu("Ann"), ["G2"])
+                self.assertEqual(db.findGroupsStu("Anna"), ["G1"])
+                self.assertTrue(db.groHasStu("G1", "Anna"))
+
+
+class LegacyGroupTests(EngineTestCase):
+    """ A group saved as a list in its Students 'info' attribute is read
+    with the same members, and saved again as Member Elements. """
+
+    def test_legacy_group_is_read(self):
+        for label, db in self.openEngines(LEGACYGROUP):
+            with self.subTest(engine=label):
+                self.assertTrue(db.groHasStu("Team", "Early Student"))
+                self.assertTrue(db.groHasStu("Team", "Late Student"))
+                self.assertEqual(db.findGroupsStu("Late Student"), ["Team"])
+
+    def test_upgraded_group_reloads_with_the_same_members(self):
+        for engine in xmlEngines:
+            with self.subTest(engine=engine.__name__):
+                path = self.folder.file(engine.__name__ + ".xml", LEGACYGROUP)
+                engine(path).save(path)
+
+                students = ET.parse(path).getroot().find("Groups/Group/Students")
+                self.assertNotIn("info", students.attrib)
+                self.assertEqual([member.attrib["info"] for member in students],
+                                 ["Early Student", "Late Student"])
+
+                fromSnap = engine(path)
+                with mock.patch.object(engine, "snapshots", False):
+                    fromXML = engine(path)
+                for db in (fromSnap, fromXML):
+                    self.assertEqual(db.findGroupsStu("Early Student"), ["Team"])
+                    self.assertEqual(db.findGroupsStu("Late Student"), ["Team"])
+                    db.groStudRemove("Team", "Early Student")
+                    self.assertFalse(db.groHasStu("Team", "Early Student"))
@@ -0,0 +1,69 @@
+from tests.helpers import EngineTestCase, LEGACY, xmlEngines
+
+
+class JournalReplayTests(EngineTestCase):
+    """ The changes journaled since the last checkpoint are applied when
+    the database is opened again, whether from the XML or its snapshot. """
+
+    def setUp(self):
+        EngineTestCase.setUp(self)
+        self.path = self.folder.file("database.xml", LEGACY)
+
+    def edit(self, db):
+        db.stuMod("Early Student", "HW1", "8", True)
+        db.stuMod("Late Student", "D1", "N", True)
+        db.addStudent("New Student")
+        db.stuAdd("D4", "Y")
+        db.addDate("D4")
+        db.stuAbsence("Late Student")
+        db.save(self.path)
+
+    def check(self, db):
+        self.assertEqual(db.stuCall("Early Student", "HW1", True), "8")
+        self.assertEqual(db.stuCall("Late Student", "D1", True), "N")
+        self.assertEqual(db.stuCall("Late Student", "Number_of_Absences"), "2")
+        self.assertIn("New Student", db.activeNames())
+        self.assertEqual(db.stuCall("New Student", "D4", True), "Y")
+        self.assertEqual(db.checkTotals(), [])
+
+    def test_replay(self):
+        for engine in xmlEngines:
+            for snapshot in (False, True):
+                with self.subTest(engine=engine.__name__, snapshot=snapshot):
+                    self.folder.file("database.xml", LEGACY)
+                    db = engine(self.path, journal=True)
+                    if snapshot:
+                        db.checkpoint(self.path)
+                    self.edit(db)
+                    self.assertTrue(db.journalSize)
+                    self.check(engine(self.path, journal=True))
+
+    def test_cut_off_record_is_ignored(self):
+        for engine in xmlEngines:
+            with self.subTest(engine=engine.__name__):
+                self.folder.file("database.xml", LEGACY)
+                db = engine(self.path, journal=True)
+                db.checkpoint(self.path)
+                self.edit(db)
+                # a crash while the last record was being written
+                with open(self.path + ".journal", "a") as file:
+                    file.write('{"checkpoint": "1", "op": "stuMod", "ar')
+                self.check(engine(self.path, journal=True))
+
+    def test_checkpoint_empties_the_journal(self):
+        for engine in xmlEngines:
+            with self.subTest(engine=engine.__name__):
+                self.folder.file("database.xml", LEGACY)
+                db = engine(self.path, journal=True)
+                self.edit(db)
+                with open(self.path + ".journal") as file:
+                    records = file.read()
+                db.close()
+                self.check(engine(self.path))
+
+                # records of an older checkpoint are not applied again
+                with open(self.path + ".journal", "w") as file:
+                    file.write(records)
+                reopened = engine(self.path, journal=True)
+                self.assertEqual(reopened.activeNames().count("New Student"), 1)
+                self.check(reopened)
@@ -0,0 +1,48 @@
+from tests.helpers import EngineTestCase, LEGACY
+
+
+class EngineParityTests(EngineTestCase):
+    """ Every engine gives the same answers after the same changes. """
+
+    def state(self, db):
+        names = sorted(db.activeNames())
+        return {"headers": list(db.headerList),
+                "cells": [[db.stuCall(name, header, True) for header in db.headerList]
+                          for name in names],
+                "defaults": [[db.stuCall(name, header) for header, value in db.stuDefaults]
+                             for name in names],
+                "totals": [db.stuTotals(name) for name in names]}
+
+    def change(self, db):
+        db.addStudent("New Student")
+        db.stuMod("New Student", "Email", "new@example.com")
+        db.stuMod("New Student", "Units", "3")
+        db.stuMod("Early Student", "HW1", "8", True)
+        db.stuCatMod("D2", "D2b")
+        db.stuCatMod("D1", "D1b")
+        db.stuAdd("HW2", "2")
+        db.addAssignment("HW2")
+        db.stuMassAssignDateMod("D3", ["Y", "E", "N"])
+        db.stuAbsenceAll()
+
+    def test_engines_agree_after_changes(self):
+        states = {}
+        for label, db in self.openEngines(LEGACY):
+            self.change(db)
+            states[label] = self.state(db)
+        expected = states.pop("DataInterface")
+        self.assertEqual(expected["headers"], ["D1b", "D2b", "HW1", "D3", "HW2"])
+        self.assertEqual(expected["defaults"][2],
+                         ["new@example.com", "3", "1", "0", "Yes", "No", "Pass"])
+        for label, state in states.items():
+            with self.subTest(engine=label):
+                self.assertEqual(state, expected)
+
+    def test_renamed_headers_keep_their_order_when_reopened(self):
+        for label, db in self.openEngines(LEGACY):
+            with self.subTest(engine=label):
+                db.stuCatMod("D1", "D1b")
+                self.assertEqual(db.headerList, ["D1b", "D2", "HW1", "D3"])
+                db.save(db.saveFile)
+                self.assertEqual(type(db)(db.saveFile).headerList,
+                                 ["D1b", "D2", "HW1", "D3"])
@@ -0,0 +1,49 @@
+from tests.helpers import EngineTestCase, LEGACY, xmlEngines
+import GradingPolicy
+
+
+class SetPolicyTests(EngineTestCase):
+    """ Changing the grading policy regrades every student under it. """
+
+    def test_setPolicy_regrades(self):
+        for label, db in self.engines():
+            with self.subTest(engine=label):
+                db.addStudent("A A")
+                db.stuAdd("HW1", "10")
+                db.addAssignment("HW1")
+                db.setPolicy({"minHomework": 5, "minGroup": None})
+                self.assertEqual(db.stuCall("A A", "Grade"), "Pass")
+
+                # a cap lowers the points in the running totals too
+                db.setPolicy({"minHomework": 5, "minGroup": None,
+                              "caps": {"HW1": 4}})
+                self.assertEqual(db.stuTotals("A A")[0], 4.0)
+                self.assertEqual(db.stuCall("A A", "Grade"), "Fail")
+
+                events = []
+                db.subscribe(lambda *event: events.append(event))
+                db.setPolicy(None)
+                self.assertEqual(db.stuTotals("A A")[0], 10.0)
+                self.assertEqual(db.stuCall("A A", "Grade"), "Fail")
+                self.assertEqual(events, [("columnChanged", "Grade")])
+
+    def test_invalid_setPolicy_raises_ValueError(self):
+        for label, db in self.engines():
+            with self.subTest(engine=label):
+                for settings in ([1], {"weights": [1]}, {"caps": [["HW1", 5]]},
+                                 {"cutoffs": ["AB"]}, {"cutoffs": [[1, "A", 2]]},
+                                 {"maxAbsences": "many"}, {"grade": 1}):
+                    with self.assertRaises(ValueError):
+                        db.setPolicy(settings)
+                self.assertEqual(db.policy.settings, GradingPolicy.GradingPolicy().settings)
+
+    def test_invalid_sidecar_uses_the_default_policy(self):
+        path = self.folder.file("database.xml", LEGACY)
+        for text in ('{"caps": [["HW1", 5]]}', '{"weights": [1]}', '[1]', 'not json'):
+            with self.subTest(sidecar=text):
+                self.folder.file("database.xml.policy", text)
+                for engine in xmlEngines:
+                    db = engine(path)
+                    self.assertEqual(db.policy.settings,
+                                     GradingPolicy.GradingPolicy().settings)
+
@@ -0,0 +1,53 @@
+import os
+import time
+
+from tests.helpers import EngineTestCase, LEGACY
+import DataInterface
+
+
+class BackgroundSaveTests(EngineTestCase):
+    """ The background save thread survives a failed write and the save
+    counters count each request once. """
+
+    def waitFor(self, test):
+        deadline = time.time() + 5
+        while not test() and time.time() < deadline:
+            time.sleep(0.01)
+        return test()
+
+    def test_failed_write_is_retried(self):
+        db = DataInterface.DataInterface(self.folder.file("database.xml", LEGACY),
+                                         saveDelay=10)
+        # the folder does not exist yet, so the first writes fail
+        missing = os.path.join(self.folder.path, "later", "database.xml")
+        db.stuMod("Late Student", "D1", "N", True)
+        db.save(missing)
+        self.assertTrue(self.waitFor(lambda: db.saveStats["failed"]))
+        self.assertIsNotNone(db.saveError)
+        self.assertTrue(db.saveThread.is_alive())
+
+        os.mkdir(os.path.dirname(missing))
+        self.assertTrue(self.waitFor(lambda: os.path.isfile(missing)))
+        db.close()
+        self.assertIsNone(db.saveError)
+        self.assertEqual(DataInterface.DataInterface(missing)
+                         .stuCall("Late Student", "D1", True), "N")
+
+    def test_close_raises_a_lasting_failure(self):
+        db = DataInterface.DataInterface(self.folder.file("database.xml", LEGACY),
+                                         saveDelay=10)
+        db.save(os.path.join(self.folder.path, "never", "database.xml"))
+        self.assertTrue(self.waitFor(lambda: db.saveStats["failed"]))
+        with self.assertRaises(OSError):
+            db.close()
+
+    def test_save_in_a_batch_is_counted_once(self):
+        for journal in (False, True):
+            with self.subTest(journal=journal):
+                path = self.folder.file("database.xml", LEGACY)
+                db = DataInterface.DataInterface(path, journal=journal)
+                with db.batch():
+                    db.stuMod("Late Student", "D1", "N", True)
+                    db.save(path)
+                self.assertEqual(db.saveStats["requested"], 1)
+                self.assertEqual(db.saveStats["performed"], 1)
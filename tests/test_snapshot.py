@@ -0,0 +1,87 @@
+import os
+import struct
+from unittest import mock
+
+from tests.helpers import EngineTestCase, LEGACY, xmlEngines
+import Snapshot
+
+
+class SnapshotTests(EngineTestCase):
+    """ A snapshot is loaded only while the XML it was made from is
+    unchanged, and gives the same database as the XML. """
+
+    def setUp(self):
+        EngineTestCase.setUp(self)
+        self.path = self.folder.file("database.xml", LEGACY)
+
+    def test_snapshot_records_the_xml(self):
+        db = xmlEngines[0](self.path)
+        db.save(self.path)
+        with open(self.path + ".snap", "rb") as file:
+            snap = Snapshot.loads(file.read(), xmlEngines[0].stuDefaults)
+        self.assertEqual(snap["source"], Snapshot.stamp(self.path))
+
+    def test_snapshot_matches_the_xml(self):
+        for engine in xmlEngines:
+            with self.subTest(engine=engine.__name__):
+                engine(self.path).save(self.path)
+                fromSnap = engine(self.path)
+                with mock.patch.object(engine, "snapshots", False):
+                    fromXML = engine(self.path)
+                for db in (fromSnap, fromXML):
+                    db.stuAbsenceAll()
+                self.assertEqual(fromSnap.headerList, fromXML.headerList)
+                for name in fromXML.activeNames():
+                    self.assertEqual(fromSnap.stuRec(name), fromXML.stuRec(name))
+
+    def test_changed_xml_is_not_shadowed(self):
+        for engine in xmlEngines:
+            with self.subTest(engine=engine.__name__):
+                engine(self.path).save(self.path)
+                # an edit which leaves the XML older than the snapshot
+                snapTime = os.stat(self.path + ".snap").st_mtime_ns
+                with open(self.path) as file:
+                    text = file.read()
+                with open(self.path, "w") as file:
+                    file.write(text.replace('info="5" name="HW1"', 'info="9" name="HW1"'))
+                os.utime(self.path, ns=(snapTime - 10 ** 9, snapTime - 10 ** 9))
+
+                db = engine(self.path)
+                self.assertEqual(db.stuCall("Early Student", "HW1", True), "9")
+
+    def test_corrupt_snapshot_raises_ValueError(self):
+        xmlEngines[0](self.path).save(self.path)
+        with open(self.path + ".snap", "rb") as file:
+            data = file.read()
+        start = len(Snapshot.MAGIC) + Snapshot.SOURCE.size
+        for pos in range(start, len(data)):
+            damaged = data[:pos] + b"\xfe" + data[pos + 1:]
+            try:
+                Snapshot.loads(damaged, xmlEngines[0].stuDefaults)
+            except ValueError:
+                pass
+
+    def test_corrupt_snapshot_falls_back_to_the_xml(self):
+        for engine in xmlEngines:
+            with self.subTest(engine=engine.__name__):
+                engine(self.path).save(self.path)
+                with open(self.path + ".snap", "rb") as file:
+                    data = file.read()
+                # the first header's code past the end of the string
+                # table, with the snapshot still stamped with the XML
+                start = len(Snapshot.MAGIC) + Snapshot.SOURCE.size
+                numStrings, blobLength = struct.unpack_from("<III", data, start)[1:]
+                pos = start + 12 + blobLength
+                pos += 4 + 4 * struct.unpack_from("<I", data, pos)[0] + 4
+                damaged = data[:pos] + struct.pack("<I", numStrings) + data[pos + 4:]
+                with self.assertRaises(ValueError):
+                    Snapshot.loads(damaged, engine.stuDefaults)
+                with open(self.path + ".snap", "wb") as file:
+                    file.write(damaged)
+
+                db = engine(self.path)
+                with mock.patch.object(engine, "snapshots", False):
+                    fromXML = engine(self.path)
+                self.assertEqual(db.headerList, fromXML.headerList)
+                for name in fromXML.activeNames():
+                    self.assertEqual(db.stuRec(name), fromXML.stuRec(name))
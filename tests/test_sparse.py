@@ -0,0 +1,36 @@
+from unittest import mock
+import xml.etree.cElementTree as ET
+
+from tests.helpers import EngineTestCase, LEGACY, xmlEngines
+
+
+class SparseColumnTests(EngineTestCase):
+    """ A column added with a default stores only the cells which differ
+    from it, in memory and in the saved file, and reads back the same. """
+
+    def test_sparse_column_survives_a_reload(self):
+        for engine in xmlEngines:
+            with self.subTest(engine=engine.__name__):
+                path = self.folder.file(engine.__name__ + ".xml", LEGACY)
+                db = engine(path)
+                db.stuAdd("D4", "Y")
+                db.addDate("D4")
+                db.stuMod("Late Student", "D4", "N", True)
+                db.stuAbsenceAll()
+                db.save(path)
+
+                # only the changed cell and the default are written
+                root = ET.parse(path).getroot()
+                cells = [cat.attrib["info"] for cat in root.iter("AssignDate")
+                         if cat.attrib["name"] == "D4"]
+                self.assertEqual(cells, ["N"])
+                self.assertEqual([(default.attrib["name"], default.attrib["info"])
+                                  for default in root.find("Defaults")], [("D4", "Y")])
+
+                fromSnap = engine(path)
+                with mock.patch.object(engine, "snapshots", False):
+                    fromXML = engine(path)
+                for reloaded in (fromSnap, fromXML):
+                    self.assertEqual(reloaded.stuMassAssignDateCall("D4"), ["Y", "N"])
+                    self.assertEqual(reloaded.stuCall("Late Student", "Number_of_Absences"), "2")
+                    self.assertEqual(reloaded.stuTotals("Late Student"), (0.0, 2, 0))
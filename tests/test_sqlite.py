@@ -0,0 +1,25 @@
+from tests.helpers import EngineTestCase, LEGACY
+import DataInterface
+import SqliteInterface
+
+
+class MigrateTests(EngineTestCase):
+    """ Migrating an XML gradebook to SQLite carries over everything,
+    including the changes still waiting in its journal. """
+
+    def test_migrate_replays_the_journal(self):
+        path = self.folder.file("database.xml", LEGACY)
+        db = DataInterface.DataInterface(path, journal=True)
+        db.setPolicy({"maxAbsences": 99})
+        db.stuMod("Late Student", "D1", "N", True)
+        db.addStudent("New Student")
+        db.save(path)
+        self.assertTrue(db.journalSize)
+
+        sqlite = SqliteInterface.migrate(path, self.folder.file("database.db"))
+        self.assertEqual(sqlite.stuCall("Late Student", "D1", True), "N")
+        self.assertTrue(sqlite.stuQuery("D3"))
+        self.assertIn("New Student", sqlite.activeNames())
+        self.assertEqual(sqlite.policy.settings["maxAbsences"], 99)
+        sqlite.close()
+
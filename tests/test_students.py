@@ -0,0 +1,30 @@
+from tests.helpers import EngineTestCase, LEGACY
+
+
+class AddStudentsTests(EngineTestCase):
+    """ addStudents adds a whole workbook of students, reports what it did
+    with each record and saves the database once. """
+
+    def test_statuses_and_a_single_save(self):
+        for label, db in self.openEngines(LEGACY):
+            with self.subTest(engine=label):
+                db.dropStudent("Late Student")
+                requested = db.saveStats["requested"]
+                performed = db.saveStats["performed"]
+
+                statuses = db.addStudents([["New", "Student", "new@example.com", 3],
+                                           ["Early", "Student", "", ""],
+                                           ["Late", "Student", "", ""],
+                                           ["Short", "Record"]])
+                self.assertEqual(statuses, [1, 2, 3, 1])
+                self.assertEqual(db.saveStats["requested"], requested + 1)
+                self.assertEqual(db.saveStats["performed"], performed + 1)
+
+                self.assertEqual(db.stuCall("New Student", "Email"), "new@example.com")
+                self.assertEqual(db.stuCall("New Student", "Units"), "3")
+                self.assertEqual(db.stuCall("New Student", "In_Class"), "Yes")
+                self.assertEqual(db.stuCall("Short Record", "Units"), "")
+                # the students already there are left as they were
+                self.assertEqual(db.stuCall("Late Student", "In_Class"), "No")
+                self.assertEqual(db.activeNames(),
+                                 ("Early Student", "New Student", "Short Record"))
@@ -0,0 +1,76 @@
+import os
+import unittest
+
+try:
+    from PyQt5.QtCore import QCoreApplication
+except ImportError:
+    raise unittest.SkipTest("PyQt5 is not installed")
+
+from tests.helpers import EngineTestCase
+import TableModels
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+app = QCoreApplication.instance() or QCoreApplication([])
+
+
+class RosterOrderTests(EngineTestCase):
+    """ The student tables keep the rows of activeNames, the order which
+    stuMassMod and stuMassAssignDateMod take their lists in. """
+
+    def test_rows_follow_activeNames(self):
+        for label, db in self.engines():
+            with self.subTest(engine=label):
+                for name in ("D D", "B B", "C C"):
+                    db.addStudent(name)
+                db.stuMod("C C", "Flag", "Yes")
+                model = TableModels.GradesModel(db, db.activeNames())
+                self.assertEqual(model.names, ["B B", "D D"])
+
+                db.addStudent("A A")
+                db.stuMod("C C", "Flag", "No")
+                self.assertEqual(model.names, list(db.activeNames()))
+                self.assertEqual(model.names, ["A A", "B B", "C C", "D D"])
+
+                db.stuMod("B B", "Flag", "Yes")
+                db.dropStudent("D D")
+                self.assertEqual(model.names, ["A A", "C C"])
+                self.assertEqual(model.rows, {"A A": 0, "C C": 1})
+
+                # a mass edit in activeNames order lands on the matching rows
+                db.stuAdd("HW1", "")
+                db.addAssignment("HW1")
+                db.stuMassAssignDateMod("HW1", ["1", "3"])
+                self.assertEqual(model.data(model.index(1, 1)), "3")
+                model.detach()
+
+
+class RosterNameModelTests(EngineTestCase):
+    """ The shared roster name model stays sorted, without regard to
+    case, as names are added and removed. """
+
+    def test_names_stay_sorted(self):
+        for label, db in self.engines():
+            with self.subTest(engine=label):
+                for name in ("bob B", "Carol C", "Alice A"):
+                    db.addStudent(name)
+                model = TableModels.RosterNameModel(db)
+                self.assertEqual(model.stringList(), ["Alice A", "bob B", "Carol C"])
+
+                model.addName("anna A")
+                model.addName("Alice A")
+                model.addName("dave D")
+                self.assertEqual(model.stringList(),
+                                 ["Alice A", "anna A", "bob B", "Carol C", "dave D"])
+                self.assertEqual(model.find("bob B"), 2)
+
+                model.removeName("anna A")
+                model.removeName("Nobody")
+                self.assertEqual(model.stringList(), ["Alice A", "bob B", "Carol C", "dave D"])
+
+                # the model follows the students added and dropped
+                db.addStudent("Bea B")
+                db.dropStudent("Carol C")
+                self.assertEqual(model.stringList(), ["Alice A", "Bea B", "bob B", "dave D"])
+                self.assertEqual(model.stringList(), model.names)
+                self.assertEqual(model.keys, sorted(model.keys))
+                model.detach()
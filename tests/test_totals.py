@@ -0,0 +1,84 @@
+from tests.helpers import EngineTestCase, LEGACY
+
+
+class MissingCellTests(EngineTestCase):
+    """ A student without a cell for a date counts as present on it, in
+    every engine and in both stuAbsence and stuAbsenceAll. """
+
+    def tallies(self, db):
+        return [(db.stuCall(name, "Number_of_Absences"),
+                 db.stuCall(name, "Number_of_Excused"))
+                for name in ("Early Student", "Late Student")]
+
+    def test_stuAbsence_matches_stuAbsenceAll(self):
+        for label, db in self.openEngines(LEGACY):
+            with self.subTest(engine=label):
+                for name in ("Early Student", "Late Student"):
+                    db.stuAbsence(name)
+                single = self.tallies(db)
+                db.stuAbsenceAll()
+                self.assertEqual(single, self.tallies(db))
+                self.assertEqual(single, [("1", "1"), ("1", "0")])
+                self.assertEqual(db.stuTotals("Late Student"), (0.0, 1, 0))
+
+    def test_writing_a_missing_cell_updates_totals(self):
+        for label, db in self.openEngines(LEGACY):
+            with self.subTest(engine=label):
+                db.stuAbsence("Late Student")
+                db.stuMod("Late Student", "D1", "N", True)
+                db.stuAbsence("Late Student")
+                self.assertEqual(db.stuCall("Late Student", "Number_of_Absences"), "2")
+                self.assertEqual(db.checkTotals(), [])
+
+    def test_missing_cell_reads_as_none(self):
+        for label, db in self.openEngines(LEGACY):
+            with self.subTest(engine=label):
+                self.assertIsNone(db.stuCall("Late Student", "D1", True))
+                self.assertEqual(db.stuMassAssignDateCall("D1"), ["N", ""])
+
+
+class DeltaTests(EngineTestCase):
+    """ The running totals follow whole-column and group changes without
+    being rebuilt, and stay equal to totals built from scratch. """
+
+    def test_column_changes_keep_totals(self):
+        for label, db in self.engines():
+            with self.subTest(engine=label):
+                for name in ("A A", "B B", "C C"):
+                    db.addStudent(name)
+                db.stuAdd("D1", "Y")
+                db.addDate("D1")
+                db.stuAdd("HW1", "4")
+                db.addAssignment("HW1")
+                totals = db.stuTotals("A A") and db.totals
+
+                # a date added before its column, and one after
+                db.addDate("D2")
+                db.stuAdd("D2", "N")
+                db.stuAdd("D3", "E")
+                db.addDate("D3")
+                db.stuMassAssignDateMod("D1", ["N", "E", "Y"])
+                db.stuMassAssignDateMod("HW1", ["10", "", "3"])
+                self.assertEqual(db.stuTotals("A A"), (10.0, 2, 1))
+
+                # adding an existing column replaces its cells
+                db.stuAdd("HW1", "7")
+
+                self.assertIs(db.totals, totals)
+                self.assertEqual(db.stuCall("A A", "HW1", True), "7")
+                self.assertEqual(db.stuTotals("A A"), (7.0, 2, 1))
+                self.assertEqual(db.checkTotals(), [])
+
+    def test_week_grades_keep_group_totals(self):
+        for label, db in self.engines():
+            with self.subTest(engine=label):
+                db.addGroup("G")
+                db.groAdd("G", "W1", "3")
+                self.assertEqual(db.groTotal("G"), 3)
+                db.groAdd("G", "W2", "4")
+                db.groMod("G", "W1", "1")
+                db.groMod("G", "W2", "")
+                self.assertIn("G", db.groTotals)
+                self.assertEqual(db.groTotal("G"), 1)
+                self.assertEqual(db.checkTotals(), [])
+